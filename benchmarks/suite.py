@@ -0,0 +1,167 @@
+"""
+Times the stages of building a file for every bundled schema: adding the
+payments, finalizing the batches, serializing and validating. The results
+are written as JSON and can be compared against a stored baseline.
+
+Usage: python -m benchmarks.suite [--sizes 1000,10000] [--output results.json]
+                                  [--compare baseline.json] [--threshold 1.2] [--min-delta 0.01]
+
+Sizes of 100000 and 1000000 transactions are supported, but need a few GB of
+memory with the etree renderer.
+"""
+import argparse
+import datetime
+import io
+import json
+import platform
+import sys
+import time
+
+import sepaxml
+from sepaxml import SepaDD, SepaTransfer
+from sepaxml.testing import PaymentGenerator, make_config
+from sepaxml.validation import available_schemas, get_schema, try_valid_xml
+
+SIZES = [1000, 10000, 100000, 1000000]
+STAGES = ["add_payment", "finalize_batch", "serialize", "validate"]
+
+# A fixed start date makes the generated payments the same on every run.
+START_DATE = datetime.date(2024, 1, 1)
+
+
+def run(schema, size, batch, renderer="etree"):
+    """
+    Builds one file and times its stages.
+
+    @return: A dict with the time of each stage in seconds and the size of the file
+    """
+    kind, cls = ("debit", SepaDD) if schema.startswith("pain.008") else ("transfer", SepaTransfer)
+    payments = list(PaymentGenerator(kind, seed=0, start_date=START_DATE).payments(size))
+    sepa = cls(make_config(kind, batch), schema=schema, renderer=renderer)
+    result = {"schema": schema, "size": size, "batch": batch, "renderer": renderer}
+
+    t = time.perf_counter()
+    for payment in payments:
+        sepa.add_payment(payment)
+    result["add_payment"] = time.perf_counter() - t
+
+    t = time.perf_counter()
+    sepa._finalize()
+    result["finalize_batch"] = time.perf_counter() - t
+
+    t = time.perf_counter()
+    out = io.BytesIO()
+    sepa._write_xml(out)
+    xmlout = out.getvalue()
+    result["serialize"] = time.perf_counter() - t
+
+    # Compiling the schema is only done once per process and not measured.
+    get_schema(schema)
+    t = time.perf_counter()
+    try_valid_xml(xmlout, schema)
+    result["validate"] = time.perf_counter() - t
+
+    result["bytes"] = len(xmlout)
+    return result
+
+
+def run_suite(sizes, schemas=None, renderers=("etree",), repeat=1, log=None):
+    """
+    Runs every combination of schema, size, batch mode and renderer. With
+    repeat, the fastest time of each stage is kept.
+
+    @return: The results as a JSON-compatible dict
+    """
+    results = []
+    for schema in schemas or available_schemas():
+        for size in sizes:
+            for batch in (True, False):
+                for renderer in renderers:
+                    runs = [run(schema, size, batch, renderer) for _ in range(repeat)]
+                    result = runs[0]
+                    for stage in STAGES:
+                        result[stage] = min(r[stage] for r in runs)
+                    if log:
+                        log(format_result(result))
+                    results.append(result)
+    return {
+        "sepaxml": sepaxml.version,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "date": datetime.datetime.now().isoformat(timespec="seconds"),
+        "results": results,
+    }
+
+
+def _key(result):
+    return result["schema"], result["size"], result["batch"], result["renderer"]
+
+
+def compare(results, baseline, threshold=1.2, min_delta=0.01):
+    """
+    Compares results against a baseline. Combinations missing from the
+    baseline are skipped.
+
+    @param threshold: The ratio of new to old time above which a stage counts as a regression
+    @param min_delta: Slowdowns of fewer seconds are ignored as noise
+    @return: A list of (result, stage, old, new) tuples for the regressions
+    """
+    old = {_key(r): r for r in baseline["results"]}
+    regressions = []
+    for result in results["results"]:
+        base = old.get(_key(result))
+        if base is None:
+            continue
+        for stage in STAGES:
+            if result[stage] - base[stage] >= min_delta and result[stage] > base[stage] * threshold:
+                regressions.append((result, stage, base[stage], result[stage]))
+    return regressions
+
+
+def format_result(result):
+    return "%-16s %8d %-9s %-8s " % (
+        result["schema"], result["size"], "batch" if result["batch"] else "single", result["renderer"]
+    ) + " ".join("%s %9.3fs" % (stage, result[stage]) for stage in STAGES)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmarks building SEPA files.")
+    parser.add_argument("--sizes", default="1000,10000",
+                        help="Comma-separated numbers of transactions, e.g. " + ",".join(str(s) for s in SIZES))
+    parser.add_argument("--schemas", help="Comma-separated schemas, default all")
+    parser.add_argument("--renderers", default="etree", help="Comma-separated renderers, etree and/or template")
+    parser.add_argument("--repeat", type=int, default=1, help="Runs per combination, the fastest is kept")
+    parser.add_argument("--output", help="Write the results as JSON to this file")
+    parser.add_argument("--compare", help="Compare against the results in this JSON file")
+    parser.add_argument("--threshold", type=float, default=1.2, help="Slowdown ratio that counts as a regression")
+    parser.add_argument("--min-delta", type=float, default=0.01, help="Slowdowns of fewer seconds are ignored")
+    args = parser.parse_args(argv)
+
+    results = run_suite(
+        [int(s) for s in args.sizes.split(",")],
+        schemas=args.schemas.split(",") if args.schemas else None,
+        renderers=args.renderers.split(","),
+        repeat=args.repeat,
+        log=print,
+    )
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.threshold, args.min_delta)
+        for result, stage, old, new in regressions:
+            print("REGRESSION %-16s %8d %-6s %-8s %-14s %9.3fs -> %9.3fs (x%.2f)" % (
+                result["schema"], result["size"], "batch" if result["batch"] else "single", result["renderer"],
+                stage, old, new, new / max(old, 1e-9)
+            ))
+        if regressions:
+            return 1
+        print("No regressions compared to %s" % args.compare)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
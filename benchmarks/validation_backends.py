@@ -0,0 +1,40 @@
+"""
+Compares the available validation backends on generated direct debit files.
+
+Usage: python -m benchmarks.validation_backends [SIZE ...]
+"""
+import sys
+import time
+
+from sepaxml import SepaDD
+from sepaxml.testing import PaymentGenerator, make_config
+from sepaxml.validation import BACKENDS, get_schema, try_valid_xml
+
+SCHEMA = "pain.008.001.02"
+
+
+def make_document(size):
+    sdd = SepaDD(make_config("debit"), schema=SCHEMA)
+    for payment in PaymentGenerator("debit", seed=0).payments(size):
+        sdd.add_payment(payment)
+    return sdd.export(validate=False)
+
+
+def main(sizes):
+    backends = [b for b in BACKENDS.values() if b.is_available()]
+    for backend in backends:
+        t = time.perf_counter()
+        get_schema(SCHEMA, backend.name)
+        print("%-10s compile %10.3fs" % (backend.name, time.perf_counter() - t))
+
+    for size in sizes:
+        xmlout = make_document(size)
+        print("%d transactions, %d bytes" % (size, len(xmlout)))
+        for backend in backends:
+            t = time.perf_counter()
+            try_valid_xml(xmlout, SCHEMA, backend=backend.name)
+            print("%-10s validate %9.3fs" % (backend.name, time.perf_counter() - t))
+
+
+if __name__ == '__main__':
+    main([int(a) for a in sys.argv[1:]] or [10000, 100000])
@@ -0,0 +1,191 @@
+"""
+Copyright (c) 2017-2023 Raphael Michel and contributors
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is furnished
+to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY,
+WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN
+CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+"""
+# Measures the memory a document holds per added payment and the peak memory
+# of exporting it, for every schema, with tracemalloc.
+#
+# tracemalloc only sees memory allocated by Python, so memory that libxml2
+# allocates while validating with the lxml backend is not included. Objects
+# that Python reuses from its free lists are attributed to the site that
+# allocated them first, e.g. dicts of the generated payments.
+#
+# Usage: python -m sepaxml.bench.memory [--sizes 1000,10000] [--schemas ...]
+#                                       [--renderers etree,template] [--top 5] [--output results.json]
+import argparse
+import datetime
+import gc
+import json
+import linecache
+import os
+import sys
+import tracemalloc
+
+from .. import SepaDD, SepaTransfer
+from ..cleaning import default_cleaner
+from ..testing import PaymentGenerator, make_config
+from ..validation import available_schemas, get_backend, get_schema
+
+EXPORTS = (
+    ("plain", {"validate": False, "pretty_print": False}),
+    ("validate", {"validate": True, "pretty_print": False}),
+    ("pretty_print", {"validate": False, "pretty_print": True}),
+    ("pretty_print+validate", {"validate": True, "pretty_print": True}),
+)
+
+START_DATE = datetime.date(2024, 1, 1)
+PACKAGE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def build(schema, size, batch, renderer):
+    """
+    Creates a document and adds size synthetic payments. The payments are
+    generated one by one, so only what the document keeps of them stays in
+    memory.
+    """
+    kind, cls = ("debit", SepaDD) if schema.startswith("pain.008") else ("transfer", SepaTransfer)
+    sepa = cls(make_config(kind, batch), schema=schema, renderer=renderer)
+    for payment in PaymentGenerator(kind, seed=0, start_date=START_DATE).payments(size):
+        sepa.add_payment(payment)
+    return sepa
+
+
+def _traced():
+    # The cache of cleaned texts is shared by all documents and bounded, so
+    # it is emptied before every measurement.
+    default_cleaner.clear()
+    gc.collect()
+    return tracemalloc.get_traced_memory()[0]
+
+
+def _site(frame):
+    filename = frame.filename
+    if filename.startswith(PACKAGE_DIR):
+        filename = "sepaxml" + filename[len(PACKAGE_DIR):]
+    else:
+        filename = os.path.basename(filename)
+    line = linecache.getline(frame.filename, frame.lineno).strip()
+    return "{}:{} {}".format(filename, frame.lineno, line)
+
+
+def measure(schema, size, batch, renderer="etree", top=5):
+    """
+    Measures one combination of schema, size, batch mode and renderer.
+    tracemalloc must be tracing.
+
+    @param top: The number of allocation sites to report
+    @return: A dict with the bytes retained by the document after adding the
+    payments, per payment, the biggest allocation sites of these bytes, and
+    the peak bytes above the retained ones while exporting with and without
+    pretty_print and validate.
+    """
+    # Compiled schemas are cached for the whole process and not counted.
+    get_schema(schema)
+    result = {
+        "schema": schema, "size": size, "batch": batch, "renderer": renderer,
+        "validation_backend": get_backend().name,
+    }
+
+    before = _traced()
+    snapshot = tracemalloc.take_snapshot()
+    sepa = build(schema, size, batch, renderer)
+    retained = _traced() - before
+    result["retained"] = retained
+    result["per_payment"] = retained / size if size else 0.0
+    stats = tracemalloc.take_snapshot().compare_to(snapshot, "lineno")
+    stats = [s for s in stats if s.size_diff > 0 and s.traceback[0].filename != tracemalloc.__file__]
+    result["sites"] = [
+        {"site": _site(s.traceback[0]), "bytes": s.size_diff, "count": s.count_diff} for s in stats[:top]
+    ]
+    del sepa, snapshot, stats
+
+    result["export_peak"] = {}
+    for name, kwargs in EXPORTS:
+        sepa = build(schema, size, batch, renderer)
+        _traced()
+        # Restarting drops the traces so far, the peak is then that of the
+        # memory allocated during the export. tracemalloc.reset_peak needs Python 3.9.
+        limit = tracemalloc.get_traceback_limit()
+        tracemalloc.stop()
+        tracemalloc.start(limit)
+        sepa.export(**kwargs)
+        result["export_peak"][name] = tracemalloc.get_traced_memory()[1]
+        del sepa
+    return result
+
+
+def run(sizes, schemas=None, renderers=("etree",), top=5, log=None):
+    """
+    Measures every combination of schema, size, batch mode and renderer.
+
+    @return: A list of the results of measure()
+    """
+    results = []
+    tracemalloc.start()
+    try:
+        for schema in schemas or available_schemas():
+            for size in sizes:
+                for batch in (True, False):
+                    for renderer in renderers:
+                        result = measure(schema, size, batch, renderer, top)
+                        if log:
+                            log(format_result(result))
+                        results.append(result)
+    finally:
+        tracemalloc.stop()
+    return results
+
+
+def format_result(result):
+    lines = ["%-16s %8d %-6s %-8s retained %12d bytes, %8.1f bytes/payment" % (
+        result["schema"], result["size"], "batch" if result["batch"] else "single", result["renderer"],
+        result["retained"], result["per_payment"],
+    )]
+    lines.append("    export peak " + ", ".join(
+        "%s %d" % (name, peak) for name, peak in result["export_peak"].items()
+    ))
+    for site in result["sites"]:
+        lines.append("    %12d bytes %8d blocks  %s" % (site["bytes"], site["count"], site["site"]))
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Measures the memory usage of building SEPA files.")
+    parser.add_argument("--sizes", default="1000", help="Comma-separated numbers of transactions")
+    parser.add_argument("--schemas", help="Comma-separated schemas, default all")
+    parser.add_argument("--renderers", default="etree", help="Comma-separated renderers, etree and/or template")
+    parser.add_argument("--top", type=int, default=5, help="Number of allocation sites to show")
+    parser.add_argument("--output", help="Write the results as JSON to this file")
+    args = parser.parse_args(argv)
+
+    results = run(
+        [int(s) for s in args.sizes.split(",")],
+        schemas=args.schemas.split(",") if args.schemas else None,
+        renderers=args.renderers.split(","),
+        top=args.top,
+        log=print,
+    )
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
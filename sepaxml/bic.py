@@ -0,0 +1,180 @@
+"""
+Copyright (c) 2017-2023 Raphael Michel and contributors
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is furnished
+to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY,
+WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN
+CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+"""
+import csv
+import itertools
+import re
+import sys
+
+BIC_PATTERN = re.compile(r"[A-Z]{6}[A-Z0-9]{2}([A-Z0-9]{3})?\Z")
+
+# Position of the national bank code within the BBAN, i.e. the IBAN without
+# country code and check digits, from the SWIFT IBAN registry.
+BANK_CODE_POSITIONS = {
+    "AD": (0, 4),
+    "AT": (0, 5),
+    "BE": (0, 3),
+    "BG": (0, 4),
+    "CH": (0, 5),
+    "CY": (0, 3),
+    "CZ": (0, 4),
+    "DE": (0, 8),
+    "DK": (0, 4),
+    "EE": (0, 2),
+    "ES": (0, 4),
+    "FI": (0, 3),
+    "FR": (0, 5),
+    "GB": (0, 4),
+    "GR": (0, 3),
+    "HR": (0, 7),
+    "HU": (0, 3),
+    "IE": (0, 4),
+    "IS": (0, 4),
+    "IT": (1, 6),
+    "LI": (0, 5),
+    "LT": (0, 5),
+    "LU": (0, 3),
+    "LV": (0, 4),
+    "MC": (0, 5),
+    "MT": (0, 4),
+    "NL": (0, 4),
+    "NO": (0, 4),
+    "PL": (0, 8),
+    "PT": (0, 4),
+    "RO": (0, 4),
+    "SE": (0, 3),
+    "SI": (0, 5),
+    "SK": (0, 4),
+    "SM": (1, 6),
+    "VA": (0, 3),
+}
+
+
+def is_valid_bic(bic):
+    """
+    Checks the syntax of a BIC (ISO 9362): four letters for the institution,
+    two letters for the country, two letters or digits for the location and
+    optionally three letters or digits for the branch.
+    @param bic: The BIC in upper case
+    @return: True if the BIC is valid
+    """
+    return BIC_PATTERN.match(bic) is not None
+
+
+def bank_code_from_iban(iban):
+    """
+    Extracts the national bank code from a normalized IBAN.
+    @return: A tuple of the country code and the bank code, or None if the
+    position of the bank code is not known for the country
+    """
+    country = iban[:2]
+    try:
+        start, end = BANK_CODE_POSITIONS[country]
+    except KeyError:
+        return None
+    return country, iban[4 + start:4 + end]
+
+
+class BicDirectory:
+    """
+    Maps national bank codes to BICs, e.g. to find the BIC of a debtor from
+    their IBAN. Lookups are dict lookups. Every distinct BIC is stored only
+    once, however many bank codes refer to it.
+    """
+
+    def __init__(self):
+        self._bics = {}  # country + bank code -> BIC
+
+    @classmethod
+    def from_file(cls, path, delimiter=None):
+        """
+        Loads a directory from a local CSV file with the columns country,
+        bank code and BIC, e.g. "DE,37040044,COBADEFFXXX". Empty lines, lines
+        starting with # and a header line starting with "country" are skipped.
+        @param path: The path of the file
+        @param delimiter: The column delimiter, detected from the first line if not given
+        @raise ValueError: if a line is malformed or contains an invalid BIC
+        @return: The BicDirectory
+        """
+        directory = cls()
+        with open(path, newline='', encoding='utf-8') as f:
+            directory.load(f, delimiter)
+        return directory
+
+    def load(self, lines, delimiter=None):
+        """
+        Adds the entries of an iterable of CSV lines, see from_file.
+        """
+        lines = _skip_comments(lines)
+        first = next(lines, None)
+        if first is None:
+            return
+        if delimiter is None:
+            delimiter = ";" if ";" in first else "\t" if "\t" in first else ","
+
+        for lineno, row in enumerate(csv.reader(itertools.chain([first], lines), delimiter=delimiter), 1):
+            if row[0].strip().lower() == "country":
+                continue
+            if len(row) < 3:
+                raise ValueError("Entry {} of the BIC directory is malformed: {}".format(lineno, row))
+            try:
+                self.add(row[0], row[1], row[2])
+            except ValueError as e:
+                raise ValueError("Entry {} of the BIC directory: {}".format(lineno, e))
+
+    def add(self, country, bank_code, bic):
+        """
+        Adds a single entry. Later entries for the same bank code override
+        earlier ones.
+        @raise ValueError: if the BIC is invalid
+        """
+        bic = bic.strip().upper()
+        if not is_valid_bic(bic):
+            raise ValueError("Invalid BIC: {}".format(bic))
+        self._bics[country.strip().upper() + bank_code.strip().upper()] = sys.intern(bic)
+
+    def lookup(self, country, bank_code):
+        """
+        @return: The BIC of a bank code, or None if it is unknown
+        """
+        return self._bics.get(country + bank_code)
+
+    def bic_for_iban(self, iban):
+        """
+        @param iban: A normalized IBAN
+        @return: The BIC of the bank of the account, or None if it is unknown
+        """
+        bank_code = bank_code_from_iban(iban)
+        if bank_code is None:
+            return None
+        return self._bics.get(bank_code[0] + bank_code[1])
+
+    def __len__(self):
+        return len(self._bics)
+
+    def __contains__(self, key):
+        return key[0] + key[1] in self._bics
+
+
+def _skip_comments(lines):
+    for line in lines:
+        stripped = line.strip()
+        if stripped and not stripped.startswith("#"):
+            yield stripped
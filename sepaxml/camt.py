@@ -0,0 +1,165 @@
+"""
+Copyright (c) 2017-2023 Raphael Michel and contributors
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is furnished
+to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY,
+WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN
+CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+"""
+import datetime
+import xml.etree.ElementTree as ET
+
+from .utils import decimal_str_to_int
+
+# The elements that contain the entries of camt.053 and camt.054 documents
+CONTAINER_TAGS = ("Stmt", "Ntfctn", "Rpt")
+
+
+class EntryReader:
+    """
+    Reads the entries of camt.053 (bank to customer statement) and camt.054
+    (debit/credit notification) files in constant memory, e.g. to reconcile
+    them with the payments of submitted pain files. Every entry element is
+    discarded as soon as it has been read.
+
+    Iterating yields one dict per transaction. Batch bookings with several
+    transaction details yield one dict per transaction, entries without
+    details yield a single dict. Amounts are integer cents, dates are
+    datetime.date objects. The schema (e.g. "camt.053.001.06") is available
+    in the attribute schema once the iteration has started.
+
+    The reader does not validate the file. The schemas camt.053.001.06 and
+    camt.054.001.06 are bundled and can be used with
+    sepaxml.validation.try_valid_xml beforehand. Other versions, such as the
+    widely used camt.053.001.02, are read as well but cannot be validated
+    with the bundled schemas.
+    """
+
+    def __init__(self, source):
+        """
+        @param source: A path or a binary file-like object
+        """
+        self.source = source
+        self.schema = None
+
+    def __iter__(self):
+        stack = []
+        container = None
+        for event, elem in ET.iterparse(self.source, events=("start", "end")):
+            if event == "start":
+                ns, _, elem.tag = elem.tag.rpartition("}")
+                if self.schema is None:
+                    self.schema = ns.lstrip("{").rpartition(":")[2]
+                if elem.tag == "Ntry" and container is None:
+                    # The account data precedes the first entry.
+                    container = {
+                        "statement_id": stack[-1].findtext("Id"),
+                        "account_IBAN": stack[-1].findtext("Acct/Id/IBAN"),
+                    }
+                stack.append(elem)
+                continue
+
+            stack.pop()
+            if elem.tag == "Ntry":
+                for entry in self._read_entry(elem, container):
+                    yield entry
+                stack[-1].remove(elem)
+            elif elem.tag in CONTAINER_TAGS and container is not None:
+                container = None
+                stack[-1].remove(elem)
+
+    def _read_entry(self, elem, container):
+        amount = elem.find("Amt")
+        status = elem.find("Sts")
+        if status is not None and len(status):
+            # Newer versions wrap the status in a code element
+            status = status[0].text
+        elif status is not None:
+            status = status.text
+        entry = {
+            "statement_id": container["statement_id"],
+            "account_IBAN": container["account_IBAN"],
+            "entry_ref": elem.findtext("NtryRef"),
+            "account_servicer_ref": elem.findtext("AcctSvcrRef"),
+            "amount": decimal_str_to_int(amount.text),
+            "currency": amount.get("Ccy"),
+            "credit_debit": elem.findtext("CdtDbtInd"),
+            "reversal": elem.findtext("RvslInd") == "true",
+            "status": status,
+            "booking_date": _date(elem.find("BookgDt")),
+            "value_date": _date(elem.find("ValDt")),
+        }
+
+        details = elem.findall("NtryDtls/TxDtls")
+        if not details:
+            entry.update(_transaction(None))
+            yield entry
+            return
+
+        for tx in details:
+            result = dict(entry)
+            result.update(_transaction(tx))
+            if result["amount"] is None:
+                result["amount"] = entry["amount"]
+            yield result
+
+
+def read_entries(source):
+    """
+    Shortcut to iterate over the entries of a camt file, see EntryReader.
+    @param source: A path or a binary file-like object
+    @return: A generator of entry dicts
+    """
+    return iter(EntryReader(source))
+
+
+def _transaction(tx):
+    """
+    Reads the references, the amount and the return information of a
+    TxDtls element. The amount is None if the details do not contain one.
+    """
+    if tx is None:
+        return {
+            "endtoend_id": None, "msg_id": None, "pmtinf_id": None, "mandate_id": None,
+            "return_reason": None, "return_info": None,
+        }
+    result = {
+        "endtoend_id": tx.findtext("Refs/EndToEndId"),
+        "msg_id": tx.findtext("Refs/MsgId"),
+        "pmtinf_id": tx.findtext("Refs/PmtInfId"),
+        "mandate_id": tx.findtext("Refs/MndtId"),
+        "return_reason": tx.findtext("RtrInf/Rsn/Cd") or tx.findtext("RtrInf/Rsn/Prtry"),
+        "return_info": tx.findtext("RtrInf/AddtlInf"),
+    }
+    # camt.053.001.02 has the amount in AmtDtls only, newer versions also in Amt
+    amount = tx.find("Amt")
+    if amount is None:
+        amount = tx.find("AmtDtls/TxAmt/Amt")
+    if amount is not None:
+        result["amount"] = decimal_str_to_int(amount.text)
+        result["currency"] = amount.get("Ccy")
+    else:
+        result["amount"] = None
+    return result
+
+
+def _date(elem):
+    """
+    Reads a date choice element, which contains either a Dt or a DtTm.
+    """
+    if elem is None:
+        return None
+    text = elem.findtext("Dt") or elem.findtext("DtTm")
+    return datetime.datetime.strptime(text[:10], "%Y-%m-%d").date() if text else None
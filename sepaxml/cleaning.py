@@ -0,0 +1,123 @@
+"""
+Copyright (c) 2017-2023 Raphael Michel and contributors
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is furnished
+to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY,
+WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN
+CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+"""
+import threading
+from collections import OrderedDict
+
+from text_unidecode import unidecode
+
+from .utils import is_ascii
+
+
+class TextCleaner:
+    """
+    Transliterates texts to ASCII and truncates them to a maximum length.
+    Pure ASCII texts are passed through without transliteration, all other
+    texts are transliterated once and kept in a bounded LRU cache, since
+    names tend to repeat a lot between payments.
+    """
+
+    def __init__(self, maxsize=4096):
+        self.maxsize = maxsize
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+        self.ascii = 0  # Texts passed through without transliteration
+        self.hits = 0  # Non-ASCII texts found in the cache
+        self.misses = 0  # Non-ASCII texts that needed to be transliterated
+        self.transliterated_chars = 0  # Characters fed into unidecode
+
+    def transliterate(self, text):
+        """
+        Returns the ASCII transliteration of a text.
+        @param text: The text to transliterate
+        @return: The transliterated text
+        """
+        if is_ascii(text):
+            self.ascii += 1
+            return text
+        with self._lock:
+            try:
+                result = self._cache[text]
+            except KeyError:
+                pass
+            else:
+                self._cache.move_to_end(text)
+                self.hits += 1
+                return result
+        result = unidecode(text)
+        with self._lock:
+            self.misses += 1
+            self.transliterated_chars += len(text)
+            if self.maxsize:
+                self._cache[text] = result
+                if len(self._cache) > self.maxsize:
+                    self._cache.popitem(last=False)
+        return result
+
+    def clean(self, text, length):
+        """
+        Returns the ASCII transliteration of a text, truncated to length.
+        @param text: The text to clean
+        @param length: The maximum length of the result
+        @return: The cleaned text
+        """
+        return self.transliterate(text)[:length]
+
+    @property
+    def hit_rate(self):
+        """
+        Returns the share of texts that did not need to be transliterated.
+        """
+        total = self.ascii + self.hits + self.misses
+        return (self.ascii + self.hits) / total if total else 0.0
+
+    def stats(self):
+        """
+        Returns the counters of this cleaner as a dict.
+        """
+        return {
+            'ascii': self.ascii,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hit_rate,
+            'transliterated_chars': self.transliterated_chars,
+            'cache_size': len(self._cache),
+        }
+
+    def clear(self):
+        """
+        Empties the cache and resets all counters.
+        """
+        with self._lock:
+            self._cache.clear()
+            self.ascii = self.hits = self.misses = self.transliterated_chars = 0
+
+
+default_cleaner = TextCleaner()
+
+
+def clean_text(text, length):
+    """
+    Cleans a text using the process-wide default cleaner.
+    @param text: The text to clean
+    @param length: The maximum length of the result
+    @return: The cleaned text
+    """
+    return default_cleaner.clean(text, length)
@@ -0,0 +1,69 @@
+"""
+Copyright (c) 2017-2023 Raphael Michel and contributors
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is furnished
+to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY,
+WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN
+CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+"""
+import functools
+import re
+
+from .iban import _LETTERS_TO_DIGITS
+
+# Country code, check digits, creditor business code and national identifier
+CREDITOR_ID_PATTERN = re.compile(r"([A-Z]{2})([0-9]{2})[A-Z0-9]{3}([A-Z0-9]{1,28})\Z")
+
+# Total length of creditor identifiers for countries with a fixed length
+# national identifier, from the EPC overview of creditor identifiers.
+CREDITOR_ID_LENGTHS = {
+    "AT": 18,
+    "BE": 20,
+    "DE": 18,
+    "ES": 16,
+    "FR": 13,
+    "IT": 23,
+    "NL": 19,
+}
+
+
+def creditor_id_check_digits(country, national_id):
+    """
+    Computes the check digits of a SEPA creditor identifier according to
+    ISO 7064 mod 97-10. The creditor business code is not part of the check.
+    @param country: The country code, e.g. "DE"
+    @param national_id: The national identifier, e.g. "09999999999"
+    @return: The check digits as a string, e.g. "98"
+    """
+    remainder = int((national_id + country + "00").translate(_LETTERS_TO_DIGITS)) % 97
+    return "{:02d}".format(98 - remainder)
+
+
+@functools.lru_cache(maxsize=1024)
+def is_valid_creditor_id(creditor_id):
+    """
+    Checks the format, the national length and the check digits of a SEPA
+    creditor identifier like "DE98ZZZ09999999999". Results are cached, as
+    the same few identifiers are checked for every document.
+    @param creditor_id: The creditor identifier in upper case
+    @return: True if the creditor identifier is valid
+    """
+    match = CREDITOR_ID_PATTERN.match(creditor_id)
+    if match is None:
+        return False
+    country, check_digits, national_id = match.groups()
+    if len(creditor_id) != CREDITOR_ID_LENGTHS.get(country, len(creditor_id)):
+        return False
+    return creditor_id_check_digits(country, national_id) == check_digits
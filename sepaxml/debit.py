@@ -21,9 +21,19 @@ CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
 """
 import datetime
 import xml.etree.ElementTree as ET
+from collections import namedtuple
 
-from .shared import SepaPaymentInitn
-from .utils import ADDRESS_MAPPING, int_to_decimal_str, make_id
+from .creditor import is_valid_creditor_id
+from .shared import (SepaPaymentInitn, check_column, date_column,
+                     optional_column, require_columns)
+from .utils import (ADDRESS_MAPPING, address_items, int_to_decimal_str,
+                    xml_address, xml_element, xml_escape_attrib)
+
+# Compact representation of a validated payment, see SepaPaymentInitn.lazy
+DebitRecord = namedtuple('DebitRecord', [
+    'name', 'IBAN', 'BIC', 'amount', 'currency', 'type', 'collection_date',
+    'mandate_id', 'mandate_date', 'description', 'endtoend_id', 'address',
+])
 
 
 class SepaDD(SepaPaymentInitn):
@@ -32,10 +42,17 @@ class SepaDD(SepaPaymentInitn):
     """
     root_el = "CstmrDrctDbtInitn"
 
-    def __init__(self, config, schema="pain.008.001.02", clean=True):
+    def __init__(self, config, schema="pain.008.001.02", clean=True, lazy=False, renderer="etree", id_generator=None,
+                 check_iban=False, bic_directory=None, check_creditor_id=False, stats=None):
+        """
+        @param check_creditor_id: If True, the creditor identifier of the config
+        and the identifier of the ultimate creditor, if its scheme is SEPA, are
+        validated, see sepaxml.creditor. See SepaPaymentInitn for the other parameters.
+        """
+        self.check_creditor_id = check_creditor_id
         if "instrument" not in config:
             config["instrument"] = "CORE"
-        super().__init__(config, schema, clean)
+        super().__init__(config, schema, clean, lazy, renderer, id_generator, check_iban, bic_directory, stats)
 
     def check_config(self, config):
         """
@@ -53,6 +70,14 @@ class SepaDD(SepaPaymentInitn):
             if config_item not in config:
                 validation += config_item.upper() + "_MISSING "
 
+        if self.check_creditor_id:
+            if 'creditor_id' in config and not is_valid_creditor_id(config['creditor_id']):
+                validation += "CREDITOR_ID_INVALID "
+            ultimate_creditor = config.get('ultimate_creditor') or {}
+            if ('id' in ultimate_creditor and ultimate_creditor.get('id_scheme_name', '').upper() == 'SEPA' and
+                    not is_valid_creditor_id(ultimate_creditor['id'])):
+                validation += "ULTIMATE_CREDITOR_ID_INVALID "
+
         if not validation:
             return True
         else:
@@ -78,6 +103,8 @@ class SepaDD(SepaPaymentInitn):
             validation += "COLLECTION_DATE_INVALID_OR_NOT_DATETIME_INSTANCE"
         payment['collection_date'] = str(payment['collection_date'])
 
+        validation += self._check_accounts(payment)
+
         if validation == "":
             return True
         else:
@@ -90,28 +117,88 @@ class SepaDD(SepaPaymentInitn):
         @raise exception: when payment is invalid
         """
         if self.clean:
-            from text_unidecode import unidecode
-
-            payment['name'] = unidecode(payment['name'])[:70]
-            payment['description'] = unidecode(payment['description'])[:140]
+            payment['name'] = self._clean_text(payment['name'], 70)
+            payment['description'] = self._clean_text(payment['description'], 140)
 
         # Validate the payment
         self.check_payment(payment)
 
+        if not payment.get('endtoend_id', ''):
+            payment['endtoend_id'] = self._make_id()
+
+        record = DebitRecord(
+            name=payment['name'],
+            IBAN=payment['IBAN'],
+            BIC=payment.get('BIC'),
+            amount=payment['amount'],
+            currency=payment.get('currency', self._config['currency']),
+            type=payment['type'],
+            collection_date=payment['collection_date'],
+            mandate_id=payment['mandate_id'],
+            mandate_date=payment['mandate_date'],
+            description=payment['description'],
+            endtoend_id=payment['endtoend_id'][:35],
+            address=address_items(payment.get('address')),
+        )
+        if self.lazy:
+            self._payments.append(record)
+        else:
+            self._add_record(record)
+
+        self._nb_of_txs_total += 1
+        self._ctrl_sum_total += payment['amount']
+
+    def _records_from_columns(self, columns, count):
+        """
+        Bulk version of the cleaning and validation in add_payment, working
+        on whole columns of payment data.
+        @return: A list of DebitRecords
+        """
+        require_columns(columns, ["name", "IBAN", "amount", "type", "collection_date",
+                                  "mandate_id", "mandate_date", "description"])
+        names = columns['name']
+        descriptions = columns['description']
+        if self.clean:
+            names = self._clean_column(names, 70)
+            descriptions = self._clean_column(descriptions, 140)
+
+        check_column(columns['amount'], lambda a: isinstance(a, int), "AMOUNT_NOT_INTEGER")
+        ibans, bics = self._account_columns(columns, count)
+        mandate_dates = date_column(columns['mandate_date'], "MANDATE_DATE_INVALID_OR_NOT_DATETIME_INSTANCE")
+        collection_dates = date_column(columns['collection_date'], "COLLECTION_DATE_INVALID_OR_NOT_DATETIME_INSTANCE")
+
+        currency = self._config['currency']
+        currencies = [c or currency for c in optional_column(columns, 'currency', count)]
+        endtoend_ids = [
+            e[:35] if e else self._make_id()
+            for e in optional_column(columns, 'endtoend_id', count)
+        ]
+        return list(map(
+            DebitRecord, names, ibans, bics, columns['amount'],
+            currencies, columns['type'], collection_dates, columns['mandate_id'], mandate_dates,
+            descriptions, endtoend_ids, [address_items(a) for a in optional_column(columns, 'address', count)],
+        ))
+
+    def _add_record(self, payment):
+        """
+        Builds the XML nodes for a validated payment record and adds them
+        to the document or the batch list.
+        @param payment: The DebitRecord
+        """
         # Get the CstmrDrctDbtInitnNode
         if not self._config['batch']:
             # Start building the non batch payment
             PmtInf_nodes = self._create_PmtInf_node()
-            PmtInf_nodes['PmtInfIdNode'].text = make_id(self._config['name'])
+            PmtInf_nodes['PmtInfIdNode'].text = self._make_id()
             PmtInf_nodes['PmtMtdNode'].text = "DD"
             PmtInf_nodes['BtchBookgNode'].text = "false"
             PmtInf_nodes['NbOfTxsNode'].text = "1"
             PmtInf_nodes['CtrlSumNode'].text = int_to_decimal_str(
-                payment['amount'])
+                payment.amount)
             PmtInf_nodes['Cd_SvcLvl_Node'].text = "SEPA"
             PmtInf_nodes['Cd_LclInstrm_Node'].text = self._config['instrument']
-            PmtInf_nodes['SeqTpNode'].text = payment['type']
-            PmtInf_nodes['ReqdColltnDtNode'].text = payment['collection_date']
+            PmtInf_nodes['SeqTpNode'].text = payment.type
+            PmtInf_nodes['ReqdColltnDtNode'].text = payment.collection_date
             PmtInf_nodes['Nm_Cdtr_Node'].text = self._config['name']
             PmtInf_nodes['IBAN_CdtrAcct_Node'].text = self._config['IBAN']
 
@@ -124,40 +211,33 @@ class SepaDD(SepaPaymentInitn):
             PmtInf_nodes['Id_Othr_Node'].text = self._config['creditor_id']
             PmtInf_nodes['PrtryNode'].text = "SEPA"
 
-        if 'BIC' in payment:
+        if payment.BIC is not None:
             bic = True
         else:
             bic = False
 
         TX_nodes = self._create_TX_node(bic)
-        TX_nodes['InstdAmtNode'].set("Ccy", payment.get('currency', self._config['currency']))
-        TX_nodes['InstdAmtNode'].text = int_to_decimal_str(payment['amount'])
+        TX_nodes['InstdAmtNode'].set("Ccy", payment.currency)
+        TX_nodes['InstdAmtNode'].text = int_to_decimal_str(payment.amount)
 
-        TX_nodes['MndtIdNode'].text = payment['mandate_id']
-        TX_nodes['DtOfSgntrNode'].text = payment['mandate_date']
+        TX_nodes['MndtIdNode'].text = payment.mandate_id
+        TX_nodes['DtOfSgntrNode'].text = payment.mandate_date
         TX_nodes['AmdmntIndNode'].text = 'false'
         if bic:
-            TX_nodes['BIC_DbtrAgt_Node'].text = payment['BIC']
+            TX_nodes['BIC_DbtrAgt_Node'].text = payment.BIC
         else:
             TX_nodes['Id_DbtrAgt_Node'].text = "NOTPROVIDED"
 
-        TX_nodes['Nm_Dbtr_Node'].text = payment['name']
-        if payment.get('address', {}):
-            for d, n in ADDRESS_MAPPING:
-                if payment['address'].get(d):
-                    n = ET.Element(n)
-                    n.text = payment['address'][d]
-                    TX_nodes['PstlAdr_Dbtr_Node'].append(n)
-            for line in payment['address'].get('lines', []):
-                n = ET.Element('AdrLine')
-                n.text = line
+        TX_nodes['Nm_Dbtr_Node'].text = payment.name
+        if payment.address:
+            for tag, text in payment.address:
+                n = ET.Element(tag)
+                n.text = text
                 TX_nodes['PstlAdr_Dbtr_Node'].append(n)
 
-        TX_nodes['IBAN_DbtrAcct_Node'].text = payment['IBAN']
-        TX_nodes['UstrdNode'].text = payment['description']
-        if not payment.get('endtoend_id', ''):
-            payment['endtoend_id'] = make_id(self._config['name'])
-        TX_nodes['EndToEndIdNode'].text = payment['endtoend_id'][:35]
+        TX_nodes['IBAN_DbtrAcct_Node'].text = payment.IBAN
+        TX_nodes['UstrdNode'].text = payment.description
+        TX_nodes['EndToEndIdNode'].text = payment.endtoend_id
 
         if self._config['batch']:
             self._add_batch(TX_nodes, payment)
@@ -432,6 +512,12 @@ class SepaDD(SepaPaymentInitn):
         TX_nodes['DrctDbtTxInfNode'].append(TX_nodes['RmtInfNode'])
         self._add_to_batch_list(TX_nodes, payment)
 
+    def _batch_key(self, payment):
+        """
+        Returns the key of the batch a payment record belongs to.
+        """
+        return payment.type + "::" + payment.collection_date
+
     def _add_to_batch_list(self, TX, payment):
         """
         Method to add a transaction to the batch list. The correct batch will
@@ -439,7 +525,7 @@ class SepaDD(SepaPaymentInitn):
         not existant. This will also add the payment amount to the respective
         batch total.
         """
-        batch_key = payment['type'] + "::" + payment['collection_date']
+        batch_key = self._batch_key(payment)
         if batch_key in self._batches.keys():
             self._batches[batch_key].append(TX['DrctDbtTxInfNode'])
         else:
@@ -447,9 +533,9 @@ class SepaDD(SepaPaymentInitn):
             self._batches[batch_key].append(TX['DrctDbtTxInfNode'])
 
         if batch_key in self._batch_totals:
-            self._batch_totals[batch_key] += payment['amount']
+            self._batch_totals[batch_key] += payment.amount
         else:
-            self._batch_totals[batch_key] = payment['amount']
+            self._batch_totals[batch_key] = payment.amount
 
     def _finalize_batch(self):
         """
@@ -462,7 +548,7 @@ class SepaDD(SepaPaymentInitn):
         for batch_meta, batch_nodes in self._batches.items():
             batch_meta_split = batch_meta.split("::")
             PmtInf_nodes = self._create_PmtInf_node()
-            PmtInf_nodes['PmtInfIdNode'].text = make_id(self._config['name'])
+            PmtInf_nodes['PmtInfIdNode'].text = self._make_id()
             PmtInf_nodes['PmtMtdNode'].text = "DD"
             PmtInf_nodes['BtchBookgNode'].text = "true"
             PmtInf_nodes['Cd_SvcLvl_Node'].text = "SEPA"
@@ -583,3 +669,103 @@ class SepaDD(SepaPaymentInitn):
 
             CstmrDrctDbtInitn_node = self._xml.find('CstmrDrctDbtInitn')
             CstmrDrctDbtInitn_node.append(PmtInf_nodes['PmtInfNode'])
+
+    def _compile_templates(self):
+        """
+        Method to precompile the XML fragments used by the template renderer.
+        Everything that only depends on the schema and the config is rendered
+        once per export.
+        """
+        ED = dict()
+        if self.schema != 'pain.008.001.02':
+            ED['bic_tag'] = "BICFI"
+        else:
+            ED['bic_tag'] = "BIC"
+
+        ED['PmtTpInf'] = (
+            "<PmtTpInf><SvcLvl><Cd>SEPA</Cd></SvcLvl><LclInstrm>" +
+            xml_element("Cd", self._config['instrument']) + "</LclInstrm>"
+        )
+
+        if 'BIC' in self._config:
+            cdtr_agt = xml_element(ED['bic_tag'], self._config['BIC'])
+        else:
+            cdtr_agt = "<Othr><Id>NOTPROVIDED</Id></Othr>"
+        cdtr_acct = (
+            "<CdtrAcct><Id>" + xml_element("IBAN", self._config['IBAN']) + "</Id></CdtrAcct>"
+            "<CdtrAgt><FinInstnId>" + cdtr_agt + "</FinInstnId></CdtrAgt>"
+        )
+        cdtr_schme_id = (
+            "<ChrgBr>SLEV</ChrgBr><CdtrSchmeId><Id><PrvtId><Othr>" +
+            xml_element("Id", self._config['creditor_id']) +
+            "<SchmeNm><Prtry>SEPA</Prtry></SchmeNm></Othr></PrvtId></Id></CdtrSchmeId>"
+        )
+
+        ultmt_cdtr = ""
+        if 'ultimate_creditor' in self._config:
+            uc = self._config['ultimate_creditor']
+            org_id = ""
+            if 'BIC_or_BEI' in uc:
+                org_id += xml_element("BICOrBEI", uc['BIC_or_BEI'])
+            if 'id' in uc:
+                org_id += "<Othr>" + xml_element("Id", uc['id'])
+                if 'id_scheme_name' in uc:
+                    org_id += "<SchmeNm>" + xml_element("Prtry", uc['id_scheme_name']) + "</SchmeNm>"
+                org_id += "</Othr>"
+            ultmt_cdtr = "<UltmtCdtr>"
+            if 'name' in uc:
+                ultmt_cdtr += xml_element("Nm", uc['name'])
+            ultmt_cdtr += "<Id>" + ("<OrgId>" + org_id + "</OrgId>" if org_id else "<OrgId />") + "</Id></UltmtCdtr>"
+
+        # Non-batch payments carry neither the creditor address nor the ultimate creditor.
+        nm_cdtr = "<Cdtr>" + xml_element("Nm", self._config['name'])
+        ED['Cdtr'] = nm_cdtr + "</Cdtr>" + cdtr_acct + cdtr_schme_id
+        ED['Cdtr_batch'] = (
+            nm_cdtr + xml_address(address_items(self._config.get('address'))) + "</Cdtr>" + cdtr_acct + ultmt_cdtr + cdtr_schme_id
+        )
+
+        ED['TX'] = (
+            '<DrctDbtTxInf><PmtId>%s</PmtId><InstdAmt Ccy="%s">%s</InstdAmt>'
+            '<DrctDbtTx><MndtRltdInf>%s%s<AmdmntInd>false</AmdmntInd></MndtRltdInf></DrctDbtTx>'
+            '<DbtrAgt><FinInstnId>%s</FinInstnId></DbtrAgt><Dbtr>%s%s</Dbtr>'
+            '<DbtrAcct><Id>%s</Id></DbtrAcct><RmtInf>%s</RmtInf></DrctDbtTxInf>'
+        )
+        return ED
+
+    @staticmethod
+    def _render_PmtInf(templates, pmtinf_id, payment, nb_of_txs, ctrl_sum, batch):
+        """
+        Method to render the opening part of a PmtInf block up to the first
+        transaction. The batch information is taken from the payment record.
+        """
+        return (
+            "<PmtInf>" + xml_element("PmtInfId", pmtinf_id) +
+            "<PmtMtd>DD</PmtMtd><BtchBookg>" + ("true" if batch else "false") + "</BtchBookg>" +
+            "<NbOfTxs>" + str(nb_of_txs) + "</NbOfTxs>" +
+            "<CtrlSum>" + int_to_decimal_str(ctrl_sum) + "</CtrlSum>" +
+            templates['PmtTpInf'] + xml_element("SeqTp", payment.type) + "</PmtTpInf>" +
+            xml_element("ReqdColltnDt", payment.collection_date) +
+            (templates['Cdtr_batch'] if batch else templates['Cdtr'])
+        )
+
+    @staticmethod
+    def _render_TX(templates, payment):
+        """
+        Method to render the DrctDbtTxInf block of a payment record.
+        """
+        if payment.BIC is not None:
+            dbtr_agt = xml_element(templates['bic_tag'], payment.BIC)
+        else:
+            dbtr_agt = "<Othr><Id>NOTPROVIDED</Id></Othr>"
+        return templates['TX'] % (
+            xml_element("EndToEndId", payment.endtoend_id),
+            xml_escape_attrib(payment.currency),
+            int_to_decimal_str(payment.amount),
+            xml_element("MndtId", payment.mandate_id),
+            xml_element("DtOfSgntr", payment.mandate_date),
+            dbtr_agt,
+            xml_element("Nm", payment.name),
+            xml_address(payment.address),
+            xml_element("IBAN", payment.IBAN),
+            xml_element("Ustrd", payment.description),
+        )
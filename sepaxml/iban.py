@@ -0,0 +1,270 @@
+"""
+Copyright (c) 2017-2023 Raphael Michel and contributors
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is furnished
+to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY,
+WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN
+CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+"""
+import re
+import string
+
+from .utils import is_ascii
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+# BBAN structure per country from release 101 of the SWIFT IBAN registry:
+# n digits, a upper case letters, c upper case letters and digits.
+IBAN_FORMATS = {
+    "AD": "4!n4!n12!c",
+    "AE": "3!n16!n",
+    "AL": "8!n16!c",
+    "AT": "5!n11!n",
+    "AZ": "4!a20!c",
+    "BA": "3!n3!n8!n2!n",
+    "BE": "3!n7!n2!n",
+    "BG": "4!a4!n2!n8!c",
+    "BH": "4!a14!c",
+    "BI": "5!n5!n11!n2!n",
+    "BR": "8!n5!n10!n1!a1!c",
+    "BY": "4!c4!n16!c",
+    "CH": "5!n12!c",
+    "CR": "4!n14!n",
+    "CY": "3!n5!n16!c",
+    "CZ": "4!n6!n10!n",
+    "DE": "8!n10!n",
+    "DJ": "5!n5!n11!n2!n",
+    "DK": "4!n9!n1!n",
+    "DO": "4!c20!n",
+    "EE": "2!n2!n11!n1!n",
+    "EG": "4!n4!n17!n",
+    "ES": "4!n4!n1!n1!n10!n",
+    "FI": "3!n11!n",
+    "FK": "2!a12!n",
+    "FO": "4!n9!n1!n",
+    "FR": "5!n5!n11!c2!n",
+    "GB": "4!a6!n8!n",
+    "GE": "2!a16!n",
+    "GI": "4!a15!c",
+    "GL": "4!n9!n1!n",
+    "GR": "3!n4!n16!c",
+    "GT": "4!c20!c",
+    "HN": "4!a20!n",
+    "HR": "7!n10!n",
+    "HU": "3!n4!n1!n15!n1!n",
+    "IE": "4!a6!n8!n",
+    "IL": "3!n3!n13!n",
+    "IQ": "4!a3!n12!n",
+    "IS": "4!n2!n6!n10!n",
+    "IT": "1!a5!n5!n12!c",
+    "JO": "4!a4!n18!c",
+    "KW": "4!a22!c",
+    "KZ": "3!n13!c",
+    "LB": "4!n20!c",
+    "LC": "4!a24!c",
+    "LI": "5!n12!c",
+    "LT": "5!n11!n",
+    "LU": "3!n13!c",
+    "LV": "4!a13!c",
+    "LY": "3!n3!n15!n",
+    "MC": "5!n5!n11!c2!n",
+    "MD": "2!c18!c",
+    "ME": "3!n13!n2!n",
+    "MK": "3!n10!c2!n",
+    "MN": "4!n12!n",
+    "MR": "5!n5!n11!n2!n",
+    "MT": "4!a5!n18!c",
+    "MU": "4!a2!n2!n12!n3!n3!a",
+    "NI": "4!a20!n",
+    "NL": "4!a10!n",
+    "NO": "4!n6!n1!n",
+    "OM": "3!n16!c",
+    "PK": "4!a16!c",
+    "PL": "8!n16!n",
+    "PS": "4!a21!c",
+    "PT": "4!n4!n11!n2!n",
+    "QA": "4!a21!c",
+    "RO": "4!a16!c",
+    "RS": "3!n13!n2!n",
+    "RU": "9!n5!n15!c",
+    "SA": "2!n18!c",
+    "SC": "4!a2!n2!n16!n3!a",
+    "SD": "2!n12!n",
+    "SE": "3!n16!n1!n",
+    "SI": "5!n8!n2!n",
+    "SK": "4!n6!n10!n",
+    "SM": "1!a5!n5!n12!c",
+    "SO": "4!n3!n12!n",
+    "ST": "4!n4!n11!n2!n",
+    "SV": "4!a20!n",
+    "TL": "3!n14!n2!n",
+    "TN": "2!n3!n13!n2!n",
+    "TR": "5!n1!n16!c",
+    "UA": "6!n19!c",
+    "VA": "3!n15!n",
+    "VG": "4!a16!n",
+    "XK": "4!n10!n2!n",
+    "YE": "4!a4!n18!c",
+}
+
+_CHARACTER_CLASSES = {"n": "0-9", "a": "A-Z", "c": "0-9A-Z"}
+_LETTERS_TO_DIGITS = str.maketrans({c: str(ord(c) - 55) for c in string.ascii_uppercase})
+
+
+def _parse_format(bban_format):
+    return [(int(count), kind) for count, kind in re.findall(r"(\d+)!([nac])", bban_format)]
+
+
+IBAN_LENGTHS = {
+    country: 4 + sum(count for count, kind in _parse_format(bban_format))
+    for country, bban_format in IBAN_FORMATS.items()
+}
+
+_IBAN_PATTERNS = {
+    country: re.compile(country + "[0-9]{2}" + "".join(
+        "[{}]{{{}}}".format(_CHARACTER_CLASSES[kind], count) for count, kind in _parse_format(bban_format)
+    ) + r"\Z")
+    for country, bban_format in IBAN_FORMATS.items()
+}
+
+
+def normalize_iban(iban):
+    """
+    Removes all whitespace from an IBAN and converts it to upper case, e.g.
+    "de89 3704 0044 0532 0130 00" becomes "DE89370400440532013000".
+    """
+    return "".join(iban.split()).upper()
+
+
+def normalize_ibans(ibans):
+    """
+    Normalizes a sequence of IBANs, see normalize_iban.
+    @return: A list of IBANs
+    """
+    # Usually all IBANs are normalized already, which can be checked at once.
+    try:
+        joined = "".join(ibans).encode("ascii")
+    except UnicodeEncodeError:
+        pass
+    else:
+        if joined.isalnum() and joined.upper() == joined:
+            return list(ibans)
+    return [normalize_iban(iban) for iban in ibans]
+
+
+def is_valid_iban(iban):
+    """
+    Checks the length and format of a normalized IBAN for its country, and
+    its check digits according to ISO 7064 mod 97-10.
+    @param iban: The normalized IBAN
+    @return: True if the IBAN is valid
+    """
+    pattern = _IBAN_PATTERNS.get(iban[:2])
+    if pattern is None or not pattern.match(iban) or not "02" <= iban[2:4] <= "98":
+        return False
+    return int((iban[4:] + iban[:4]).translate(_LETTERS_TO_DIGITS)) % 97 == 1
+
+
+def check_ibans(ibans):
+    """
+    Checks many normalized IBANs at once, see is_valid_iban. Uses numpy to
+    check all IBANs in a few vectorized passes if it is installed.
+    @param ibans: A sequence of normalized IBANs
+    @return: A list of booleans
+    """
+    if numpy is None:
+        return [is_valid_iban(iban) for iban in ibans]
+    return _check_ibans_numpy(ibans).tolist()
+
+
+# The numpy implementation works on the IBANs as a matrix of bytes with one
+# row per position. Every country has a column in a table of the allowed
+# character classes per position.
+_MAX_LENGTH = max(IBAN_LENGTHS.values())
+_PAD, _DIGIT, _LETTER = 1, 2, 4
+_numpy_tables = None
+
+
+def _build_numpy_tables():
+    character_classes = numpy.zeros(256, dtype=numpy.uint8)
+    character_classes[0] = _PAD
+    character_classes[48:58] = _DIGIT
+    character_classes[65:91] = _LETTER
+
+    # Index 0 is used for unknown countries, which have no valid length.
+    countries = numpy.zeros(65536, dtype=numpy.int16)
+    lengths = numpy.zeros(len(IBAN_FORMATS) + 1, dtype=numpy.int16)
+    allowed = numpy.zeros((len(IBAN_FORMATS) + 1, _MAX_LENGTH), dtype=numpy.uint8)
+    kinds = {"n": _DIGIT, "a": _LETTER, "c": _DIGIT | _LETTER}
+    for i, (country, bban_format) in enumerate(sorted(IBAN_FORMATS.items()), 1):
+        countries[ord(country[0]) * 256 + ord(country[1])] = i
+        lengths[i] = IBAN_LENGTHS[country]
+        row = [_LETTER, _LETTER, _DIGIT, _DIGIT]
+        for count, kind in _parse_format(bban_format):
+            row += [kinds[kind]] * count
+        allowed[i] = row + [_PAD] * (_MAX_LENGTH - len(row))
+
+    # Value and multiplier of each character in the mod 97 computation.
+    # Letters count as two digits, padding leaves the remainder unchanged.
+    values = numpy.zeros(256, dtype=numpy.uint8)
+    multipliers = numpy.ones(256, dtype=numpy.uint8)
+    values[48:58] = numpy.arange(10)
+    multipliers[48:58] = 10
+    values[65:91] = numpy.arange(10, 36)
+    multipliers[65:91] = 100
+    return character_classes, countries, lengths, allowed.T.copy(), values, multipliers
+
+
+def _check_ibans_numpy(ibans):
+    global _numpy_tables
+    if _numpy_tables is None:
+        _numpy_tables = _build_numpy_tables()
+    character_classes, countries, lengths, allowed, values, multipliers = _numpy_tables
+
+    if not len(ibans):
+        return numpy.zeros(0, dtype=bool)
+    actual_lengths = numpy.fromiter(map(len, ibans), dtype=numpy.int64, count=len(ibans))
+    # Longer IBANs are truncated, they fail the length check anyway.
+    width = max(4, min(int(actual_lengths.max()), _MAX_LENGTH))
+    try:
+        data = numpy.array(ibans, dtype="S" + str(width))
+    except UnicodeEncodeError:
+        data = numpy.array([iban if is_ascii(iban) else "" for iban in ibans], dtype="S" + str(width))
+    matrix = numpy.ascontiguousarray(data.view(numpy.uint8).reshape(len(data), width).T)
+
+    country = countries[matrix[0].astype(numpy.int32) * 256 + matrix[1]]
+    valid = actual_lengths == lengths[country]
+    for position in range(width):
+        valid &= (character_classes[matrix[position]] & allowed[position][country]) != 0
+
+    check_digits = values[matrix[2]].astype(numpy.int64) * 10 + values[matrix[3]]
+    valid &= (check_digits >= 2) & (check_digits <= 98)
+
+    # mod 97 of the BBAN followed by the country code and check digits. The
+    # remainder is reduced every three positions, before it could overflow.
+    bban_values = values[matrix[4:]]
+    bban_multipliers = multipliers[matrix[4:]].astype(numpy.int32)
+    remainder = numpy.zeros(len(data), dtype=numpy.int32)
+    for position in range(width - 4):
+        remainder *= bban_multipliers[position]
+        remainder += bban_values[position]
+        if position % 3 == 2:
+            remainder %= 97
+    head = values[matrix[0]].astype(numpy.int64) * 10000 + values[matrix[1]].astype(numpy.int64) * 100 + check_digits
+    valid &= (remainder % 97 * (10 ** 6 % 97) + head) % 97 == 1
+    return valid
@@ -0,0 +1,156 @@
+"""
+Copyright (c) 2017-2023 Raphael Michel and contributors
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is furnished
+to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY,
+WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN
+CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+"""
+import hashlib
+import itertools
+import os
+import random
+import threading
+import time
+
+# Crockford's base32 alphabet, used for time-ordered IDs
+CROCKFORD_BASE32 = "0123456789ABCDEFGHJKMNPQRSTVWXYZ"
+# Time-ordered IDs count milliseconds from 2020-01-01 to make the most of their bits
+EPOCH_MS = 1577836800000
+
+
+class RandomIdGenerator:
+    """
+    Generates securely random hex strings. Entropy is fetched from the
+    operating system in bulk and kept in a pool, instead of issuing one
+    system call per character.
+    """
+
+    def __init__(self, pool_size=4096):
+        self.pool_size = pool_size
+        self._pool = ""
+        self._pos = 0
+        self._pid = None
+        self._lock = threading.Lock()
+        self._fallback = None
+
+    def _refill(self):
+        try:
+            self._pool = os.urandom(self.pool_size).hex()
+        except NotImplementedError:
+            if self._fallback is None:
+                import warnings
+                warnings.warn('A secure pseudo-random number generator is not available '
+                              'on your system. Falling back to Mersenne Twister.')
+                self._fallback = random.Random()
+            # This is ugly, and a hack, but it makes things better than
+            # the alternative of predictability. This re-seeds the PRNG
+            # using a value that is hard for an attacker to predict, every
+            # time the pool is refilled.
+            self._fallback.seed(
+                hashlib.sha256(
+                    ("%s%s" % (
+                        self._fallback.getstate(),
+                        time.time())).encode('utf-8')
+                ).digest())
+            self._pool = "%0*x" % (self.pool_size * 2, self._fallback.getrandbits(self.pool_size * 8))
+        self._pos = 0
+        self._pid = os.getpid()
+
+    def generate(self, length=12):
+        """
+        Returns a random hex string of the given length.
+        """
+        with self._lock:
+            # A forked child process must not reuse the entropy of its parent.
+            if self._pos + length > len(self._pool) or self._pid != os.getpid():
+                self._refill()
+            value = self._pool[self._pos:self._pos + length]
+            self._pos += length
+            return value
+
+
+class SeededIdGenerator:
+    """
+    Generates reproducible pseudo-random hex strings from a seed. Useful for
+    tests, never use this for real payment files.
+    """
+
+    def __init__(self, seed=0):
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def generate(self, length=12):
+        with self._lock:
+            return "%0*x" % (length, self._random.getrandbits(length * 4))
+
+
+class SequentialIdGenerator:
+    """
+    Generates zero-padded hex counters, so IDs sort in the order in which
+    they were created.
+    """
+
+    def __init__(self, start=0):
+        self._counter = itertools.count(start)
+        self._lock = threading.Lock()
+
+    def generate(self, length=12):
+        with self._lock:
+            return "%0*x" % (length, next(self._counter))
+
+
+class TimeOrderedIdGenerator:
+    """
+    Generates ULID-style strings in Crockford's base32: the current time in
+    milliseconds followed by random bits. IDs created later sort later, IDs
+    created within the same millisecond are made monotonic by incrementing
+    the previous ID.
+
+    The time part has 5 * (length - random_chars) bits and wraps around
+    after that many milliseconds since 2020-01-01, i.e. in 2054 for IDs of
+    length 12. IDs created after the wrap sort before the earlier ones.
+    Within a process, the IDs keep counting up from the last one until they
+    run out of bits and then start again from the wrapped time, so an ID is
+    never truncated to a duplicate.
+    """
+
+    def __init__(self, random_chars=4):
+        self.random_chars = random_chars
+        self._last = None
+        self._lock = threading.Lock()
+        self._random = RandomIdGenerator()
+
+    def generate(self, length=12):
+        random_bits = 5 * min(self.random_chars, length)
+        time_bits = 5 * length - random_bits
+        with self._lock:
+            timestamp = (int(time.time() * 1000) - EPOCH_MS) % (1 << time_bits)
+            value = (timestamp << random_bits) | (int(self._random.generate(8), 16) % (1 << random_bits))
+            # This also covers the system clock being set back, in which case
+            # the IDs keep counting up from the last one. If that would need
+            # more bits than the ID has, e.g. after the time part wrapped
+            # around, they start again from the current time instead.
+            if self._last is not None and value <= self._last and self._last + 1 < 1 << (5 * length):
+                value = self._last + 1
+            self._last = value
+        chars = []
+        for i in range(length):
+            chars.append(CROCKFORD_BASE32[value & 31])
+            value >>= 5
+        return "".join(reversed(chars))
+
+
+default_generator = RandomIdGenerator()
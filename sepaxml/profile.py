@@ -0,0 +1,210 @@
+"""
+Copyright (c) 2017-2023 Raphael Michel and contributors
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is furnished
+to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY,
+WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN
+CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+"""
+# Profiles building a document from synthetic payments, see sepaxml.testing.
+# Writes a .prof file of cProfile, to be read with pstats or tools like
+# snakeviz, and a file of collapsed stacks from a sampling profiler, one
+# "frame;frame;... count" line per stack, as read by flamegraph.pl or speedscope.
+#
+# Usage: python -m sepaxml.profile [--schema pain.008.001.02] [--size 10000] [--no-batch]
+#                                  [--no-clean] [--renderer etree] [--no-validate]
+#                                  [--profiler both] [--output sepaxml-profile]
+import argparse
+import cProfile
+import datetime
+import functools
+import os
+import pstats
+import sys
+import threading
+import time
+from collections import Counter
+
+from . import SepaDD, SepaTransfer
+from .testing import PaymentGenerator, make_config
+from .validation import get_schema
+
+PROFILERS = ("cprofile", "sampling", "both")
+PACKAGE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def make_workload(schema="pain.008.001.02", size=10000, batch=True, clean=True, renderer="etree", validate=True,
+                  seed=0):
+    """
+    Returns a function that builds and exports one document. The payments are
+    generated beforehand, so generating them is not profiled. The function
+    can only be called once, as add_payment changes the payments.
+    """
+    kind, cls = ("debit", SepaDD) if schema.startswith("pain.008") else ("transfer", SepaTransfer)
+    payments = list(PaymentGenerator(kind, seed=seed, start_date=datetime.date(2024, 1, 1)).payments(size))
+    config = make_config(kind, batch)
+    # Compiling the schema is done once per process and would dominate small workloads.
+    get_schema(schema)
+
+    def workload():
+        sepa = cls(config, schema=schema, clean=clean, renderer=renderer)
+        for payment in payments:
+            sepa.add_payment(payment)
+        return sepa.export(validate=validate)
+
+    return workload
+
+
+def frame_name(code):
+    """
+    Returns the name of a code object in collapsed stacks, e.g.
+    "sepaxml/debit.py:SepaDD._create_TX_node".
+    """
+    filename = code.co_filename
+    if filename.startswith(PACKAGE_DIR):
+        filename = "sepaxml" + filename[len(PACKAGE_DIR):]
+    else:
+        filename = os.path.basename(filename)
+    return "{}:{}".format(filename, getattr(code, "co_qualname", code.co_name)).replace(";", ":")
+
+
+class StackSampler:
+    """
+    A sampling profiler. A background thread records the stack of the thread
+    that started it at a fixed interval. The stacks start below the function
+    that started the sampler.
+    """
+
+    def __init__(self, interval=0.001):
+        """
+        @param interval: The time between two samples in seconds
+        """
+        self.interval = interval
+        self.stacks = Counter()
+        self._thread = None
+        self._stop = threading.Event()
+
+    def start(self):
+        self._stop.clear()
+        target = threading.get_ident()
+        outer = set()
+        frame = sys._getframe()
+        while frame is not None:
+            outer.add(frame)
+            frame = frame.f_back
+        # The sampler needs the GIL to take a sample, so the running thread
+        # has to hand it over at least as often as samples are taken.
+        self._switch_interval = sys.getswitchinterval()
+        sys.setswitchinterval(min(self._switch_interval, self.interval))
+        self._thread = threading.Thread(target=self._run, args=(target, outer), daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+        sys.setswitchinterval(self._switch_interval)
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *args):
+        self.stop()
+
+    def _run(self, target, outer):
+        names = {}
+        # Samples taken while the sampler is being stopped are dropped.
+        own = {StackSampler.stop.__code__, StackSampler.__exit__.__code__}
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(target)
+            stack = []
+            code = None
+            while frame is not None and frame not in outer:
+                code = frame.f_code
+                name = names.get(code)
+                if name is None:
+                    name = names[code] = frame_name(code)
+                stack.append(name)
+                frame = frame.f_back
+            if stack and code not in own:
+                self.stacks[";".join(reversed(stack))] += 1
+            del frame
+
+    def write_collapsed(self, path):
+        """
+        Writes the samples as collapsed stacks, the most frequent first.
+        """
+        with open(path, "w") as f:
+            for stack, count in self.stacks.most_common():
+                f.write("{} {}\n".format(stack, count))
+
+
+def profile(make, output, profiler="both", interval=0.001):
+    """
+    Runs a workload under the chosen profilers, a new one for each profiler.
+
+    @param make: A function that returns the workload, a function without arguments
+    @param output: The path of the output files without extension
+    @param profiler: "cprofile" to write output.prof, "sampling" to write
+    output.collapsed, or "both"
+    @return: A dict of the written files by profiler
+    """
+    if profiler not in PROFILERS:
+        raise ValueError("Unknown profiler: {}".format(profiler))
+    files = {}
+    if profiler in ("cprofile", "both"):
+        files["cprofile"] = output + ".prof"
+        prof = cProfile.Profile()
+        prof.runcall(make())
+        prof.dump_stats(files["cprofile"])
+    if profiler in ("sampling", "both"):
+        files["sampling"] = output + ".collapsed"
+        workload = make()
+        with StackSampler(interval) as sampler:
+            workload()
+        sampler.write_collapsed(files["sampling"])
+    return files
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Profiles building a SEPA file from synthetic payments.")
+    parser.add_argument("--schema", default="pain.008.001.02")
+    parser.add_argument("--size", type=int, default=10000, help="Number of transactions")
+    parser.add_argument("--no-batch", dest="batch", action="store_false", help="One PmtInf per transaction")
+    parser.add_argument("--no-clean", dest="clean", action="store_false", help="Do not clean the texts")
+    parser.add_argument("--renderer", default="etree", help="etree or template")
+    parser.add_argument("--no-validate", dest="validate", action="store_false", help="Do not validate the output")
+    parser.add_argument("--seed", type=int, default=0, help="Seed of the generated payments")
+    parser.add_argument("--profiler", default="both", choices=PROFILERS)
+    parser.add_argument("--interval", type=float, default=0.001, help="Sampling interval in seconds")
+    parser.add_argument("--output", default="sepaxml-profile", help="Path of the output files without extension")
+    parser.add_argument("--top", type=int, default=20, help="Number of functions to list, sorted by own time")
+    args = parser.parse_args(argv)
+
+    make = functools.partial(
+        make_workload, args.schema, args.size, args.batch, args.clean, args.renderer, args.validate, args.seed
+    )
+    t = time.perf_counter()
+    files = profile(make, args.output, args.profiler, args.interval)
+    print("Profiled {} {} transactions in {:.1f}s".format(args.schema, args.size, time.perf_counter() - t))
+    for name, path in files.items():
+        print("{:<9} {}".format(name, path))
+    if "cprofile" in files and args.top:
+        pstats.Stats(files["cprofile"]).sort_stats("tottime").print_stats(args.top)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,199 @@
+"""
+Copyright (c) 2017-2023 Raphael Michel and contributors
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is furnished
+to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY,
+WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN
+CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+"""
+import datetime
+import xml.etree.ElementTree as ET
+
+from .utils import ADDRESS_MAPPING, decimal_str_to_int
+
+TX_TAGS = {
+    "DrctDbtTxInf": "debit",
+    "CdtTrfTxInf": "transfer",
+}
+
+
+class PaymentReader:
+    """
+    Reads the payments of an existing pain.001 (transfer) or pain.008 (direct
+    debit) file in constant memory. Elements are parsed incrementally and
+    discarded as soon as they have been read, so files of any size can be
+    processed. Iterating yields one dict per transaction, shaped like the input
+    of add_payment. Each dict additionally contains the key "pmtinf" with the
+    context of the PmtInf block the transaction belongs to.
+
+    The group header is available as a dict in the attribute group_header once
+    the iteration has started, the schema (e.g. "pain.008.001.02") and the kind
+    ("debit" or "transfer") of the document in the attributes schema and kind.
+    """
+
+    def __init__(self, source):
+        """
+        @param source: A path or a binary file-like object
+        """
+        self.source = source
+        self.schema = None
+        self.kind = None
+        self.group_header = None
+
+    def __iter__(self):
+        stack = []
+        pmtinf = None
+        for event, elem in ET.iterparse(self.source, events=("start", "end")):
+            if event == "start":
+                ns, _, elem.tag = elem.tag.rpartition("}")
+                if self.schema is None:
+                    self.schema = ns.lstrip("{").rpartition(":")[2]
+                if elem.tag in TX_TAGS and pmtinf is None:
+                    # The PmtInf elements before the first transaction are complete now.
+                    self.kind = TX_TAGS[elem.tag]
+                    pmtinf = self._read_pmtinf(stack[-1])
+                stack.append(elem)
+                continue
+
+            stack.pop()
+            if elem.tag in TX_TAGS:
+                if self.kind == "debit":
+                    payment = self._read_debit(elem, pmtinf)
+                else:
+                    payment = self._read_transfer(elem, pmtinf)
+                stack[-1].remove(elem)
+                yield payment
+            elif elem.tag == "PmtInf":
+                pmtinf = None
+                stack[-1].remove(elem)
+            elif elem.tag == "GrpHdr":
+                self.group_header = self._read_group_header(elem)
+                stack[-1].remove(elem)
+
+    def _read_group_header(self, elem):
+        return {
+            "msg_id": elem.findtext("MsgId"),
+            "creation_date_time": elem.findtext("CreDtTm"),
+            "nb_of_txs": _int(elem.findtext("NbOfTxs")),
+            "ctrl_sum": _amount(elem.findtext("CtrlSum")),
+            "initiating_party": elem.findtext("InitgPty/Nm"),
+        }
+
+    def _read_pmtinf(self, elem):
+        context = {
+            "pmtinf_id": elem.findtext("PmtInfId"),
+            "batch": elem.findtext("BtchBookg") == "true",
+            "nb_of_txs": _int(elem.findtext("NbOfTxs")),
+            "ctrl_sum": _amount(elem.findtext("CtrlSum")),
+        }
+        if self.kind == "debit":
+            context.update({
+                "instrument": elem.findtext("PmtTpInf/LclInstrm/Cd"),
+                "type": elem.findtext("PmtTpInf/SeqTp"),
+                "collection_date": _date(elem.findtext("ReqdColltnDt")),
+                "name": elem.findtext("Cdtr/Nm"),
+                "IBAN": elem.findtext("CdtrAcct/Id/IBAN"),
+                "BIC": _bic(elem.find("CdtrAgt/FinInstnId")),
+                "creditor_id": elem.findtext("CdtrSchmeId/Id/PrvtId/Othr/Id"),
+            })
+        else:
+            date = elem.find("ReqdExctnDt")
+            if date is not None and len(date):
+                date = date[0].text[:10]
+            elif date is not None:
+                date = date.text
+            context.update({
+                "execution_date": _date(date),
+                "name": elem.findtext("Dbtr/Nm"),
+                "IBAN": elem.findtext("DbtrAcct/Id/IBAN"),
+                "BIC": _bic(elem.find("DbtrAgt/FinInstnId")),
+            })
+        return context
+
+    def _read_debit(self, elem, pmtinf):
+        amount = elem.find("InstdAmt")
+        payment = {
+            "name": elem.findtext("Dbtr/Nm"),
+            "IBAN": elem.findtext("DbtrAcct/Id/IBAN"),
+            "amount": decimal_str_to_int(amount.text),
+            "currency": amount.get("Ccy"),
+            "type": pmtinf["type"],
+            "collection_date": pmtinf["collection_date"],
+            "mandate_id": elem.findtext("DrctDbtTx/MndtRltdInf/MndtId"),
+            "mandate_date": _date(elem.findtext("DrctDbtTx/MndtRltdInf/DtOfSgntr")),
+            "description": elem.findtext("RmtInf/Ustrd", ""),
+            "endtoend_id": elem.findtext("PmtId/EndToEndId"),
+            "pmtinf": pmtinf,
+        }
+        return _add_agent_and_address(payment, elem, "DbtrAgt", "Dbtr")
+
+    def _read_transfer(self, elem, pmtinf):
+        amount = elem.find("Amt/InstdAmt")
+        payment = {
+            "name": elem.findtext("Cdtr/Nm"),
+            "IBAN": elem.findtext("CdtrAcct/Id/IBAN"),
+            "amount": decimal_str_to_int(amount.text),
+            "currency": amount.get("Ccy"),
+            "execution_date": pmtinf["execution_date"],
+            "description": elem.findtext("RmtInf/Ustrd", ""),
+            "endtoend_id": elem.findtext("PmtId/EndToEndId"),
+            "pmtinf": pmtinf,
+        }
+        return _add_agent_and_address(payment, elem, "CdtrAgt", "Cdtr")
+
+
+def read_payments(source):
+    """
+    Shortcut to iterate over the payments of a file, see PaymentReader.
+    @param source: A path or a binary file-like object
+    @return: A generator of payment dicts
+    """
+    return iter(PaymentReader(source))
+
+
+def _add_agent_and_address(payment, elem, agent_tag, party_tag):
+    bic = _bic(elem.find(agent_tag + "/FinInstnId"))
+    if bic:
+        payment["BIC"] = bic
+    address_node = elem.find(party_tag + "/PstlAdr")
+    if address_node is not None:
+        address = {}
+        for key, tag in ADDRESS_MAPPING:
+            value = address_node.findtext(tag)
+            if value is not None:
+                address[key] = value
+        lines = [line.text or "" for line in address_node.findall("AdrLine")]
+        if lines:
+            address["lines"] = lines
+        payment["address"] = address
+    return payment
+
+
+def _bic(fin_instn_id):
+    if fin_instn_id is None:
+        return None
+    return fin_instn_id.findtext("BIC") or fin_instn_id.findtext("BICFI")
+
+
+def _int(text):
+    return int(text) if text else None
+
+
+def _amount(text):
+    return decimal_str_to_int(text) if text else None
+
+
+def _date(text):
+    return datetime.datetime.strptime(text[:10], "%Y-%m-%d").date() if text else None
@@ -0,0 +1,188 @@
+"""
+Copyright (c) 2017-2023 Raphael Michel and contributors
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is furnished
+to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY,
+WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN
+CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+"""
+import os
+from collections import deque, namedtuple
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from .debit import SepaDD
+from .transfer import SepaTransfer
+from .validation import warm_schema_cache
+
+KINDS = {
+    "debit": (SepaDD, "pain.008.001.02"),
+    "transfer": (SepaTransfer, "pain.001.001.03"),
+}
+
+JobResult = namedtuple('JobResult', [
+    'index', 'path', 'msg_id', 'nb_of_txs', 'ctrl_sum', 'size', 'xml', 'error',
+])
+JobResult.__doc__ = """
+The outcome of a job. On success, error is None and either path or xml is
+set, depending on whether the document was written to a file. On failure,
+error contains the type and message of the exception.
+"""
+
+
+def run_jobs(jobs, kind="debit", schema=None, path=None, workers=None, validate=True, **options):
+    """
+    Builds, validates and writes many documents, e.g. one per creditor, in a
+    pool of worker processes. Every worker compiles the schema once and reuses
+    it for all its jobs. A failing job does not affect the others, even if
+    it crashes its worker process.
+    @param jobs: An iterable of (config, payments) or (config, payments, path)
+    tuples. The payments are passed to add_payments, so columnar data works too.
+    @param kind: "debit" or "transfer"
+    @param schema: The schema of the documents, defaults to the one of the kind
+    @param path: A format string for the output file of jobs without their
+    own path, e.g. "out/{index}.xml". Without any path the documents are
+    returned in memory.
+    @param workers: The number of processes, defaults to the number of CPUs.
+    With 0, all jobs run in the current process.
+    @param validate: Whether to validate the documents against the schema
+    @param options: Further arguments for the document, e.g. renderer="template"
+    @return: A list of JobResult in the order of the jobs
+    """
+    return list(iter_jobs(jobs, kind, schema, path, workers, validate, **options))
+
+
+def iter_jobs(jobs, kind="debit", schema=None, path=None, workers=None, validate=True, **options):
+    """
+    Like run_jobs, but yields the results one by one in the order of the jobs.
+    Only a limited number of jobs is in flight at any time, so the jobs can be
+    a generator over a large number of creditors.
+    """
+    if kind not in KINDS:
+        raise ValueError("Unknown kind: {}".format(kind))
+    schema = schema or KINDS[kind][1]
+    if workers is None:
+        workers = os.cpu_count() or 1
+
+    def tasks():
+        for index, job in enumerate(jobs):
+            job_path = job[2] if len(job) > 2 else None
+            if job_path is None and path is not None:
+                job_path = path.format(index=index)
+            yield index, job[0], job[1], job_path
+
+    if not workers:
+        if validate:
+            warm_schema_cache([schema])
+        for task in tasks():
+            yield _run_job(kind, schema, validate, options, *task)
+        return
+
+    # Every worker compiles the schema when it validates its first document
+    # and then keeps it in its schema cache.
+    executor = ProcessPoolExecutor(max_workers=workers)
+    pending = deque()
+    try:
+        for index, config, payments, job_path in tasks():
+            # Generators and other iterators cannot be sent to the workers.
+            if not hasattr(payments, '__len__'):
+                payments = list(payments)
+            args = (kind, schema, validate, options, index, config, payments, job_path)
+            pending.append((args, _submit(executor, args)))
+            if len(pending) >= workers * 2:
+                result, executor = _next_result(executor, pending, workers)
+                yield result
+        while pending:
+            result, executor = _next_result(executor, pending, workers)
+            yield result
+    finally:
+        executor.shutdown()
+
+
+def _submit(executor, args):
+    """
+    Submits a job to the pool. Returns None if the pool is broken.
+    """
+    try:
+        return executor.submit(_run_job, *args)
+    except BrokenProcessPool:
+        return None
+
+
+def _is_broken(future):
+    return future is None or isinstance(future.exception(), BrokenProcessPool)
+
+
+def _next_result(executor, pending, workers):
+    """
+    Returns the result of the oldest pending job. If a worker process died,
+    the pool is broken and all jobs in flight fail with it. These jobs are
+    then run again one by one, each in a fresh process, so that only the job
+    that crashed its worker becomes an error, and a new pool is started for
+    the remaining jobs. Jobs that are run again overwrite their output file.
+    @return: The result and the executor to use for further jobs
+    """
+    if _is_broken(pending[0][1]):
+        for i, (args, future) in enumerate(pending):
+            if _is_broken(future):
+                pending[i] = (args, _run_isolated(args))
+        executor.shutdown()
+        executor = ProcessPoolExecutor(max_workers=workers)
+    args, future = pending.popleft()
+    return _job_result(args[4], args[7], future), executor
+
+
+def _run_isolated(args):
+    """
+    Runs a job in a process of its own.
+    @return: The finished future of the job
+    """
+    with ProcessPoolExecutor(max_workers=1) as executor:
+        future = executor.submit(_run_job, *args)
+    return future
+
+
+def _job_result(index, path, future):
+    """
+    Returns the result of a job run in a worker process. Errors outside of the
+    job, e.g. arguments that cannot be pickled or a worker that crashed while
+    running it, become the error of the job.
+    """
+    try:
+        return future.result()
+    except Exception as e:
+        return _error_result(index, path, e)
+
+
+def _run_job(kind, schema, validate, options, index, config, payments, path):
+    """
+    Runs a single job and catches all of its errors.
+    """
+    try:
+        doc = KINDS[kind][0](dict(config), schema=schema, **options)
+        doc.add_payments(payments)
+        if path is not None:
+            size = doc.write(path, validate=validate)
+            xml = None
+        else:
+            xml = doc.export(validate=validate)
+            size = len(xml)
+        return JobResult(index, path, doc.msg_id, doc.nb_of_txs, doc.ctrl_sum, size, xml, None)
+    except Exception as e:
+        return _error_result(index, path, e)
+
+
+def _error_result(index, path, e):
+    return JobResult(index, path, None, None, None, None, None, "{}: {}".format(type(e).__name__, e))
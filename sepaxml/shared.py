@@ -19,41 +19,87 @@ AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY
 WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN
 CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
 """
+import asyncio
+import datetime
+import functools
+import io
+import os
 import xml.etree.ElementTree as ET
-from collections import OrderedDict
+from collections import OrderedDict, deque
+from collections.abc import Mapping
 
-from .utils import decimal_str_to_int, int_to_decimal_str, make_msg_id
-from .validation import try_valid_xml
+from .bic import is_valid_bic
+from .cleaning import clean_text
+from .iban import check_ibans, is_valid_iban, normalize_iban, normalize_ibans
+from .ids import default_generator
+from .utils import int_to_decimal_str, is_ascii, make_id_prefix, make_msg_id
+from .validation import ValidationError, try_valid_xml
+
+XML_DECLARATION = b"<?xml version=\"1.0\" encoding=\"UTF-8\"?>"
+RENDERERS = ("etree", "template")
 
 
 class SepaPaymentInitn:
 
-    def __init__(self, config, schema, clean=True):
+    def __init__(self, config, schema, clean=True, lazy=False, renderer="etree", id_generator=None, check_iban=False,
+                 bic_directory=None, stats=None):
         """
         Constructor. Checks the config, prepares the document and
         builds the header.
         @param param: The config dict.
+        @param lazy: If True, added payments are only kept as compact records
+        and converted to XML nodes during export. This saves a lot of memory
+        and time for large documents.
+        @param renderer: "etree" to build the document with ElementTree, or
+        "template" to write the payments as precompiled XML fragments. The
+        output is the same, the template renderer is much faster and implies lazy.
+        @param id_generator: The generator for the random part of MsgId, PmtInfId
+        and EndToEndId, see sepaxml.ids. Defaults to secure random IDs.
+        @param check_iban: If True, the IBANs of added payments are normalized
+        and their format and check digits are validated, see sepaxml.iban.
+        @param bic_directory: A sepaxml.bic.BicDirectory. If given, the BICs of
+        added payments are validated, and missing BICs of the payments and the
+        config are derived from the IBAN if the directory knows the bank.
+        @param stats: A sepaxml.stats.Stats that records the time spent in the
+        phases of building the document and counts the size of the output.
         @raise exception: When the config file is invalid.
         """
+        if renderer not in RENDERERS:
+            raise ValueError("Unknown renderer: {}".format(renderer))
         self._config = None  # Will contain the config file.
         self._xml = None  # Will contain the final XML file.
+        self._payments = []  # Will contain the payment records not yet converted to XML in lazy mode.
         self._batches = OrderedDict()  # Will contain the SEPA batches.
         self._batch_totals = OrderedDict()  # Will contain the total amount to debit per batch for checksum total.
+        self._nb_of_txs_total = 0  # Will contain the number of transactions in the document.
+        self._ctrl_sum_total = 0  # Will contain the total amount of all transactions in the document.
         self.schema = schema
-        self.msg_id = make_msg_id()
+        self.id_generator = id_generator or default_generator
+        self.msg_id = make_msg_id(self.id_generator)
         self.clean = clean
+        self.check_iban = check_iban
+        self.bic_directory = bic_directory
+        self.renderer = renderer
+        self.lazy = lazy or renderer == "template"
+        self.stats = stats
+        if stats is not None:
+            stats.instrument(self)
+
+        if bic_directory is not None and not config.get('BIC') and config.get('IBAN'):
+            bic = bic_directory.bic_for_iban(normalize_iban(config['IBAN']))
+            if bic:
+                config['BIC'] = bic
 
         config_result = self.check_config(config)
         if config_result:
             self._config = config
             if self.clean:
-                from text_unidecode import unidecode
-
-                self._config['name'] = unidecode(self._config['name'])[:70]
+                self._config['name'] = clean_text(self._config['name'], 70)
 
                 if self._config.get('msg_id'):
                     self.msg_id = self._config['msg_id'][:35]
 
+        self._id_prefix = make_id_prefix(self._config['name'])
         self._prepare_document()
         self._create_header()
 
@@ -73,52 +119,627 @@ class SepaPaymentInitn:
         n = ET.Element(self.root_el)
         self._xml.append(n)
 
+    def _make_id(self):
+        """
+        Create a PmtInfId or EndToEndId, see utils.make_id.
+        """
+        return self._id_prefix + "-" + self.id_generator.generate(12)
+
+    @property
+    def nb_of_txs(self):
+        """
+        The number of transactions added so far.
+        """
+        return self._nb_of_txs_total
+
+    @property
+    def ctrl_sum(self):
+        """
+        The total amount of all transactions added so far, in cents.
+        """
+        return self._ctrl_sum_total
+
+    def add_payments(self, payments):
+        """
+        Function to add many payments at once. Cleaning, validation and totals
+        are computed in bulk passes over whole columns instead of once per
+        payment. Nothing is added if any of the payments is invalid. Unlike
+        add_payment, the input is not modified.
+        @param payments: An iterable of payment dicts, or columnar data: a dict
+        mapping the payment fields to equal-length sequences, a pandas
+        DataFrame or a numpy structured array.
+        @raise exception: when a payment is invalid
+        """
+        columns, count = payment_columns(payments)
+        records = self._records_from_columns(columns, count)
+
+        if self.lazy:
+            self._payments.extend(records)
+        else:
+            for record in records:
+                self._add_record(record)
+
+        self._nb_of_txs_total += count
+        self._ctrl_sum_total += sum(columns['amount'])
+
+    # Cleaning goes through these, so it can be measured as a phase, see sepaxml.stats.
+    _clean_text = staticmethod(clean_text)
+
+    def _clean_column(self, values, length):
+        return clean_column(values, length)
+
+    def _check_accounts(self, payment):
+        """
+        Normalizes and validates the IBAN of a payment if check_iban is set.
+        With a BIC directory, validates the BIC or derives a missing one.
+        @return: The validation errors as a string
+        """
+        validation = ""
+        if 'IBAN' not in payment:
+            return validation
+
+        if self.check_iban:
+            payment['IBAN'] = normalize_iban(payment['IBAN'])
+            if not is_valid_iban(payment['IBAN']):
+                validation += "IBAN_INVALID "
+
+        if self.bic_directory is not None:
+            if payment.get('BIC'):
+                if not is_valid_bic(payment['BIC']):
+                    validation += "BIC_INVALID "
+            else:
+                bic = self.bic_directory.bic_for_iban(normalize_iban(payment['IBAN']))
+                if bic:
+                    payment['BIC'] = bic
+        return validation
+
+    def _account_columns(self, columns, count):
+        """
+        Bulk version of _check_accounts.
+        @return: A tuple of the IBAN and BIC columns
+        """
+        ibans = iban_column(columns['IBAN']) if self.check_iban else columns['IBAN']
+        bics = optional_column(columns, 'BIC', count)
+        if self.bic_directory is not None:
+            bics = bic_column(bics, ibans, self.bic_directory)
+        return ibans, bics
+
+    def _records_from_columns(self, columns, count):
+        raise NotImplementedError()
+
     def _create_header(self):
         raise NotImplementedError()
 
+    def _add_record(self, payment):
+        raise NotImplementedError()
+
     def _finalize_batch(self):
         raise NotImplementedError()
 
-    def export(self, validate=True, pretty_print=False):
+    def _batch_key(self, payment):
+        raise NotImplementedError()
+
+    def _compile_templates(self):
+        raise NotImplementedError()
+
+    @staticmethod
+    def _render_PmtInf(templates, pmtinf_id, payment, nb_of_txs, ctrl_sum, batch):
+        raise NotImplementedError()
+
+    @staticmethod
+    def _render_TX(templates, payment):
+        raise NotImplementedError()
+
+    def _finalize(self):
+        """
+        Finalizes the batches and calculates the checksums (amount sum and
+        transaction count), which are filled into the group header.
+        """
+        if self.renderer == "etree":
+            for payment in self._payments:
+                self._add_record(payment)
+            self._payments = []
+
+            self._finalize_batch()
+
+        n = self._xml.find(self.root_el)
+        GrpHdr_node = n.find('GrpHdr')
+        CtrlSum_node = GrpHdr_node.find('CtrlSum')
+        NbOfTxs_node = GrpHdr_node.find('NbOfTxs')
+        CtrlSum_node.text = int_to_decimal_str(self._ctrl_sum_total)
+        NbOfTxs_node.text = str(self._nb_of_txs_total)
+
+    def _write_xml(self, fileobj, workers=None):
+        """
+        Serializes the finalized document into a binary file-like object.
+        ElementTree hands the output to the file in chunks, so the document
+        never exists as a whole in memory. With workers, the PmtInf blocks of
+        the template renderer are rendered in a pool of processes.
+        """
+        # Writing the XML version ourselves is hacky, but cElementTree only
+        # offers the declaration in a different format.
+        fileobj.write(XML_DECLARATION)
+        if self.renderer == "etree":
+            ET.ElementTree(self._xml).write(fileobj, "utf-8")
+            return
+
+        # The tree only contains the group header, the payments are spliced
+        # in before the closing tags.
+        tail = ("</" + self.root_el + "></Document>").encode()
+        head = ET.tostring(self._xml, "utf-8")
+        fileobj.write(head[:-len(tail)])
+        if workers:
+            self._write_fragments_parallel(fileobj, workers)
+            fileobj.write(tail)
+            return
+
+        buf = []
+        for fragment in self._render_fragments():
+            buf.append(fragment)
+            if len(buf) >= 1000:
+                fileobj.write("".join(buf).encode("utf-8", "xmlcharrefreplace"))
+                buf = []
+        fileobj.write("".join(buf).encode("utf-8", "xmlcharrefreplace"))
+        fileobj.write(tail)
+
+    def _pmtinf_blocks(self):
+        """
+        Groups the payment records into PmtInf blocks. Yields tuples of the
+        PmtInfId, the payment records and whether the block is a batch.
+        """
+        if not self._config['batch']:
+            for payment in self._payments:
+                yield self._make_id(), [payment], False
+            return
+
+        batches = OrderedDict()
+        for payment in self._payments:
+            key = self._batch_key(payment)
+            if key in batches:
+                batches[key].append(payment)
+            else:
+                batches[key] = [payment]
+
+        for payments in batches.values():
+            yield self._make_id(), payments, True
+
+    def _count_batches(self):
+        """
+        Returns the number of PmtInf blocks of the finalized document.
+        """
+        if self.renderer == "etree":
+            return len(self._xml.find(self.root_el).findall('PmtInf'))
+        if not self._config['batch']:
+            return len(self._payments)
+        return len({self._batch_key(payment) for payment in self._payments})
+
+    def _render_fragments(self):
+        """
+        Renders the PmtInf blocks of all payment records with the template
+        renderer. Yields the XML as a sequence of string fragments.
+        """
+        templates = self._compile_templates()
+        for pmtinf_id, payments, batch in self._pmtinf_blocks():
+            ctrl_sum = sum(payment.amount for payment in payments)
+            yield self._render_PmtInf(templates, pmtinf_id, payments[0], len(payments), ctrl_sum, batch)
+            for payment in payments:
+                yield self._render_TX(templates, payment)
+            yield "</PmtInf>"
+
+    def _write_fragments_parallel(self, fileobj, workers):
+        """
+        Renders the PmtInf blocks in a pool of processes and writes them in
+        their original order. The IDs are generated here, so the output is the
+        same as with the serial renderer. Only a limited number of tasks is
+        in flight at any time to bound the memory usage.
+        """
+        from concurrent.futures import ProcessPoolExecutor
+
+        templates = self._compile_templates()
+        chunk_size = max(1000, len(self._payments) // (workers * 4) + 1)
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            pending = deque()
+            for blocks in _chunk_blocks(self._pmtinf_blocks(), chunk_size):
+                pending.append(executor.submit(_render_blocks, type(self), templates, blocks))
+                if len(pending) >= workers * 2:
+                    fileobj.write(pending.popleft().result())
+            while pending:
+                fileobj.write(pending.popleft().result())
+
+    def split(self, max_transactions=None, max_bytes=None):
+        """
+        Method to distribute the payments over several documents, e.g. to
+        respect the limits of a bank. Every document gets its own MsgId and
+        group header totals. Batches are kept together in one document where
+        possible and are only divided if they do not fit into a document of
+        their own. Only works in lazy mode, since the payments need to be kept
+        as records.
+
+        @param max_transactions: The maximum number of transactions per document
+        @param max_bytes: The maximum size of a document as written by export()
+        without pretty printing
+        @raise ValueError: if the document is not lazy or a single payment
+        exceeds max_bytes
+        @return: A generator of documents that can be exported like this one
+        """
+        if not self.lazy:
+            raise ValueError("Splitting needs lazy=True or renderer=\"template\".")
+
+        templates = self._compile_templates()
+        # Measured with the totals of all payments, which is an upper bound for every document.
+        doc_size = self._split_document(self._payments)._header_size()
+
+        groups = OrderedDict()
+        for i, payment in enumerate(self._payments):
+            key = self._batch_key(payment) if self._config['batch'] else i
+            if key in groups:
+                groups[key].append(payment)
+            else:
+                groups[key] = [payment]
+
+        current = []
+        current_size = doc_size
+        for payments in groups.values():
+            # The PmtInf header is measured with the totals of the whole batch,
+            # which is an upper bound for every part of it.
+            head_size = _fragment_size(self._render_PmtInf(
+                templates, self._id_prefix + "-" + "0" * 12, payments[0], len(payments), sum(p.amount for p in payments), self._config['batch']
+            ) + "</PmtInf>")
+            sizes = [_fragment_size(self._render_TX(templates, payment)) for payment in payments]
+
+            fits_alone = (
+                (not max_transactions or len(payments) <= max_transactions) and
+                (not max_bytes or doc_size + head_size + sum(sizes) <= max_bytes)
+            )
+            fits = (
+                (not max_transactions or len(current) + len(payments) <= max_transactions) and
+                (not max_bytes or current_size + head_size + sum(sizes) <= max_bytes)
+            )
+            if current and fits_alone and not fits:
+                yield self._split_document(current)
+                current = []
+                current_size = doc_size
+
+            pending_head = head_size
+            for payment, size in zip(payments, sizes):
+                if current and (
+                    (max_transactions and len(current) >= max_transactions) or
+                    (max_bytes and current_size + pending_head + size > max_bytes)
+                ):
+                    yield self._split_document(current)
+                    current = []
+                    current_size = doc_size
+                    pending_head = head_size
+                if max_bytes and doc_size + head_size + size > max_bytes:
+                    raise ValueError("A payment does not fit into {} bytes.".format(max_bytes))
+                current.append(payment)
+                current_size += pending_head + size
+                pending_head = 0
+
+        if current:
+            yield self._split_document(current)
+
+    def _split_document(self, payments):
+        """
+        Creates a new document of the same kind for a part of the payments.
+        """
+        doc = type(self)(self._config, schema=self.schema, clean=False, renderer="template",
+                         id_generator=self.id_generator, stats=self.stats)
+        doc._payments = list(payments)
+        doc._nb_of_txs_total = len(doc._payments)
+        doc._ctrl_sum_total = sum(payment.amount for payment in doc._payments)
+        return doc
+
+    def _header_size(self):
+        """
+        Returns the size of the template rendered document without its
+        payments, i.e. the XML declaration, the group header and the closing tags.
+        """
+        self._finalize()
+        return len(XML_DECLARATION) + len(ET.tostring(self._xml, "utf-8"))
+
+    def export(self, validate=True, pretty_print=False, workers=None):
         """
         Method to output the xml as string. It will finalize the batches and
         then calculate the checksums (amount sum and transaction count),
         fill these into the group header and output the XML.
 
         @param pretty_print: uses Python's xml.dom.minidom.Node.toprettyxml to make it easier to read for humans
+        @param workers: The number of processes to render the payments with.
+        Only supported by the template renderer, the output is the same.
         """
-        self._finalize_batch()
+        self._check_workers(workers)
+        self._finalize()
 
-        ctrl_sum_total = 0
-        nb_of_txs_total = 0
+        out = io.BytesIO()
+        self._write_xml(out, workers)
+        out = out.getvalue()
 
-        for ctrl_sum in self._xml.iter('CtrlSum'):
-            if ctrl_sum.text is None:
-                continue
-            ctrl_sum_total += decimal_str_to_int(ctrl_sum.text)
+        if pretty_print:
+            out = self._pretty_print(out)
 
-        for nb_of_txs in self._xml.iter('NbOfTxs'):
-            if nb_of_txs.text is None:
-                continue
-            nb_of_txs_total += int(nb_of_txs.text)
+        if validate:
+            self.validate(out)
+        return out
 
-        n = self._xml.find(self.root_el)
-        GrpHdr_node = n.find('GrpHdr')
-        CtrlSum_node = GrpHdr_node.find('CtrlSum')
-        NbOfTxs_node = GrpHdr_node.find('NbOfTxs')
-        CtrlSum_node.text = int_to_decimal_str(ctrl_sum_total)
-        NbOfTxs_node.text = str(nb_of_txs_total)
+    def _pretty_print(self, out):
+        from xml.dom import minidom
+        out_minidom = minidom.parseString(out)
+        return out_minidom.toprettyxml(encoding="UTF-8")
 
-        # Prepending the XML version is hacky, but cElementTree only offers this
-        # automatically if you write to a file, which we don't necessarily want.
-        out = b"<?xml version=\"1.0\" encoding=\"UTF-8\"?>" + ET.tostring(
-            self._xml, "utf-8")
+    def export_to(self, fileobj, pretty_print=False, workers=None):
+        """
+        Method to write the xml to a binary file-like object. The output is
+        identical to export(), but is written incrementally instead of being
+        built in memory first. The output is not validated, use write() or
+        try_valid_xml() for that.
 
+        @param fileobj: A file-like object opened in binary mode
+        @param pretty_print: uses Python's xml.dom.minidom.Node.toprettyxml to make it easier to read for humans.
+        This needs to build the whole document in memory.
+        @param workers: The number of processes to render the payments with, see export()
+        @return: The number of bytes written
+        """
         if pretty_print:
-            from xml.dom import minidom
-            out_minidom = minidom.parseString(out)
-            out = out_minidom.toprettyxml(encoding="UTF-8")
+            out = self.export(validate=False, pretty_print=True, workers=workers)
+            fileobj.write(out)
+            return len(out)
+
+        self._check_workers(workers)
+        self._finalize()
+        writer = CountingWriter(fileobj)
+        self._write_xml(writer, workers)
+        return writer.written
+
+    def write(self, path, validate=True, pretty_print=False, workers=None):
+        """
+        Method to write the xml to a file. If validation fails, the file is
+        removed again.
+
+        @param path: The path of the file to create
+        @param pretty_print: uses Python's xml.dom.minidom.Node.toprettyxml to make it easier to read for humans
+        @param workers: The number of processes to render the payments with, see export()
+        @raise ValidationError: if validate is True and the output is invalid
+        @return: The number of bytes written
+        """
+        with open(path, 'wb') as f:
+            written = self.export_to(f, pretty_print=pretty_print, workers=workers)
+
+        if validate:
+            try:
+                self.validate(path)
+            except ValidationError:
+                os.remove(path)
+                raise
+        return written
+
+    def validate(self, xmlout):
+        """
+        Method to validate an exported document against the schema of this document.
+
+        @param xmlout: The XML as bytes, or the path of a file
+        @raise ValidationError: if the XML is invalid
+        """
+        try_valid_xml(xmlout, self.schema)
+
+    async def export_async(self, validate=True, pretty_print=False, executor=None, validation_executor=None):
+        """
+        Like export(), but serializes and validates the document in an
+        executor, so the event loop is not blocked. The document must not be
+        changed while the export is running.
 
+        @param executor: The executor to serialize the document in, defaults to
+        the default executor of the event loop. As documents cannot be
+        pickled, this needs to be a thread pool.
+        @param validation_executor: The executor to validate the output in,
+        defaults to executor. This can be a process pool.
+        """
+        # Within a coroutine, this is the running loop. get_running_loop needs Python 3.7.
+        loop = asyncio.get_event_loop()
+        out = await loop.run_in_executor(
+            executor, functools.partial(self.export, validate=False, pretty_print=pretty_print)
+        )
         if validate:
-            try_valid_xml(out, self.schema)
+            await self.validate_async(out, validation_executor or executor)
         return out
+
+    async def validate_async(self, xmlout, executor=None):
+        """
+        Like validate(), but runs the validation in an executor.
+
+        @param xmlout: The XML as bytes, or the path of a file
+        @param executor: The executor to validate in, defaults to the default
+        executor of the event loop. This can be a process pool.
+        @raise ValidationError: if the XML is invalid
+        """
+        loop = asyncio.get_event_loop()
+        await loop.run_in_executor(executor, try_valid_xml, xmlout, self.schema)
+
+    def _check_workers(self, workers):
+        if workers and self.renderer != "template":
+            raise ValueError("Rendering with workers needs renderer=\"template\".")
+
+
+def _chunk_blocks(blocks, chunk_size):
+    """
+    Groups PmtInf blocks into chunks of at least chunk_size payments.
+    """
+    chunk = []
+    size = 0
+    for block in blocks:
+        chunk.append(block)
+        size += len(block[1])
+        if size >= chunk_size:
+            yield chunk
+            chunk = []
+            size = 0
+    if chunk:
+        yield chunk
+
+
+def _render_blocks(cls, templates, blocks):
+    """
+    Renders a chunk of PmtInf blocks to bytes. Runs in a worker process.
+    """
+    parts = []
+    for pmtinf_id, payments, batch in blocks:
+        ctrl_sum = sum(payment.amount for payment in payments)
+        parts.append(cls._render_PmtInf(templates, pmtinf_id, payments[0], len(payments), ctrl_sum, batch))
+        for payment in payments:
+            parts.append(cls._render_TX(templates, payment))
+        parts.append("</PmtInf>")
+    return "".join(parts).encode("utf-8", "xmlcharrefreplace")
+
+
+def _fragment_size(fragment):
+    """
+    Returns the number of bytes a fragment of the template renderer takes up
+    in the output.
+    """
+    if is_ascii(fragment):
+        return len(fragment)
+    return len(fragment.encode("utf-8", "xmlcharrefreplace"))
+
+
+class CountingWriter:
+    """
+    Wraps a binary file-like object and counts the bytes written to it.
+    """
+
+    def __init__(self, fileobj):
+        self.fileobj = fileobj
+        self.written = 0
+
+    def write(self, data):
+        self.written += len(data)
+        return self.fileobj.write(data)
+
+
+def payment_columns(payments):
+    """
+    Converts the input of add_payments into a dict of lists.
+    @return: A tuple of the columns and the number of payments
+    """
+    dtype_names = getattr(getattr(payments, 'dtype', None), 'names', None)
+    if dtype_names:
+        # numpy structured array
+        payments = {name: payments[name] for name in dtype_names}
+    elif not isinstance(payments, Mapping) and hasattr(payments, 'columns'):
+        # pandas DataFrame
+        payments = {name: payments[name] for name in payments.columns}
+
+    if isinstance(payments, Mapping):
+        columns = {}
+        count = None
+        for key, values in payments.items():
+            if hasattr(values, 'tolist'):
+                values = values.tolist()
+            else:
+                values = list(values)
+            if count is None:
+                count = len(values)
+            elif len(values) != count:
+                raise ValueError("All payment columns need to have the same length.")
+            columns[key] = values
+        return columns, count or 0
+
+    rows = list(payments)
+    keys = set()
+    for row in rows:
+        keys.update(row)
+    return {key: [row.get(key) for row in rows] for key in keys}, len(rows)
+
+
+def require_columns(columns, required):
+    """
+    Checks that all required payment fields are present.
+    """
+    validation = ""
+    for column in required:
+        if column not in columns:
+            validation += column.upper() + "_MISSING "
+    if validation:
+        raise Exception('Payments did not validate: ' + validation)
+
+
+def optional_column(columns, name, count):
+    """
+    Returns a column that may be missing. Missing values, including NaN
+    values from pandas, are returned as None.
+    """
+    if name not in columns:
+        return [None] * count
+    return [None if v is None or v != v else v for v in columns[name]]
+
+
+def check_column(values, check, error):
+    """
+    Checks every value of a column and reports the first invalid payment.
+    """
+    for i, value in enumerate(values):
+        if not check(value):
+            raise Exception('Payment {} did not validate: {}'.format(i, error))
+
+
+def date_column(values, error, convert=str):
+    """
+    Validates a column of dates and converts them to strings. Dates tend to
+    repeat a lot, so every distinct date is only converted once. Datetimes,
+    e.g. the pandas Timestamps of datetime64 columns, are cut to their date.
+    """
+    converted = {}
+    result = []
+    for i, value in enumerate(values):
+        try:
+            result.append(converted[value])
+        except KeyError:
+            if not isinstance(value, datetime.date) or value != value:  # pandas NaT is a datetime, but not equal to itself
+                raise Exception('Payment {} did not validate: {}'.format(i, error))
+            if isinstance(value, datetime.datetime):
+                converted[value] = convert(value.date())
+            else:
+                converted[value] = convert(value)
+            result.append(converted[value])
+    return result
+
+
+def iban_column(values):
+    """
+    Normalizes and validates a column of IBANs.
+    """
+    ibans = normalize_ibans(values)
+    valid = check_ibans(ibans)
+    if not all(valid):
+        raise Exception('Payment {} did not validate: {}'.format(valid.index(False), "IBAN_INVALID"))
+    return ibans
+
+
+def bic_column(bics, ibans, directory):
+    """
+    Validates a column of BICs and derives missing ones from the IBANs.
+    """
+    result = []
+    for i, (bic, iban) in enumerate(zip(bics, ibans)):
+        if bic:
+            if not is_valid_bic(bic):
+                raise Exception('Payment {} did not validate: {}'.format(i, "BIC_INVALID"))
+        else:
+            bic = directory.bic_for_iban(normalize_iban(iban)) or None
+        result.append(bic)
+    return result
+
+
+def clean_column(values, length):
+    """
+    Transliterates and truncates a column of texts. Every distinct text is
+    only cleaned once.
+    """
+    cleaned = {}
+    result = []
+    for value in values:
+        try:
+            result.append(cleaned[value])
+        except KeyError:
+            cleaned[value] = clean_text(value, length)
+            result.append(cleaned[value])
+    return result
@@ -0,0 +1,175 @@
+"""
+Copyright (c) 2017-2023 Raphael Michel and contributors
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is furnished
+to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY,
+WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN
+CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+"""
+import time
+from collections import OrderedDict
+
+from .shared import CountingWriter
+
+# Phase names and the methods of SepaPaymentInitn they are measured on. The
+# phases nest, e.g. the time of add_payment includes clean and check_payment.
+PHASES = (
+    ("add_payment", "add_payment"),
+    ("add_payments", "add_payments"),
+    ("clean", "_clean_text"),
+    ("clean", "_clean_column"),
+    ("check_payment", "check_payment"),
+    ("build_elements", "_add_record"),
+    ("finalize_batch", "_finalize_batch"),
+    ("pretty_print", "_pretty_print"),
+    ("validate", "validate"),
+)
+COUNTERS = ("documents", "payments", "batches", "bytes")
+
+
+class PhaseStats:
+    """
+    The number of calls and the accumulated wall-clock and CPU time of one phase.
+    """
+    __slots__ = ("calls", "wall", "cpu")
+
+    def __init__(self):
+        self.calls = 0
+        self.wall = 0.0
+        self.cpu = 0.0
+
+    def __repr__(self):
+        return "PhaseStats(calls={}, wall={:.6f}, cpu={:.6f})".format(self.calls, self.wall, self.cpu)
+
+
+class Stats:
+    """
+    Collects the time spent in the phases of building documents and counts the
+    documents, payments, batches and bytes they are serialized to, including
+    pretty-printing. Pass an instance as stats= to SepaDD or SepaTransfer; the
+    same instance can be shared by several documents in one thread. Documents
+    without stats are not instrumented at all.
+    """
+
+    def __init__(self, callback=None):
+        """
+        @param callback: Called as callback(phase, wall, cpu) after every
+        measured call. The counters are updated before the callback of the
+        serialize phase.
+        """
+        self.callback = callback
+        self.phases = OrderedDict()
+        self.counters = OrderedDict((name, 0) for name in COUNTERS)
+
+    def record(self, phase, wall, cpu):
+        """
+        Adds one call of a phase.
+
+        @param phase: The name of the phase
+        @param wall: The wall-clock time in seconds
+        @param cpu: The CPU time of the process in seconds
+        """
+        stats = self.phases.get(phase)
+        if stats is None:
+            stats = self.phases[phase] = PhaseStats()
+        stats.calls += 1
+        stats.wall += wall
+        stats.cpu += cpu
+        if self.callback is not None:
+            self.callback(phase, wall, cpu)
+
+    def count(self, name, n=1):
+        self.counters[name] = self.counters.get(name, 0) + n
+
+    def timed(self, phase, func):
+        """
+        Wraps a function so that its calls are recorded as the given phase.
+        """
+        perf_counter = time.perf_counter
+        process_time = time.process_time
+
+        def wrapper(*args, **kwargs):
+            wall = perf_counter()
+            cpu = process_time()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                self.record(phase, perf_counter() - wall, process_time() - cpu)
+
+        return wrapper
+
+    def instrument(self, doc):
+        """
+        Replaces the methods of a document that make up the phases with
+        measured versions. Called by the constructor of the document.
+        """
+        for phase, method in PHASES:
+            setattr(doc, method, self.timed(phase, getattr(doc, method)))
+
+        write_xml = doc._write_xml
+
+        def serialize(fileobj, workers=None):
+            writer = CountingWriter(fileobj)
+            wall = time.perf_counter()
+            cpu = time.process_time()
+            try:
+                write_xml(writer, workers)
+            finally:
+                wall = time.perf_counter() - wall
+                cpu = time.process_time() - cpu
+                self.count("documents")
+                self.count("payments", doc.nb_of_txs)
+                self.count("batches", doc._count_batches())
+                self.count("bytes", writer.written)
+                self.record("serialize", wall, cpu)
+
+        doc._write_xml = serialize
+
+        pretty_print = doc._pretty_print
+
+        def pretty(out):
+            result = pretty_print(out)
+            # Count the size of the output that is actually returned.
+            self.count("bytes", len(result) - len(out))
+            return result
+
+        doc._pretty_print = pretty
+
+    def reset(self):
+        self.phases.clear()
+        for name in self.counters:
+            self.counters[name] = 0
+
+    def as_dict(self):
+        """
+        @return: The phases and counters as a JSON-compatible dict
+        """
+        return {
+            "phases": OrderedDict(
+                (phase, {"calls": s.calls, "wall": s.wall, "cpu": s.cpu}) for phase, s in self.phases.items()
+            ),
+            "counters": OrderedDict(self.counters),
+        }
+
+    def report(self):
+        """
+        @return: The phases and counters as a human-readable table
+        """
+        lines = ["%-16s %10s %10s %10s" % ("phase", "calls", "wall [s]", "cpu [s]")]
+        for phase, s in self.phases.items():
+            lines.append("%-16s %10d %10.3f %10.3f" % (phase, s.calls, s.wall, s.cpu))
+        for name, value in self.counters.items():
+            lines.append("%-16s %10d" % (name, value))
+        return "\n".join(lines)
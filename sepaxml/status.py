@@ -0,0 +1,195 @@
+"""
+Copyright (c) 2017-2023 Raphael Michel and contributors
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is furnished
+to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY,
+WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN
+CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+"""
+import sys
+import xml.etree.ElementTree as ET
+from collections import namedtuple
+
+Status = namedtuple('Status', ['status', 'reason', 'pmtinf_id', 'additional_info'])
+Status.__doc__ = """
+The status of a payment as reported in a pain.002 file, e.g. "RJCT" with
+the reason code "AC04".
+"""
+
+# Group and payment block statuses that apply to all contained transactions
+REJECTED = "RJCT"
+
+
+def read_statuses(source):
+    """
+    Reads the transaction statuses of a pain.002 (payment status report) file
+    in constant memory. Every transaction element is discarded as soon as it
+    has been read.
+    @param source: A path or a binary file-like object
+    @return: A generator of dicts with the original MsgId, PmtInfId and
+    EndToEndId, the status, the reason code and the additional information.
+    Statuses of whole groups or payment blocks without transaction details
+    are yielded with an endtoend_id of None, and a pmtinf_id of None for groups.
+    """
+    stack = []
+    msg_id = None
+    pmtinf = None
+    for event, elem in ET.iterparse(source, events=("start", "end")):
+        if event == "start":
+            elem.tag = elem.tag.rpartition("}")[2]
+            if elem.tag == "TxInfAndSts" and pmtinf is None:
+                # The block status precedes the first transaction.
+                pmtinf = _read_status(stack[-1], "OrgnlPmtInfId", "PmtInfSts")
+            stack.append(elem)
+            continue
+
+        stack.pop()
+        if elem.tag == "OrgnlGrpInfAndSts":
+            group = _read_status(elem, "OrgnlMsgId", "GrpSts")
+            msg_id = group["msg_id"]
+            if group["status"]:
+                yield group
+            stack[-1].remove(elem)
+        elif elem.tag == "TxInfAndSts":
+            yield {
+                "msg_id": elem.findtext("OrgnlGrpInf/OrgnlMsgId") or msg_id,
+                "pmtinf_id": pmtinf["pmtinf_id"],
+                "endtoend_id": elem.findtext("OrgnlEndToEndId"),
+                "status": elem.findtext("TxSts"),
+                "reason": _reason(elem),
+                "additional_info": elem.findtext("StsRsnInf/AddtlInf"),
+            }
+            stack[-1].remove(elem)
+        elif elem.tag == "OrgnlPmtInfAndSts":
+            if pmtinf is None:
+                pmtinf = _read_status(elem, "OrgnlPmtInfId", "PmtInfSts")
+            if pmtinf["status"]:
+                pmtinf["msg_id"] = msg_id
+                yield pmtinf
+            pmtinf = None
+            stack[-1].remove(elem)
+
+
+class StatusIndex:
+    """
+    An in-memory index from (MsgId, EndToEndId) of submitted transactions to
+    their Status, built from one or more pain.002 files. Lookups are O(1).
+    Status and reason codes as well as IDs shared by many transactions are
+    stored only once.
+
+    Note that the EndToEndId is only unique if it was generated, e.g. by
+    sepaxml, and not set to "NOTPROVIDED".
+    """
+
+    def __init__(self):
+        self.transactions = {}  # (MsgId, EndToEndId) -> Status
+        self.pmtinfs = {}  # (MsgId, PmtInfId) -> Status
+        self.groups = {}  # MsgId -> Status
+        self.endtoend_pmtinfs = {}  # (MsgId, EndToEndId) -> PmtInfId
+
+    def add_file(self, source):
+        """
+        Adds the statuses of a pain.002 file to the index. Later files
+        override the statuses of earlier ones.
+        @param source: A path or a binary file-like object
+        """
+        intern = sys.intern
+        for row in read_statuses(source):
+            msg_id = intern(row["msg_id"] or "")
+            status = Status(
+                intern(row["status"] or ""),
+                intern(row["reason"]) if row["reason"] else None,
+                intern(row["pmtinf_id"]) if row["pmtinf_id"] else None,
+                row["additional_info"],
+            )
+            if row["endtoend_id"] is not None:
+                self.transactions[msg_id, row["endtoend_id"]] = status
+            elif row["pmtinf_id"] is not None:
+                self.pmtinfs[msg_id, row["pmtinf_id"]] = status
+            else:
+                self.groups[msg_id] = status
+
+    def add_pmtinfs(self, msg_id, pmtinfs):
+        """
+        Adds the payment blocks of a submitted document, so that transactions
+        of a rejected payment block can be found, see get(). The blocks can
+        be read from the submitted file with sepaxml.reader.PaymentReader.
+        @param msg_id: The MsgId of the submitted document
+        @param pmtinfs: A dict from PmtInfId to an iterable of the EndToEndIds
+        of its transactions
+        """
+        intern = sys.intern
+        msg_id = intern(msg_id)
+        for pmtinf_id, endtoend_ids in pmtinfs.items():
+            pmtinf_id = intern(pmtinf_id)
+            for endtoend_id in endtoend_ids:
+                self.endtoend_pmtinfs[msg_id, endtoend_id] = pmtinf_id
+
+    def get(self, msg_id, endtoend_id, default=None):
+        """
+        Returns the status of a transaction. If the transaction is not listed
+        but its whole payment block or message was rejected, the status of
+        the block or the message is returned.
+
+        A payment block status does not list its transactions, so a rejected
+        block is only found if its transactions were added with add_pmtinfs().
+        Otherwise its transactions return default.
+        @param msg_id: The MsgId of the submitted document
+        @param endtoend_id: The EndToEndId of the transaction
+        @return: The Status, or default if nothing is known
+        """
+        try:
+            return self.transactions[msg_id, endtoend_id]
+        except KeyError:
+            pass
+        pmtinf_id = self.endtoend_pmtinfs.get((msg_id, endtoend_id))
+        if pmtinf_id is not None:
+            pmtinf = self.pmtinfs.get((msg_id, pmtinf_id))
+            if pmtinf is not None and pmtinf.status == REJECTED:
+                return pmtinf
+        group = self.groups.get(msg_id)
+        if group is not None and group.status == REJECTED:
+            return group
+        return default
+
+    def __getitem__(self, key):
+        status = self.get(*key)
+        if status is None:
+            raise KeyError(key)
+        return status
+
+    def __contains__(self, key):
+        return self.get(*key) is not None
+
+    def __len__(self):
+        return len(self.transactions)
+
+
+def _read_status(elem, id_tag, status_tag):
+    key = "msg_id" if id_tag == "OrgnlMsgId" else "pmtinf_id"
+    result = {
+        "msg_id": None,
+        "pmtinf_id": None,
+        "endtoend_id": None,
+        "status": elem.findtext(status_tag),
+        "reason": _reason(elem),
+        "additional_info": elem.findtext("StsRsnInf/AddtlInf"),
+    }
+    result[key] = elem.findtext(id_tag)
+    return result
+
+
+def _reason(elem):
+    return elem.findtext("StsRsnInf/Rsn/Cd") or elem.findtext("StsRsnInf/Rsn/Prtry")
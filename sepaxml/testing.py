@@ -0,0 +1,230 @@
+"""
+Copyright (c) 2017-2023 Raphael Michel and contributors
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is furnished
+to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY,
+WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN
+CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+"""
+import datetime
+import random
+
+from .iban import _LETTERS_TO_DIGITS, IBAN_FORMATS, _parse_format
+
+# Countries of the euro area, whose accounts can take part in SEPA payments in EUR.
+DEFAULT_COUNTRIES = ("AT", "BE", "DE", "ES", "FI", "FR", "IE", "IT", "LU", "NL", "PT")
+
+FIRST_NAMES = (
+    "Anna", "Ángel", "Björn", "Chloé", "Dvořák", "Élodie", "François", "Günther", "Hélène", "Iñaki",
+    "Jürgen", "Katarzyna", "Łukasz", "María", "Niamh", "Øystein", "Paolo", "Rüdiger", "Søren", "Zoë",
+)
+LAST_NAMES = (
+    "Müller", "Schröder", "García", "Núñez", "Dubois", "Lefèvre", "O'Brien", "Rossi", "Conceição",
+    "Virtanen", "Jansen", "De Smet", "Weiß", "Kowalczyk", "Gruber", "Fernández", "Ó Súilleabháin",
+)
+COMPANY_SUFFIXES = ("GmbH", "GmbH & Co. KG", "S.A.", "S.à r.l.", "B.V.", "SpA", "Lda.", "e.V.")
+STREETS = (
+    "Hauptstraße", "Rue de la Paix", "Calle Mayor", "Via Roma", "Kerkstraat", "Große Bleichen",
+    "Avenida da Liberdade", "Mannerheimintie", "Grand-Rue", "Ringstraße",
+)
+TOWNS = ("Berlin", "München", "Köln", "Paris", "Liège", "Madrid", "Málaga", "Milano", "Lisboa", "Wien")
+DESCRIPTIONS = (
+    "Invoice {}", "Mitgliedsbeitrag {}", "Facture n° {}", "Cuota mensual {}", "Abonnement {}",
+    "Rechnung {} – Dank für Ihren Einkauf", "Contract {}",
+)
+# Sequence types of direct debits and how often they occur.
+TYPES = ("FRST", "RCUR", "OOFF", "FNAL")
+TYPE_WEIGHTS = (10, 80, 5, 5)
+
+_ALPHABETS = {"n": "0123456789", "a": "ABCDEFGHIJKLMNOPQRSTUVWXYZ", "c": "0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZ"}
+_BIC_LOCATION = ("23456789ABCDEFGHIJKLMNOPQRSTUVWXYZ", "0123456789ABCDEFGHIJKLMNPQRSTUVWXYZ")
+
+
+def iban_check_digits(country, bban):
+    """
+    Returns the two check digits that make an IBAN from a country code and a BBAN.
+    """
+    return "%02d" % (98 - int((bban + country + "00").translate(_LETTERS_TO_DIGITS)) % 97)
+
+
+class PaymentGenerator:
+    """
+    Generates realistic synthetic payments for load tests: valid IBANs of many
+    countries, names with non-ASCII characters, some addresses and BICs, a mix
+    of sequence types and spread-out dates. With the same seed and start date,
+    the same payments are generated.
+    """
+
+    def __init__(self, kind="debit", seed=None, countries=DEFAULT_COUNTRIES, start_date=None, days=30,
+                 address_ratio=0.2, bic_ratio=0.5):
+        """
+        @param kind: "debit" for payments for SepaDD, "transfer" for SepaTransfer
+        @param seed: The seed of the random number generator
+        @param countries: The countries of the generated IBANs, see sepaxml.iban.IBAN_FORMATS
+        @param start_date: The first collection or execution date, defaults to today
+        @param days: The dates are spread over this many days
+        @param address_ratio: The share of payments with an address
+        @param bic_ratio: The share of payments with a BIC
+        """
+        if kind not in ("debit", "transfer"):
+            raise ValueError("Unknown kind: {}".format(kind))
+        for country in countries:
+            if country not in IBAN_FORMATS:
+                raise ValueError("Unknown IBAN country: {}".format(country))
+        self.kind = kind
+        self.random = random.Random(seed)
+        self.countries = tuple(countries)
+        self.start_date = start_date or datetime.date.today()
+        self.days = days
+        self.address_ratio = address_ratio
+        self.bic_ratio = bic_ratio
+        # Runs of digits are drawn as one number, which is much faster than
+        # drawing every character.
+        self._formats = {}
+        for country in self.countries:
+            segments = []
+            for count, kind in _parse_format(IBAN_FORMATS[country]):
+                if kind == "n" and segments and segments[-1][0] is None:
+                    segments[-1] = (None, segments[-1][1] + count)
+                else:
+                    segments.append((None if kind == "n" else _ALPHABETS[kind], count))
+            self._formats[country] = segments
+        self._dates = [self.start_date + datetime.timedelta(days=i) for i in range(days)]
+        self._counter = 0
+
+    def iban(self, country=None):
+        """
+        Returns a random IBAN with valid check digits.
+        """
+        country = country or self.random.choice(self.countries)
+        rnd = self.random
+        bban = "".join(
+            "%0*d" % (count, rnd.randrange(10 ** count)) if alphabet is None
+            else "".join(rnd.choices(alphabet, k=count))
+            for alphabet, count in self._formats[country]
+        )
+        return country + iban_check_digits(country, bban) + bban
+
+    def bic(self, country):
+        """
+        Returns a random BIC of a bank in the given country.
+        """
+        rnd = self.random
+        # The location code must not start with 0 or 1 (test BICs) or end with O.
+        return "".join(rnd.choices(_ALPHABETS["a"], k=4)) + country + rnd.choice(_BIC_LOCATION[0]) + rnd.choice(_BIC_LOCATION[1])
+
+    def name(self):
+        rnd = self.random
+        if rnd.random() < 0.1:
+            return "{} {}".format(rnd.choice(LAST_NAMES), rnd.choice(COMPANY_SUFFIXES))
+        return "{} {}".format(rnd.choice(FIRST_NAMES), rnd.choice(LAST_NAMES))
+
+    def address(self, country):
+        rnd = self.random
+        return {
+            "street_name": rnd.choice(STREETS),
+            "building_number": str(rnd.randint(1, 250)),
+            "postcode": "%05d" % rnd.randint(1000, 99999),
+            "town": rnd.choice(TOWNS),
+            "country": country,
+        }
+
+    def payment(self):
+        """
+        Returns one payment dict for add_payment.
+        """
+        rnd = self.random
+        self._counter += 1
+        country = rnd.choice(self.countries)
+        payment = {
+            "name": self.name(),
+            "IBAN": self.iban(country),
+            # Most amounts are small, a few are large.
+            "amount": min(int(rnd.lognormvariate(8, 1.2)) + 1, 99999999),
+            "description": rnd.choice(DESCRIPTIONS).format("%d-%06d" % (self.start_date.year, self._counter)),
+        }
+        if rnd.random() < self.bic_ratio:
+            payment["BIC"] = self.bic(country)
+        if rnd.random() < self.address_ratio:
+            payment["address"] = self.address(country)
+        date = rnd.choice(self._dates)
+        if self.kind == "debit":
+            payment["type"] = rnd.choices(TYPES, TYPE_WEIGHTS)[0]
+            payment["collection_date"] = date
+            payment["mandate_id"] = "MNDT-%09d" % self._counter
+            payment["mandate_date"] = date - datetime.timedelta(days=rnd.randint(1, 3650))
+        else:
+            payment["execution_date"] = date
+        return payment
+
+    def payments(self, count=None):
+        """
+        Yields payment dicts for add_payment, without keeping them.
+
+        @param count: The number of payments, endless if None
+        """
+        if count is None:
+            while True:
+                yield self.payment()
+        for _ in range(count):
+            yield self.payment()
+
+    def columns(self, count):
+        """
+        Returns count payments as columnar data for add_payments: a dict
+        mapping the payment fields to lists. Missing BICs and addresses are None.
+        """
+        payments = [self.payment() for _ in range(count)]
+        keys = ["name", "IBAN", "BIC", "amount", "description", "address"]
+        if self.kind == "debit":
+            keys += ["type", "collection_date", "mandate_id", "mandate_date"]
+        else:
+            keys.append("execution_date")
+        return {key: [payment.get(key) for payment in payments] for key in keys}
+
+    def iter_columns(self, count, chunk_size=10000):
+        """
+        Yields columnar data as by columns() in chunks of at most chunk_size payments.
+        """
+        while count > 0:
+            size = min(count, chunk_size)
+            yield self.columns(size)
+            count -= size
+
+
+def make_config(kind="debit", batch=True, **kwargs):
+    """
+    Returns a valid config for SepaDD or SepaTransfer.
+
+    @param kwargs: Entries to add to or replace in the config
+    """
+    config = {
+        "name": "Test Creditor GmbH",
+        "IBAN": "DE89370400440532013000",
+        "BIC": "COBADEFFXXX",
+        "batch": batch,
+        "currency": "EUR",
+        "address": {
+            "street_name": "Hauptstraße",
+            "building_number": "1",
+            "postcode": "10115",
+            "town": "Berlin",
+            "country": "DE",
+        },
+    }
+    if kind == "debit":
+        config["creditor_id"] = "DE98ZZZ09999999999"
+    config.update(kwargs)
+    return config
@@ -20,9 +20,18 @@ CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
 """
 import datetime
 import xml.etree.ElementTree as ET
+from collections import namedtuple
 
-from .shared import SepaPaymentInitn
-from .utils import ADDRESS_MAPPING, int_to_decimal_str, make_id
+from .shared import (SepaPaymentInitn, check_column, date_column,
+                     optional_column, require_columns)
+from .utils import (ADDRESS_MAPPING, address_items, int_to_decimal_str,
+                    xml_address, xml_element, xml_escape_attrib)
+
+# Compact representation of a validated payment, see SepaPaymentInitn.lazy
+TransferRecord = namedtuple('TransferRecord', [
+    'name', 'IBAN', 'BIC', 'amount', 'currency', 'execution_date',
+    'description', 'endtoend_id', 'address',
+])
 
 
 class SepaTransfer(SepaPaymentInitn):
@@ -31,8 +40,9 @@ class SepaTransfer(SepaPaymentInitn):
     """
     root_el = "CstmrCdtTrfInitn"
 
-    def __init__(self, config, schema="pain.001.001.03", clean=True):
-        super().__init__(config, schema, clean)
+    def __init__(self, config, schema="pain.001.001.03", clean=True, lazy=False, renderer="etree", id_generator=None,
+                 check_iban=False, bic_directory=None, stats=None):
+        super().__init__(config, schema, clean, lazy, renderer, id_generator, check_iban, bic_directory, stats)
 
     def check_config(self, config):
         """
@@ -75,6 +85,8 @@ class SepaTransfer(SepaPaymentInitn):
                 validation += "EXECUTION_DATE_INVALID_OR_NOT_DATETIME_INSTANCE"
             payment['execution_date'] = payment['execution_date'].isoformat()
 
+        validation += self._check_accounts(payment)
+
         if validation == "":
             return True
         else:
@@ -90,34 +102,83 @@ class SepaTransfer(SepaPaymentInitn):
         self.check_payment(payment)
 
         if self.clean:
-            from text_unidecode import unidecode
+            payment['name'] = self._clean_text(payment['name'], 70)
+            payment['description'] = self._clean_text(payment['description'], 140)
+
+        record = TransferRecord(
+            name=payment['name'],
+            IBAN=payment['IBAN'],
+            BIC=payment.get('BIC'),
+            amount=payment['amount'],
+            currency=payment.get('currency', self._config['currency']),
+            execution_date=payment.get('execution_date'),
+            description=payment['description'],
+            endtoend_id=payment.get('endtoend_id', 'NOTPROVIDED'),
+            address=address_items(payment.get('address')),
+        )
+        if self.lazy:
+            self._payments.append(record)
+        else:
+            self._add_record(record)
 
-            payment['name'] = unidecode(payment['name'])[:70]
-            payment['description'] = unidecode(payment['description'])[:140]
+        self._nb_of_txs_total += 1
+        self._ctrl_sum_total += payment['amount']
 
+    def _records_from_columns(self, columns, count):
+        """
+        Bulk version of the validation and cleaning in add_payment, working
+        on whole columns of payment data.
+        @return: A list of TransferRecords
+        """
+        require_columns(columns, ["name", "IBAN", "amount", "description", "execution_date"])
+        check_column(columns['amount'], lambda a: isinstance(a, int), "AMOUNT_NOT_INTEGER")
+        ibans, bics = self._account_columns(columns, count)
+        execution_dates = date_column(columns['execution_date'], "EXECUTION_DATE_INVALID_OR_NOT_DATETIME_INSTANCE",
+                                      convert=lambda d: d.isoformat())
+
+        names = columns['name']
+        descriptions = columns['description']
+        if self.clean:
+            names = self._clean_column(names, 70)
+            descriptions = self._clean_column(descriptions, 140)
+
+        currency = self._config['currency']
+        currencies = [c or currency for c in optional_column(columns, 'currency', count)]
+        endtoend_ids = [e or 'NOTPROVIDED' for e in optional_column(columns, 'endtoend_id', count)]
+        return list(map(
+            TransferRecord, names, ibans, bics, columns['amount'],
+            currencies, execution_dates, descriptions, endtoend_ids, [address_items(a) for a in optional_column(columns, 'address', count)],
+        ))
+
+    def _add_record(self, payment):
+        """
+        Builds the XML nodes for a validated payment record and adds them
+        to the document or the batch list.
+        @param payment: The TransferRecord
+        """
         # Get the CstmrDrctDbtInitnNode
         if not self._config['batch']:
             # Start building the non batch payment
             PmtInf_nodes = self._create_PmtInf_node()
-            PmtInf_nodes['PmtInfIdNode'].text = make_id(self._config['name'])
+            PmtInf_nodes['PmtInfIdNode'].text = self._make_id()
             PmtInf_nodes['PmtMtdNode'].text = "TRF"
             PmtInf_nodes['BtchBookgNode'].text = "false"
             PmtInf_nodes['NbOfTxsNode'].text = "1"
             PmtInf_nodes['CtrlSumNode'].text = int_to_decimal_str(
-                payment['amount']
+                payment.amount
             )
             if not self._config.get('domestic', False):
                 PmtInf_nodes['Cd_SvcLvl_Node'].text = "SEPA"
-            if 'execution_date' in payment:
+            if payment.execution_date is not None:
                 if self.schema == "pain.001.001.03":
-                    PmtInf_nodes['ReqdExctnDtNode'].text = payment['execution_date']
+                    PmtInf_nodes['ReqdExctnDtNode'].text = payment.execution_date
                 else:
-                    PmtInf_nodes['ReqdExctnDt_Dt_Node'].text = payment['execution_date']
+                    PmtInf_nodes['ReqdExctnDt_Dt_Node'].text = payment.execution_date
             else:
                 del PmtInf_nodes['ReqdExctnDtNode']
 
             PmtInf_nodes['Nm_Dbtr_Node'].text = self._config['name']
-            if payment.get('address', {}):
+            if payment.address:
                 for d, n in ADDRESS_MAPPING:
                     if self._config['address'].get(d):
                         n = ET.Element(n)
@@ -134,31 +195,26 @@ class SepaTransfer(SepaPaymentInitn):
 
             PmtInf_nodes['ChrgBrNode'].text = "SLEV"
 
-        if 'BIC' in payment:
+        if payment.BIC is not None:
             bic = True
         else:
             bic = False
 
         TX_nodes = self._create_TX_node(bic)
-        TX_nodes['InstdAmtNode'].set("Ccy", payment.get('currency', self._config['currency']))
-        TX_nodes['InstdAmtNode'].text = int_to_decimal_str(payment['amount'])
-        TX_nodes['EndToEnd_PmtId_Node'].text = payment.get('endtoend_id', 'NOTPROVIDED')
+        TX_nodes['InstdAmtNode'].set("Ccy", payment.currency)
+        TX_nodes['InstdAmtNode'].text = int_to_decimal_str(payment.amount)
+        TX_nodes['EndToEnd_PmtId_Node'].text = payment.endtoend_id
         if bic:
-            TX_nodes['BIC_CdtrAgt_Node'].text = payment['BIC']
-        TX_nodes['Nm_Cdtr_Node'].text = payment['name']
-        if payment.get('address', {}):
-            for d, n in ADDRESS_MAPPING:
-                if payment['address'].get(d):
-                    n = ET.Element(n)
-                    n.text = payment['address'][d]
-                    TX_nodes['PstlAdr_Cdtr_Node'].append(n)
-            for line in payment['address'].get('lines', []):
-                n = ET.Element('AdrLine')
-                n.text = line
+            TX_nodes['BIC_CdtrAgt_Node'].text = payment.BIC
+        TX_nodes['Nm_Cdtr_Node'].text = payment.name
+        if payment.address:
+            for tag, text in payment.address:
+                n = ET.Element(tag)
+                n.text = text
                 TX_nodes['PstlAdr_Cdtr_Node'].append(n)
 
-        TX_nodes['IBAN_CdtrAcct_Node'].text = payment['IBAN']
-        TX_nodes['UstrdNode'].text = payment['description']
+        TX_nodes['IBAN_CdtrAcct_Node'].text = payment.IBAN
+        TX_nodes['UstrdNode'].text = payment.description
 
         if self._config['batch']:
             self._add_batch(TX_nodes, payment)
@@ -366,6 +422,12 @@ class SepaTransfer(SepaPaymentInitn):
         TX_nodes['CdtTrfTxInfNode'].append(TX_nodes['RmtInfNode'])
         self._add_to_batch_list(TX_nodes, payment)
 
+    def _batch_key(self, payment):
+        """
+        Returns the key of the batch a payment record belongs to.
+        """
+        return payment.execution_date
+
     def _add_to_batch_list(self, TX, payment):
         """
         Method to add a transaction to the batch list. The correct batch will
@@ -373,7 +435,7 @@ class SepaTransfer(SepaPaymentInitn):
         not existant. This will also add the payment amount to the respective
         batch total.
         """
-        batch_key = payment.get('execution_date', None)
+        batch_key = self._batch_key(payment)
         if batch_key in self._batches.keys():
             self._batches[batch_key].append(TX['CdtTrfTxInfNode'])
         else:
@@ -381,9 +443,9 @@ class SepaTransfer(SepaPaymentInitn):
             self._batches[batch_key].append(TX['CdtTrfTxInfNode'])
 
         if batch_key in self._batch_totals:
-            self._batch_totals[batch_key] += payment['amount']
+            self._batch_totals[batch_key] += payment.amount
         else:
-            self._batch_totals[batch_key] = payment['amount']
+            self._batch_totals[batch_key] = payment.amount
 
     def _finalize_batch(self):
         """
@@ -395,7 +457,7 @@ class SepaTransfer(SepaPaymentInitn):
         """
         for batch_meta, batch_nodes in self._batches.items():
             PmtInf_nodes = self._create_PmtInf_node()
-            PmtInf_nodes['PmtInfIdNode'].text = make_id(self._config['name'])
+            PmtInf_nodes['PmtInfIdNode'].text = self._make_id()
             PmtInf_nodes['PmtMtdNode'].text = "TRF"
             PmtInf_nodes['BtchBookgNode'].text = "true"
             if not self._config.get('domestic', False):
@@ -465,3 +527,83 @@ class SepaTransfer(SepaPaymentInitn):
 
             CstmrCdtTrfInitn_node = self._xml.find('CstmrCdtTrfInitn')
             CstmrCdtTrfInitn_node.append(PmtInf_nodes['PmtInfNode'])
+
+    def _compile_templates(self):
+        """
+        Method to precompile the XML fragments used by the template renderer.
+        Everything that only depends on the schema and the config is rendered
+        once per export.
+        """
+        ED = dict()
+        if self.schema != 'pain.001.001.03':
+            ED['bic_tag'] = "BICFI"
+        else:
+            ED['bic_tag'] = "BIC"
+        # Newer schemas wrap the execution date in a choice of date or date time.
+        ED['ReqdExctnDt_Dt'] = self.schema != 'pain.001.001.03'
+
+        if not self._config.get('domestic', False):
+            ED['PmtTpInf'] = "<PmtTpInf><SvcLvl><Cd>SEPA</Cd></SvcLvl></PmtTpInf>"
+        else:
+            ED['PmtTpInf'] = ""
+
+        if 'BIC' in self._config:
+            dbtr_agt = "<FinInstnId>" + xml_element(ED['bic_tag'], self._config['BIC']) + "</FinInstnId>"
+        else:
+            dbtr_agt = "<FinInstnId />"
+        dbtr_acct = (
+            "<DbtrAcct><Id>" + xml_element("IBAN", self._config['IBAN']) + "</Id></DbtrAcct>"
+            "<DbtrAgt>" + dbtr_agt + "</DbtrAgt><ChrgBr>SLEV</ChrgBr>"
+        )
+
+        # Non-batch payments do not carry the debtor address.
+        nm_dbtr = "<Dbtr>" + xml_element("Nm", self._config['name'])
+        ED['Dbtr'] = nm_dbtr + "</Dbtr>" + dbtr_acct
+        ED['Dbtr_batch'] = nm_dbtr + xml_address(address_items(self._config.get('address'))) + "</Dbtr>" + dbtr_acct
+
+        ED['TX'] = (
+            '<CdtTrfTxInf><PmtId>%s</PmtId><Amt><InstdAmt Ccy="%s">%s</InstdAmt></Amt>%s'
+            '<Cdtr>%s%s</Cdtr><CdtrAcct><Id>%s</Id></CdtrAcct><RmtInf>%s</RmtInf></CdtTrfTxInf>'
+        )
+        return ED
+
+    @staticmethod
+    def _render_PmtInf(templates, pmtinf_id, payment, nb_of_txs, ctrl_sum, batch):
+        """
+        Method to render the opening part of a PmtInf block up to the first
+        transaction. The batch information is taken from the payment record.
+        """
+        if not payment.execution_date:
+            reqd_exctn_dt = ""
+        elif not templates['ReqdExctnDt_Dt']:
+            reqd_exctn_dt = xml_element("ReqdExctnDt", payment.execution_date)
+        else:
+            reqd_exctn_dt = "<ReqdExctnDt>" + xml_element("Dt", payment.execution_date) + "</ReqdExctnDt>"
+        return (
+            "<PmtInf>" + xml_element("PmtInfId", pmtinf_id) +
+            "<PmtMtd>TRF</PmtMtd><BtchBookg>" + ("true" if batch else "false") + "</BtchBookg>" +
+            "<NbOfTxs>" + str(nb_of_txs) + "</NbOfTxs>" +
+            "<CtrlSum>" + int_to_decimal_str(ctrl_sum) + "</CtrlSum>" +
+            templates['PmtTpInf'] + reqd_exctn_dt +
+            (templates['Dbtr_batch'] if batch else templates['Dbtr'])
+        )
+
+    @staticmethod
+    def _render_TX(templates, payment):
+        """
+        Method to render the CdtTrfTxInf block of a payment record.
+        """
+        if payment.BIC is not None:
+            cdtr_agt = "<CdtrAgt><FinInstnId>" + xml_element(templates['bic_tag'], payment.BIC) + "</FinInstnId></CdtrAgt>"
+        else:
+            cdtr_agt = ""
+        return templates['TX'] % (
+            xml_element("EndToEndId", payment.endtoend_id),
+            xml_escape_attrib(payment.currency),
+            int_to_decimal_str(payment.amount),
+            cdtr_agt,
+            xml_element("Nm", payment.name),
+            xml_address(payment.address),
+            xml_element("IBAN", payment.IBAN),
+            xml_element("Ustrd", payment.description),
+        )
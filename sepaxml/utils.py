@@ -20,11 +20,14 @@ WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN
 CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
 """
 import datetime
+import functools
 import hashlib
 import random
 import re
 import time
 
+from .ids import default_generator
+
 try:
     random = random.SystemRandom()
     using_sysrandom = True
@@ -55,32 +58,56 @@ def get_rand_string(length=12, allowed_chars='0123456789abcdef'):
                     random.getstate(),
                     time.time())).encode('utf-8')
             ).digest())
+    if allowed_chars == '0123456789abcdef':
+        # Fast path, fetches the entropy in bulk
+        return default_generator.generate(length)
     return ''.join([random.choice(allowed_chars) for i in range(length)])
 
 
-def make_msg_id():
+def make_msg_id(generator=None):
     """
     Create a semi random message id, by using 12 char random hex string and
     a timestamp.
+    @param generator: The ID generator to use, see sepaxml.ids
     @return: string consisting of timestamp, -, random value
     """
-    random_string = get_rand_string(12)
+    random_string = (generator or default_generator).generate(12)
     timestamp = datetime.datetime.now().strftime("%Y%m%d%I%M%S")
     msg_id = timestamp + "-" + random_string
     return msg_id
 
 
-def make_id(name):
+@functools.lru_cache(maxsize=256)
+def make_id_prefix(name):
+    """
+    Sanitize a creditor name for use in ids.
+    @return string consisting of the alphanumeric characters of the name,
+    truncated at 22 chars.
+    """
+    return re.sub(r'[^a-zA-Z0-9]', '', name)[:22]
+
+
+def make_id(name, generator=None):
     """
     Create a random id combined with the creditor name.
+    @param generator: The ID generator to use, see sepaxml.ids
     @return string consisting of name (truncated at 22 chars), -,
     12 char rand hex string.
     """
-    name = re.sub(r'[^a-zA-Z0-9]', '', name)
-    r = get_rand_string(12)
-    if len(name) > 22:
-        name = name[:22]
-    return name + "-" + r
+    return make_id_prefix(name) + "-" + (generator or default_generator).generate(12)
+
+
+def _is_ascii(text):
+    try:
+        text.encode('ascii')
+    except UnicodeEncodeError:
+        return False
+    return True
+
+
+# Returns whether a string only contains ASCII characters. str.isascii only
+# exists on Python 3.7 and newer, but does not need to look at the characters.
+is_ascii = getattr(str, 'isascii', _is_ascii)
 
 
 def int_to_decimal_str(integer):
@@ -103,12 +130,15 @@ def decimal_str_to_int(decimal_string):
     Helper to decimal currency string into integers (cents).
     WARNING: DO NOT TRY TO DO THIS BY CONVERSION AND MULTIPLICATION,
     FLOATING POINT ERRORS ARE NO FUN IN FINANCIAL SYSTEMS.
-    @param string The amount in currency with full stop decimal separator
+    @param string The amount in currency with full stop decimal separator,
+    e.g. "1.5" for 150 cents
     @return integer The amount in cents
+    @raise ValueError: If the amount has more than two decimal places
     """
-    int_string = decimal_string.replace('.', '')
-    int_string = int_string.lstrip('0')
-    return int(int_string)
+    whole, _, fraction = decimal_string.strip().partition('.')
+    if len(fraction) > 2:
+        raise ValueError("Amount has more than two decimal places: {}".format(decimal_string))
+    return int(whole + fraction.ljust(2, '0'))
 
 
 ADDRESS_MAPPING = (
@@ -122,3 +152,66 @@ ADDRESS_MAPPING = (
     ("country_subdivision", "CtrySubDvsn"),
     ("country", "Ctry"),
 )
+
+
+def xml_escape(text):
+    """
+    Escapes character data the same way ElementTree does.
+    """
+    if "&" in text:
+        text = text.replace("&", "&amp;")
+    if "<" in text:
+        text = text.replace("<", "&lt;")
+    if ">" in text:
+        text = text.replace(">", "&gt;")
+    return text
+
+
+def xml_escape_attrib(text):
+    """
+    Escapes an attribute value the same way ElementTree does.
+    """
+    text = xml_escape(text)
+    if "\"" in text:
+        text = text.replace("\"", "&quot;")
+    if "\r" in text:
+        text = text.replace("\r", "&#13;")
+    if "\n" in text:
+        text = text.replace("\n", "&#10;")
+    if "\t" in text:
+        text = text.replace("\t", "&#09;")
+    return text
+
+
+def xml_element(tag, text):
+    """
+    Renders a simple element the same way ElementTree does, including the
+    short form for elements without text.
+    """
+    if not text:
+        return "<" + tag + " />"
+    return "<" + tag + ">" + xml_escape(text) + "</" + tag + ">"
+
+
+def address_items(address):
+    """
+    Returns the children of the PstlAdr element of an address dict as a tuple
+    of (tag, text) pairs, see ADDRESS_MAPPING. Payment records keep this
+    snapshot instead of the dict, so changing the dict after adding a payment
+    does not change the output. Returns None if the address contains no data.
+    """
+    if not address:
+        return None
+    items = tuple((n, address[d]) for d, n in ADDRESS_MAPPING if address.get(d))
+    items += tuple(('AdrLine', line) for line in address.get('lines', []))
+    return items or None
+
+
+def xml_address(items):
+    """
+    Renders a PstlAdr element from the result of address_items. Returns an
+    empty string if there is no address.
+    """
+    if not items:
+        return ""
+    return "<PstlAdr>" + "".join(xml_element(tag, text) for tag, text in items) + "</PstlAdr>"
@@ -19,20 +19,179 @@ WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN
 CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
 """
 import os
+import threading
+from collections import OrderedDict
+
+SCHEMA_DIR = os.path.join(os.path.dirname(__file__), 'schemas')
+
+_schema_cache = {}
+_schema_cache_lock = threading.Lock()
 
 
 class ValidationError(Exception):
     pass
 
 
-def try_valid_xml(xmlout, schema):
-    import xmlschema  # xmlschema does some weird monkeypatching in etree, if we import it globally, things fail
+def _error():
+    return ValidationError(
+        "The output SEPA file contains validation errors. This is likely due to an illegal value in one of "
+        "your input fields."
+    )
+
+
+class XMLSchemaBackend:
+    """
+    Validation backend based on the pure-Python ``xmlschema`` package.
+    """
+    name = 'xmlschema'
+
+    def is_available(self):
+        try:
+            import xmlschema  # noqa
+        except ImportError:
+            return False
+        return True
+
+    def compile(self, path):
+        import xmlschema  # xmlschema does some weird monkeypatching in etree, if we import it globally, things fail
+        return xmlschema.XMLSchema(path)
+
+    def validate(self, compiled, xmlout):
+        import xmlschema
+        try:
+            if isinstance(xmlout, bytes):
+                compiled.validate(xmlout.decode())
+            else:
+                compiled.validate(os.fspath(xmlout))
+        except xmlschema.XMLSchemaValidationError as e:
+            raise _error() from e
+
+
+class LxmlBackend:
+    """
+    Validation backend based on the ``XMLSchema`` implementation of ``lxml``
+    (libxml2). Much faster than ``xmlschema``, but requires ``lxml`` to be
+    installed.
+    """
+    name = 'lxml'
+
+    def is_available(self):
+        try:
+            from lxml import etree  # noqa
+        except ImportError:
+            return False
+        return True
+
+    def compile(self, path):
+        from lxml import etree
+        return etree.XMLSchema(etree.parse(path))
+
+    def validate(self, compiled, xmlout):
+        from lxml import etree
+        try:
+            if isinstance(xmlout, bytes):
+                compiled.assertValid(etree.fromstring(xmlout))
+            else:
+                compiled.assertValid(etree.parse(os.fspath(xmlout)))
+        except (etree.DocumentInvalid, etree.XMLSyntaxError) as e:
+            raise _error() from e
+
+
+# Registered validation backends, in order of preference.
+BACKENDS = OrderedDict()
+
+
+def register_backend(backend, first=False):
+    """
+    Registers a validation backend. A backend needs a ``name`` attribute as
+    well as ``is_available()``, ``compile(path)`` and ``validate(compiled, xmlout)``
+    methods. ``validate`` needs to raise a ``ValidationError`` for invalid input.
+    @param first: Prefer this backend over all previously registered ones.
+    """
+    BACKENDS[backend.name] = backend
+    if first:
+        BACKENDS.move_to_end(backend.name, last=False)
+
+
+register_backend(LxmlBackend())
+register_backend(XMLSchemaBackend())
+
+
+def get_backend(name=None):
+    """
+    Returns the validation backend with the given name, or the most preferred
+    backend that is installed if no name is given.
+    """
+    if name is not None:
+        try:
+            return BACKENDS[name]
+        except KeyError:
+            raise ValueError("Unknown validation backend: {}".format(name))
+    for backend in BACKENDS.values():
+        if backend.is_available():
+            return backend
+    raise ValueError("No validation backend is available, please install lxml or xmlschema.")
+
+
+def available_schemas(prefix='pain.'):
+    """
+    Returns the names of the schemas bundled with this package, e.g. ``pain.008.001.02``.
+    @param prefix: Only return schemas starting with this prefix. By default only the pain
+                   schemas for generated files are returned, use ``camt.`` for the bank
+                   statement schemas.
+    """
+    return sorted(f[:-4] for f in os.listdir(SCHEMA_DIR) if f.endswith('.xsd') and f.startswith(prefix))
+
+
+def get_schema(schema, backend=None):
+    """
+    Returns the compiled XML schema for the given schema name. Compiling a schema
+    is expensive, so every schema is only compiled once per process and backend
+    and then kept in a cache that is shared between threads.
+    @param schema: The schema name, e.g. ``pain.008.001.02``
+    @param backend: The name of the validation backend, defaults to the preferred one
+    """
+    backend = get_backend(backend)
+    key = (backend.name, schema)
     try:
-        my_schema = xmlschema.XMLSchema(os.path.join(os.path.dirname(__file__), 'schemas', schema + '.xsd'))
-        my_schema.validate(xmlout.decode())
-
-    except xmlschema.XMLSchemaValidationError as e:
-        raise ValidationError(
-            "The output SEPA file contains validation errors. This is likely due to an illegal value in one of "
-            "your input fields."
-        ) from e
+        return _schema_cache[key]
+    except KeyError:
+        pass
+
+    with _schema_cache_lock:
+        if key not in _schema_cache:
+            _schema_cache[key] = backend.compile(os.path.join(SCHEMA_DIR, schema + '.xsd'))
+        return _schema_cache[key]
+
+
+def warm_schema_cache(schemas=None, backend=None):
+    """
+    Compiles the given schemas (or all bundled schemas if none are given) ahead of
+    time, e.g. during application startup.
+    @param schemas: An iterable of schema names
+    @param backend: The name of the validation backend, defaults to the preferred one
+    """
+    if schemas is None:
+        schemas = available_schemas()
+    for schema in schemas:
+        get_schema(schema, backend)
+
+
+def clear_schema_cache():
+    """
+    Drops all compiled schemas from the cache.
+    """
+    with _schema_cache_lock:
+        _schema_cache.clear()
+
+
+def try_valid_xml(xmlout, schema, backend=None):
+    """
+    Validates the given XML document against a bundled schema.
+    @param xmlout: The document as bytes, or the path of a file containing it
+    @param schema: The schema name, e.g. ``pain.008.001.02``
+    @param backend: The name of the validation backend, defaults to the preferred one
+    @raise ValidationError: If the document is not valid
+    """
+    backend = get_backend(backend)
+    backend.validate(get_schema(schema, backend.name), xmlout)
@@ -38,6 +38,10 @@ setup(
         'xmlschema',
         'text-unidecode'
     ],
+    extras_require={
+        'lxml': ['lxml'],
+        'numpy': ['numpy'],
+    },
 
     include_package_data=True,
     packages=find_packages(include=['sepaxml', 'sepaxml.*', 'sepadd', 'sepadd.*']),
@@ -0,0 +1,200 @@
+import copy
+import datetime
+import re
+
+import pytest
+
+from sepaxml import SepaDD, SepaTransfer
+
+DEBIT_CONFIG = {
+    "name": "TestCreditor",
+    "IBAN": "NL50BANK1234567890",
+    "BIC": "BANKNL2A",
+    "batch": True,
+    "creditor_id": "DE26ZZZ00000000000",
+    "currency": "EUR"
+}
+
+TRANSFER_CONFIG = {
+    "name": "TestCreditor",
+    "IBAN": "NL50BANK1234567890",
+    "BIC": "BANKNL2A",
+    "batch": True,
+    "currency": "EUR"
+}
+
+
+def debit_payments():
+    return [
+        {
+            "name": "Tëst von Testenstein %d" % (i % 3),
+            "IBAN": "NL50BANK1234567890",
+            "BIC": "BANKNL2A",
+            "amount": 1000 + i,
+            "type": ("FRST", "RCUR")[i % 2],
+            "collection_date": datetime.date(2024, 1, 1 + i % 3),
+            "mandate_id": "M%d" % i,
+            "mandate_date": datetime.date(2023, 1, 1),
+            "description": "Tëst transaction %d" % i,
+            "endtoend_id": "E2E%d" % i,
+        }
+        for i in range(10)
+    ]
+
+
+def transfer_payments():
+    return [
+        {
+            "name": "Tëst von Testenstein %d" % (i % 3),
+            "IBAN": "NL50BANK1234567890",
+            "BIC": "BANKNL2A",
+            "amount": 1000 + i,
+            "execution_date": datetime.date(2024, 1, 1 + i % 3),
+            "description": "Tëst transaction %d" % i,
+            "endtoend_id": "E2E%d" % i,
+        }
+        for i in range(10)
+    ]
+
+
+def to_columns(rows):
+    return {key: [row[key] for row in rows] for key in rows[0]}
+
+
+class FakeFrame:
+    """
+    Quacks like a pandas DataFrame as far as add_payments is concerned.
+    """
+
+    class Series(list):
+        def tolist(self):
+            return list(self)
+
+    def __init__(self, columns):
+        self._data = columns
+        self.columns = list(columns)
+
+    def __getitem__(self, key):
+        return self.Series(self._data[key])
+
+
+class ZeroIdGenerator:
+    """
+    Makes the output independent of the order in which IDs are generated.
+    """
+
+    def generate(self, length=12):
+        return "0" * length
+
+
+def output(sepa):
+    return re.sub(b"<(CreDtTm|MsgId)>[^<]*</(CreDtTm|MsgId)>", b"", sepa.export())
+
+
+def single(cls, config, payments, **kwargs):
+    sepa = cls(copy.deepcopy(config), id_generator=ZeroIdGenerator(), **kwargs)
+    for payment in payments:
+        sepa.add_payment(payment)
+    return output(sepa)
+
+
+def bulk(cls, config, payments, **kwargs):
+    sepa = cls(copy.deepcopy(config), id_generator=ZeroIdGenerator(), **kwargs)
+    sepa.add_payments(payments)
+    assert sepa.nb_of_txs == 10
+    assert sepa.ctrl_sum == 10045
+    return output(sepa)
+
+
+@pytest.mark.parametrize("kwargs", [{}, {"lazy": True}, {"renderer": "template"}])
+@pytest.mark.parametrize("convert", [list, to_columns, lambda rows: FakeFrame(to_columns(rows))])
+@pytest.mark.parametrize("cls,config,payments", [
+    (SepaDD, DEBIT_CONFIG, debit_payments),
+    (SepaTransfer, TRANSFER_CONFIG, transfer_payments),
+])
+def test_bulk_identical(cls, config, payments, convert, kwargs):
+    expected = single(cls, config, payments(), **kwargs)
+    assert bulk(cls, config, convert(payments()), **kwargs) == expected
+
+
+def test_generated_endtoend_id():
+    sepa = SepaDD(copy.deepcopy(DEBIT_CONFIG), renderer="template", id_generator=ZeroIdGenerator())
+    payments = debit_payments()
+    for payment in payments:
+        del payment["endtoend_id"]
+    sepa.add_payments(payments)
+    assert all(p.endtoend_id == "TestCreditor-000000000000" for p in sepa._payments)
+
+
+def test_input_not_modified():
+    payments = debit_payments()
+    SepaDD(copy.deepcopy(DEBIT_CONFIG)).add_payments(payments)
+    assert payments == debit_payments()
+
+
+def test_invalid_payment_adds_nothing():
+    sepa = SepaDD(copy.deepcopy(DEBIT_CONFIG))
+    payments = debit_payments()
+    payments[7]["amount"] = 10.5
+    with pytest.raises(Exception, match="Payment 7 did not validate: AMOUNT_NOT_INTEGER"):
+        sepa.add_payments(payments)
+    assert sepa.nb_of_txs == 0
+    assert len(sepa._batches) == 0
+
+
+def test_invalid_date():
+    columns = to_columns(transfer_payments())
+    columns["execution_date"][3] = "2024-01-01"
+    with pytest.raises(Exception, match="Payment 3 did not validate: EXECUTION_DATE_INVALID"):
+        SepaTransfer(copy.deepcopy(TRANSFER_CONFIG)).add_payments(columns)
+
+
+def test_missing_column():
+    columns = to_columns(debit_payments())
+    del columns["mandate_id"]
+    with pytest.raises(Exception, match="MANDATE_ID_MISSING"):
+        SepaDD(copy.deepcopy(DEBIT_CONFIG)).add_payments(columns)
+
+
+def test_column_length_mismatch():
+    columns = to_columns(debit_payments())
+    columns["name"].pop()
+    with pytest.raises(ValueError):
+        SepaDD(copy.deepcopy(DEBIT_CONFIG)).add_payments(columns)
+
+
+def test_pandas():
+    pd = pytest.importorskip("pandas")
+    frame = pd.DataFrame(transfer_payments())
+    frame.loc[3, "BIC"] = None
+    sepa = SepaTransfer(copy.deepcopy(TRANSFER_CONFIG), renderer="template")
+    sepa.add_payments(frame)
+    assert sepa.nb_of_txs == 10
+    assert sepa._payments[3].BIC is None
+    sepa.export()
+
+
+def test_pandas_datetime64():
+    pd = pytest.importorskip("pandas")
+    frame = pd.DataFrame(debit_payments())
+    frame["collection_date"] = pd.to_datetime(frame["collection_date"])
+    frame["mandate_date"] = pd.to_datetime(frame["mandate_date"])
+    assert str(frame["collection_date"].dtype).startswith("datetime64")
+    sepa = SepaDD(copy.deepcopy(DEBIT_CONFIG), renderer="template")
+    sepa.add_payments(frame)
+    assert sepa._payments[0].collection_date == "2024-01-01"
+    assert sepa._payments[0].mandate_date == "2023-01-01"
+    sepa.export()
+
+    frame = pd.DataFrame(transfer_payments())
+    frame["execution_date"] = pd.to_datetime(frame["execution_date"])
+    sepa = SepaTransfer(copy.deepcopy(TRANSFER_CONFIG), renderer="template")
+    sepa.add_payments(frame)
+    assert sepa._payments[1].execution_date == "2024-01-02"
+    sepa.export()
+
+    frame = pd.DataFrame(debit_payments())
+    frame["collection_date"] = pd.to_datetime(frame["collection_date"])
+    frame.loc[2, "collection_date"] = pd.NaT
+    with pytest.raises(Exception, match="Payment 2 did not validate: COLLECTION_DATE_INVALID"):
+        SepaDD(copy.deepcopy(DEBIT_CONFIG)).add_payments(frame)
@@ -0,0 +1,31 @@
+import json
+import tracemalloc
+
+from sepaxml.bench import memory
+
+
+def test_measure():
+    tracemalloc.start()
+    try:
+        small = memory.measure("pain.008.001.02", 10, True, "etree", top=3)
+        large = memory.measure("pain.008.001.02", 200, True, "etree", top=3)
+    finally:
+        tracemalloc.stop()
+    assert 0 < small["retained"] < large["retained"]
+    assert large["per_payment"] == large["retained"] / 200
+    assert len(large["sites"]) == 3
+    assert all(site["bytes"] > 0 for site in large["sites"])
+    assert set(large["export_peak"]) == {"plain", "validate", "pretty_print", "pretty_print+validate"}
+    assert large["export_peak"]["pretty_print"] > large["export_peak"]["plain"] > 0
+
+
+def test_main(tmp_path, capsys):
+    output = str(tmp_path / "memory.json")
+    memory.main(["--sizes", "5", "--schemas", "pain.001.001.03", "--renderers", "etree,template", "--output", output])
+    assert "bytes/payment" in capsys.readouterr().out
+    with open(output) as f:
+        results = json.load(f)
+    assert [(r["batch"], r["renderer"]) for r in results] == [
+        (True, "etree"), (True, "template"), (False, "etree"), (False, "template"),
+    ]
+    assert not tracemalloc.is_tracing()
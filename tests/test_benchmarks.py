@@ -0,0 +1,29 @@
+import json
+
+from benchmarks import suite
+
+
+def test_suite_and_compare(tmp_path):
+    results = suite.run_suite([5], schemas=["pain.008.001.02", "pain.001.001.03"], renderers=("etree", "template"))
+    assert len(results["results"]) == 8
+    for result in results["results"]:
+        assert all(result[stage] >= 0 for stage in suite.STAGES)
+        assert result["bytes"] > 0
+    assert suite.compare(results, results) == []
+
+    slow = json.loads(json.dumps(results))
+    for result in slow["results"]:
+        result["serialize"] += 1
+    assert suite.compare(results, slow) == []
+    regressions = suite.compare(slow, results)
+    assert len(regressions) == 8
+    assert {stage for _, stage, _, _ in regressions} == {"serialize"}
+
+
+def test_main(tmp_path, capsys):
+    baseline = str(tmp_path / "baseline.json")
+    assert suite.main(["--sizes", "3", "--schemas", "pain.008.001.08", "--output", baseline]) == 0
+    with open(baseline) as f:
+        assert len(json.load(f)["results"]) == 2
+    assert suite.main(["--sizes", "3", "--schemas", "pain.008.001.08", "--compare", baseline, "--min-delta", "1"]) == 0
+    assert "No regressions" in capsys.readouterr().out
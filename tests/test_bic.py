@@ -0,0 +1,101 @@
+import datetime
+import io
+
+import pytest
+
+from sepaxml import SepaDD, SepaTransfer
+from sepaxml.bic import BicDirectory, bank_code_from_iban, is_valid_bic
+
+DIRECTORY = """# country,bank code,BIC
+country,bank_code,bic
+DE,37040044,COBADEFFXXX
+DE,37040037,COBADEFFXXX
+NL,ABNA,abnanl2a
+
+GB,WEST,WESTGB2L
+"""
+
+
+def directory():
+    d = BicDirectory()
+    d.load(io.StringIO(DIRECTORY))
+    return d
+
+
+def test_is_valid_bic():
+    for bic in ("COBADEFF", "COBADEFFXXX", "BANKNL2A", "WESTGB2L123"):
+        assert is_valid_bic(bic)
+    for bic in ("", "COBADEF", "COBADEFFX", "COBADEFFXXXX", "C0BADEFF", "cobadeff", "COBA DEFF"):
+        assert not is_valid_bic(bic)
+
+
+def test_bank_code_from_iban():
+    assert bank_code_from_iban("DE89370400440532013000") == ("DE", "37040044")
+    assert bank_code_from_iban("IT60X0542811101000000123456") == ("IT", "05428")
+    assert bank_code_from_iban("XX00") is None
+
+
+def test_directory(tmpdir):
+    d = directory()
+    assert len(d) == 4
+    assert ("DE", "37040037") in d
+    assert d.lookup("NL", "ABNA") == "ABNANL2A"
+    assert d.bic_for_iban("DE89370400440532013000") == "COBADEFFXXX"
+    assert d.bic_for_iban("GB82WEST12345698765432") == "WESTGB2L"
+    assert d.bic_for_iban("DE89999999990532013000") is None
+    assert d.bic_for_iban("XX89370400440532013000") is None
+    # Equal BICs are stored only once
+    assert d.lookup("DE", "37040044") is d.lookup("DE", "37040037")
+
+    path = tmpdir.join("bics.csv")
+    path.write("DE;37040044;COBADEFFXXX\n")
+    assert BicDirectory.from_file(str(path)).lookup("DE", "37040044") == "COBADEFFXXX"
+
+
+def test_directory_errors():
+    with pytest.raises(ValueError, match="Entry 2"):
+        BicDirectory().load(io.StringIO("DE,37040044,COBADEFFXXX\nDE,37040037,COBADEFF1\n"))
+    with pytest.raises(ValueError, match="malformed"):
+        BicDirectory().load(io.StringIO("DE,37040044\n"))
+
+
+def payment(account, bic=None):
+    payment = {
+        "name": "Test",
+        "IBAN": account,
+        "amount": 100,
+        "type": "RCUR",
+        "collection_date": datetime.date(2024, 1, 1),
+        "mandate_id": "1234",
+        "mandate_date": datetime.date(2023, 1, 1),
+        "description": "Test transaction",
+        "execution_date": datetime.date(2024, 1, 1),
+    }
+    if bic:
+        payment["BIC"] = bic
+    return payment
+
+
+@pytest.mark.parametrize("cls", [SepaDD, SepaTransfer])
+def test_fill_bics(cls):
+    config = {
+        "name": "Test von Testenstein",
+        "IBAN": "DE89370400440532013000",
+        "batch": True,
+        "creditor_id": "DE26ZZZ00000000000",
+        "currency": "EUR"
+    }
+    sepa = cls(config, lazy=True, bic_directory=directory())
+    assert sepa._config["BIC"] == "COBADEFFXXX"
+
+    sepa.add_payment(payment("GB82WEST12345698765432"))
+    sepa.add_payment(payment("GB82WEST12345698765432", "BANKNL2A"))
+    sepa.add_payment(payment("DE89999999990532013000"))
+    assert [p.BIC for p in sepa._payments] == ["WESTGB2L", "BANKNL2A", None]
+    with pytest.raises(Exception, match="BIC_INVALID"):
+        sepa.add_payment(payment("GB82WEST12345698765432", "BANK"))
+
+    sepa.add_payments([payment("nl91abna0417164300"), payment("DE89370400440532013000", "BANKNL2A")])
+    assert [p.BIC for p in sepa._payments[3:]] == ["ABNANL2A", "BANKNL2A"]
+    with pytest.raises(Exception, match="Payment 1 did not validate: BIC_INVALID"):
+        sepa.add_payments([payment("NL91ABNA0417164300"), payment("NL91ABNA0417164300", "ABNA")])
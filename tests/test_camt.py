@@ -0,0 +1,170 @@
+import datetime
+import io
+
+import pytest
+
+from sepaxml.camt import EntryReader, read_entries
+from sepaxml.validation import try_valid_xml
+
+CAMT053 = b"""<?xml version="1.0" encoding="UTF-8"?>
+<Document xmlns="urn:iso:std:iso:20022:tech:xsd:camt.053.001.02">
+  <BkToCstmrStmt>
+    <GrpHdr><MsgId>STMT-1</MsgId><CreDtTm>2024-01-03T10:00:00</CreDtTm></GrpHdr>
+    <Stmt>
+      <Id>STMT-1-1</Id>
+      <CreDtTm>2024-01-03T10:00:00</CreDtTm>
+      <Acct><Id><IBAN>NL50BANK1234567890</IBAN></Id></Acct>
+      <Ntry>
+        <NtryRef>1</NtryRef>
+        <Amt Ccy="EUR">30.12</Amt>
+        <CdtDbtInd>CRDT</CdtDbtInd>
+        <Sts>BOOK</Sts>
+        <BookgDt><Dt>2024-01-02</Dt></BookgDt>
+        <ValDt><Dt>2024-01-03</Dt></ValDt>
+        <AcctSvcrRef>REF-1</AcctSvcrRef>
+        <NtryDtls>
+          <Btch><NbOfTxs>2</NbOfTxs></Btch>
+          <TxDtls>
+            <Refs><MsgId>MSG</MsgId><PmtInfId>Creditor-1</PmtInfId><EndToEndId>E2E-1</EndToEndId><MndtId>M1</MndtId></Refs>
+            <AmtDtls><TxAmt><Amt Ccy="EUR">10.12</Amt></TxAmt></AmtDtls>
+          </TxDtls>
+          <TxDtls>
+            <Refs><EndToEndId>E2E-2</EndToEndId></Refs>
+            <AmtDtls><TxAmt><Amt Ccy="EUR">20</Amt></TxAmt></AmtDtls>
+          </TxDtls>
+        </NtryDtls>
+      </Ntry>
+      <Ntry>
+        <Amt Ccy="EUR">5.00</Amt>
+        <CdtDbtInd>DBIT</CdtDbtInd>
+        <RvslInd>true</RvslInd>
+        <Sts>BOOK</Sts>
+        <BookgDt><DtTm>2024-01-04T08:00:00</DtTm></BookgDt>
+        <NtryDtls>
+          <TxDtls>
+            <Refs><EndToEndId>E2E-3</EndToEndId></Refs>
+            <RtrInf><Rsn><Cd>AC04</Cd></Rsn><AddtlInf>Account closed</AddtlInf></RtrInf>
+          </TxDtls>
+        </NtryDtls>
+      </Ntry>
+    </Stmt>
+    <Stmt>
+      <Id>STMT-1-2</Id>
+      <Acct><Id><IBAN>DE02120300000000202051</IBAN></Id></Acct>
+      <Ntry>
+        <Amt Ccy="EUR">1.00</Amt>
+        <CdtDbtInd>CRDT</CdtDbtInd>
+        <Sts>PDNG</Sts>
+      </Ntry>
+    </Stmt>
+  </BkToCstmrStmt>
+</Document>
+"""
+
+CAMT054 = b"""<?xml version="1.0" encoding="UTF-8"?>
+<Document xmlns="urn:iso:std:iso:20022:tech:xsd:camt.054.001.08">
+  <BkToCstmrDbtCdtNtfctn>
+    <GrpHdr><MsgId>NTF-1</MsgId><CreDtTm>2024-01-03T10:00:00</CreDtTm></GrpHdr>
+    <Ntfctn>
+      <Id>NTF-1-1</Id>
+      <Acct><Id><IBAN>NL50BANK1234567890</IBAN></Id></Acct>
+      <Ntry>
+        <Amt Ccy="EUR">10.12</Amt>
+        <CdtDbtInd>DBIT</CdtDbtInd>
+        <Sts><Cd>BOOK</Cd></Sts>
+        <BookgDt><Dt>2024-01-02</Dt></BookgDt>
+        <NtryDtls>
+          <TxDtls>
+            <Refs><EndToEndId>E2E-1</EndToEndId></Refs>
+            <Amt Ccy="EUR">10.12</Amt>
+            <RtrInf><Rsn><Prtry>X99</Prtry></Rsn></RtrInf>
+          </TxDtls>
+        </NtryDtls>
+      </Ntry>
+    </Ntfctn>
+  </BkToCstmrDbtCdtNtfctn>
+</Document>
+"""
+
+CAMT053_V06 = b"""<?xml version="1.0" encoding="UTF-8"?>
+<Document xmlns="urn:iso:std:iso:20022:tech:xsd:camt.053.001.06">
+  <BkToCstmrStmt>
+    <GrpHdr><MsgId>STMT-2</MsgId><CreDtTm>2024-01-03T10:00:00</CreDtTm></GrpHdr>
+    <Stmt>
+      <Id>STMT-2-1</Id>
+      <CreDtTm>2024-01-03T10:00:00</CreDtTm>
+      <Acct><Id><IBAN>NL50BANK1234567890</IBAN></Id></Acct>
+      <Bal>
+        <Tp><CdOrPrtry><Cd>CLBD</Cd></CdOrPrtry></Tp>
+        <Amt Ccy="EUR">10.12</Amt>
+        <CdtDbtInd>CRDT</CdtDbtInd>
+        <Dt><Dt>2024-01-02</Dt></Dt>
+      </Bal>
+      <Ntry>
+        <Amt Ccy="EUR">10.12</Amt>
+        <CdtDbtInd>CRDT</CdtDbtInd>
+        <Sts>BOOK</Sts>
+        <BookgDt><Dt>2024-01-02</Dt></BookgDt>
+        <BkTxCd><Domn><Cd>PMNT</Cd><Fmly><Cd>IDDT</Cd><SubFmlyCd>ESDD</SubFmlyCd></Fmly></Domn></BkTxCd>
+        <NtryDtls>
+          <TxDtls>
+            <Refs><EndToEndId>E2E-1</EndToEndId></Refs>
+            <Amt Ccy="EUR">10.12</Amt>
+            <CdtDbtInd>CRDT</CdtDbtInd>
+            <RtrInf><Rsn><Cd>MD06</Cd></Rsn></RtrInf>
+          </TxDtls>
+        </NtryDtls>
+      </Ntry>
+    </Stmt>
+  </BkToCstmrStmt>
+</Document>
+"""
+
+
+def test_camt053():
+    reader = EntryReader(io.BytesIO(CAMT053))
+    entries = list(reader)
+    assert reader.schema == "camt.053.001.02"
+    assert [e["endtoend_id"] for e in entries] == ["E2E-1", "E2E-2", "E2E-3", None]
+    assert [e["amount"] for e in entries] == [1012, 2000, 500, 100]
+    assert entries[0]["msg_id"] == "MSG"
+    assert entries[0]["pmtinf_id"] == "Creditor-1"
+    assert entries[0]["mandate_id"] == "M1"
+    assert entries[0]["entry_ref"] == "1"
+    assert entries[0]["account_servicer_ref"] == "REF-1"
+    assert entries[0]["booking_date"] == datetime.date(2024, 1, 2)
+    assert entries[0]["value_date"] == datetime.date(2024, 1, 3)
+    assert entries[0]["credit_debit"] == "CRDT"
+    assert entries[0]["status"] == "BOOK"
+    assert entries[0]["return_reason"] is None
+    assert entries[2]["booking_date"] == datetime.date(2024, 1, 4)
+    assert entries[2]["reversal"]
+    assert entries[2]["return_reason"] == "AC04"
+    assert entries[2]["return_info"] == "Account closed"
+    assert entries[3]["statement_id"] == "STMT-1-2"
+    assert entries[3]["account_IBAN"] == "DE02120300000000202051"
+    assert entries[3]["status"] == "PDNG"
+    assert entries[3]["booking_date"] is None
+
+
+def test_camt054():
+    entries = list(read_entries(io.BytesIO(CAMT054)))
+    assert len(entries) == 1
+    assert entries[0]["statement_id"] == "NTF-1-1"
+    assert entries[0]["status"] == "BOOK"
+    assert entries[0]["amount"] == 1012
+    assert entries[0]["currency"] == "EUR"
+    assert entries[0]["return_reason"] == "X99"
+
+
+@pytest.mark.parametrize("backend", ["lxml", "xmlschema"])
+def test_camt053_bundled_schema(backend):
+    try_valid_xml(CAMT053_V06, "camt.053.001.06", backend=backend)
+    reader = EntryReader(io.BytesIO(CAMT053_V06))
+    entries = list(reader)
+    assert reader.schema == "camt.053.001.06"
+    assert len(entries) == 1
+    assert entries[0]["endtoend_id"] == "E2E-1"
+    assert entries[0]["amount"] == 1012
+    assert entries[0]["booking_date"] == datetime.date(2024, 1, 2)
+    assert entries[0]["return_reason"] == "MD06"
@@ -0,0 +1,39 @@
+from sepaxml.cleaning import TextCleaner
+from sepaxml.utils import _is_ascii
+
+
+def test_ascii_fast_path():
+    cleaner = TextCleaner()
+    assert cleaner.clean("Miller & Son Ltd", 6) == "Miller"
+    assert cleaner.stats()['ascii'] == 1
+    assert cleaner.stats()['cache_size'] == 0
+
+
+def test_transliteration_is_cached():
+    cleaner = TextCleaner()
+    assert cleaner.clean("Testgrüße", 140) == "Testgrusse"
+    assert cleaner.clean("Testgrüße", 5) == "Testg"
+    stats = cleaner.stats()
+    assert stats['misses'] == 1
+    assert stats['hits'] == 1
+    assert stats['transliterated_chars'] == 9
+    assert stats['hit_rate'] == 0.5
+
+
+def test_cache_is_bounded():
+    cleaner = TextCleaner(maxsize=2)
+    for text in ("ä", "ö", "ü", "ä"):
+        cleaner.clean(text, 70)
+    assert cleaner.stats()['cache_size'] == 2
+    assert cleaner.misses == 4
+    cleaner.clear()
+    assert cleaner.stats()['cache_size'] == 0
+    assert cleaner.hit_rate == 0.0
+
+
+def test_is_ascii_fallback():
+    # Used on Python 3.6, where str.isascii does not exist
+    assert _is_ascii("Test von Testenstein <&>")
+    assert _is_ascii("")
+    assert not _is_ascii("Tëst")
+    assert not _is_ascii("€")
@@ -0,0 +1,61 @@
+import pytest
+
+from sepaxml import SepaDD
+from sepaxml.creditor import creditor_id_check_digits, is_valid_creditor_id
+
+VALID = [
+    "DE98ZZZ09999999999",
+    "AT61ZZZ01234567890",
+    "BE69ZZZ050D000000008",
+    "ES59ZZZX1234567L",
+    "FR72ZZZ123456",
+    "IT66ZZZA1B2C3D4E5F6G7H8",
+    "DE98ABC09999999999",  # the business code is not part of the check
+]
+
+INVALID = [
+    "",
+    "DE",
+    "DE97ZZZ09999999999",  # check digits
+    "DE98ZZZ0999999999",  # national length
+    "de98zzz09999999999",
+    "DE98ZZ-09999999999",
+    "DE26ZZZ00000000000",
+    "XX00ZZZ" + "1" * 29,
+]
+
+
+def test_is_valid_creditor_id():
+    assert all(is_valid_creditor_id(c) for c in VALID)
+    assert not any(is_valid_creditor_id(c) for c in INVALID)
+
+
+def test_check_digits():
+    assert creditor_id_check_digits("DE", "09999999999") == "98"
+    national = "123456780000"
+    assert is_valid_creditor_id("NL" + creditor_id_check_digits("NL", national) + "ZZZ" + national)
+
+
+def config(**kwargs):
+    config = {
+        "name": "Test von Testenstein",
+        "IBAN": "NL50BANK1234567890",
+        "BIC": "BANKNL2A",
+        "batch": True,
+        "creditor_id": "DE98ZZZ09999999999",
+        "currency": "EUR",
+    }
+    config.update(kwargs)
+    return config
+
+
+def test_check_config():
+    SepaDD(config(), check_creditor_id=True)
+    SepaDD(config(ultimate_creditor={"id": "12345678900001", "id_scheme_name": "SIRET"}), check_creditor_id=True)
+    SepaDD(config(ultimate_creditor={"id": "FR72ZZZ123456", "id_scheme_name": "SEPA"}), check_creditor_id=True)
+    with pytest.raises(Exception, match="CREDITOR_ID_INVALID"):
+        SepaDD(config(creditor_id="DE97ZZZ09999999999"), check_creditor_id=True)
+    with pytest.raises(Exception, match="ULTIMATE_CREDITOR_ID_INVALID"):
+        SepaDD(config(ultimate_creditor={"id": "FR73ZZZ123456", "id_scheme_name": "SEPA"}), check_creditor_id=True)
+    # Not checked by default
+    SepaDD(config(creditor_id="DE97ZZZ09999999999"))
@@ -0,0 +1,144 @@
+import asyncio
+import datetime
+import io
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import pytest
+
+from sepaxml import SepaDD, SepaTransfer
+from sepaxml.validation import ValidationError
+from tests.utils import clean_ids
+
+
+def sdd():
+    return SepaDD({
+        "name": "Müller & Sohn Ltd",
+        "IBAN": "NL50BANK1234567890",
+        "BIC": "BANKNL2A",
+        "batch": True,
+        "creditor_id": "DE26ZZZ00000000000",
+        "currency": "EUR"
+    }, schema="pain.008.001.02")
+
+
+def sct():
+    return SepaTransfer({
+        "name": "Müller & Sohn Ltd",
+        "IBAN": "NL50BANK1234567890",
+        "BIC": "BANKNL2A",
+        "batch": False,
+        "currency": "EUR"
+    }, schema="pain.001.001.03")
+
+
+def add_debits(sepa):
+    for i in range(50):
+        sepa.add_payment({
+            "name": "Debtor <%d>" % i,
+            "IBAN": "NL50BANK1234567890",
+            "BIC": "BANKNL2A",
+            "amount": 1000 + i,
+            "type": ("FRST", "RCUR")[i % 2],
+            "collection_date": datetime.date.today(),
+            "mandate_id": "1234",
+            "mandate_date": datetime.date.today(),
+            "description": "Tëst transaction %d" % i
+        })
+    return sepa
+
+
+def add_transfers(sepa):
+    for i in range(50):
+        sepa.add_payment({
+            "name": "Creditor <%d>" % i,
+            "IBAN": "NL50BANK1234567890",
+            "BIC": "BANKNL2A",
+            "amount": 1000 + i,
+            "execution_date": datetime.date.today(),
+            "description": "Tëst transaction %d" % i
+        })
+    return sepa
+
+
+@pytest.mark.parametrize("factory,fill", [(sdd, add_debits), (sct, add_transfers)])
+def test_export_to_identical(factory, fill):
+    expected = fill(factory()).export()
+    f = io.BytesIO()
+    written = fill(factory()).export_to(f)
+    assert written == len(f.getvalue())
+    assert clean_ids(f.getvalue()) == clean_ids(expected)
+    assert f.getvalue().startswith(b'<?xml version="1.0" encoding="UTF-8"?><Document')
+
+
+def test_export_to_pretty_print():
+    expected = add_debits(sdd()).export(pretty_print=True)
+    f = io.BytesIO()
+    written = add_debits(sdd()).export_to(f, pretty_print=True)
+    assert written == len(f.getvalue())
+    assert clean_ids(f.getvalue()) == clean_ids(expected)
+
+
+def test_write(tmp_path):
+    path = str(tmp_path / "out.xml")
+    written = add_debits(sdd()).write(path)
+    assert written == os.path.getsize(path)
+    with open(path, "rb") as f:
+        assert clean_ids(f.read()) == clean_ids(add_debits(sdd()).export())
+
+
+def test_write_invalid(tmp_path):
+    path = str(tmp_path / "out.xml")
+    sepa = sdd()
+    sepa.add_payment({
+        "name": "Test von Testenstein",
+        "IBAN": "NL50BANK1234567890",
+        "BIC": "BANKNL2A",
+        "amount": 1012,
+        "type": "WRONG",
+        "collection_date": datetime.date.today(),
+        "mandate_id": "1234",
+        "mandate_date": datetime.date.today(),
+        "description": "Test transaction1"
+    })
+    with pytest.raises(ValidationError):
+        sepa.write(path)
+    assert not os.path.exists(path)
+
+
+def run_coroutine(coroutine):
+    # asyncio.run needs Python 3.7
+    loop = asyncio.new_event_loop()
+    try:
+        return loop.run_until_complete(coroutine)
+    finally:
+        loop.close()
+
+
+def test_export_async():
+    async def run():
+        docs = [sdd(), sdd()]
+        for doc in docs:
+            add_debits(doc)
+        return await asyncio.gather(*[doc.export_async() for doc in docs])
+
+    expected = sdd()
+    add_debits(expected)
+    outs = run_coroutine(run())
+    assert clean_ids(outs[0]) == clean_ids(outs[1]) == clean_ids(expected.export())
+
+
+def test_validate_async():
+    sepa = sdd()
+    add_debits(sepa)
+    out = sepa.export()
+
+    async def run(xmlout):
+        with ProcessPoolExecutor(max_workers=1) as executor:
+            await sepa.validate_async(xmlout, executor)
+
+    run_coroutine(run(out))
+    with pytest.raises(ValidationError):
+        run_coroutine(run(out.replace(b"<PmtMtd>DD</PmtMtd>", b"")))
+    with pytest.raises(ValidationError):
+        sepa.validate(out.replace(b"<PmtMtd>DD</PmtMtd>", b""))
@@ -0,0 +1,120 @@
+import datetime
+from unittest import mock
+
+import pytest
+
+from sepaxml import SepaDD, SepaTransfer, iban
+
+VALID = [
+    "DE89370400440532013000",
+    "GB82WEST12345698765432",
+    "FR1420041010050500013M02606",
+    "NL91ABNA0417164300",
+    "BE68539007547034",
+    "CH9300762011623852957",
+    "AT611904300234573201",
+    "MU17BOMM0101101030300200000MUR",
+    "LC55HEMM000100010012001200023015",
+    # Added to the registry in later releases
+    "BI4210000100010000332045181",
+    "DJ2100010000000154000100186",
+    "FK88SC123456789012",
+    "HN88CABF00000000000250005469",
+    "LY83002048000020100120361",
+    "MN121234123456789123",
+    "NI45BAPR00000013000003558124",
+    "OM810180000001299123456",
+    "RU0204452560040702810412345678901",
+    "SD2129010501234001",
+    "SO211000001001000100141",
+    "YE15CBYE0001018861234567891234",
+]
+
+INVALID = [
+    "",
+    "DE",
+    "DE89370400440532013001",  # check digits
+    "DE8937040044053201300",  # too short
+    "DE893704004405320130000",  # too long
+    "DE00370400440532013000",
+    "XX89370400440532013000",  # unknown country
+    "NL91ABNA04171643O0",  # letter in numeric part
+    "NL9112340417164300",  # digits in alphabetic part
+    "de89370400440532013000",  # not normalized
+    "DE89 3704 0044 0532 0130 00",
+    "DÄ89370400440532013000",
+    "NL50BANK1234567890",
+]
+
+
+def test_lengths():
+    assert iban.IBAN_LENGTHS["DE"] == 22
+    assert iban.IBAN_LENGTHS["NL"] == 18
+    assert iban.IBAN_LENGTHS["NO"] == 15
+    assert iban.IBAN_LENGTHS["LC"] == 32
+    assert iban.IBAN_LENGTHS["FR"] == 27
+    assert iban.IBAN_LENGTHS["RU"] == 33
+    assert iban.IBAN_LENGTHS["SD"] == 18
+
+
+def test_normalize():
+    assert iban.normalize_iban(" de89 3704 0044\t0532 0130 00 ") == "DE89370400440532013000"
+    assert iban.normalize_ibans(VALID) == VALID
+    assert iban.normalize_ibans(["nl91 abna 0417 1643 00", "DE89370400440532013000"]) == [
+        "NL91ABNA0417164300", "DE89370400440532013000"
+    ]
+
+
+def test_is_valid_iban():
+    assert all(iban.is_valid_iban(i) for i in VALID)
+    assert not any(iban.is_valid_iban(i) for i in INVALID)
+
+
+@pytest.mark.parametrize("numpy", [iban.numpy, None])
+def test_check_ibans(numpy):
+    with mock.patch("sepaxml.iban.numpy", numpy):
+        assert iban.check_ibans(VALID + INVALID) == [True] * len(VALID) + [False] * len(INVALID)
+        assert iban.check_ibans([]) == []
+        assert iban.check_ibans(["DE89370400440532013000" * 2]) == [False]
+
+
+def payment(i, account):
+    return {
+        "name": "Test {}".format(i),
+        "IBAN": account,
+        "BIC": "BANKNL2A",
+        "amount": 100,
+        "type": "RCUR",
+        "collection_date": datetime.date(2024, 1, 1),
+        "mandate_id": "1234",
+        "mandate_date": datetime.date(2023, 1, 1),
+        "description": "Test transaction",
+        "execution_date": datetime.date(2024, 1, 1),
+    }
+
+
+@pytest.mark.parametrize("cls", [SepaDD, SepaTransfer])
+def test_check_iban_in_documents(cls):
+    config = {
+        "name": "Test von Testenstein",
+        "IBAN": "NL50BANK1234567890",
+        "BIC": "BANKNL2A",
+        "batch": True,
+        "creditor_id": "DE26ZZZ00000000000",
+        "currency": "EUR"
+    }
+    sepa = cls(dict(config), check_iban=True, lazy=True)
+    sepa.add_payment(payment(0, "de89 3704 0044 0532 0130 00"))
+    assert sepa._payments[0].IBAN == "DE89370400440532013000"
+    with pytest.raises(Exception, match="IBAN_INVALID"):
+        sepa.add_payment(payment(1, "DE89370400440532013001"))
+
+    sepa.add_payments([payment(2, "gb82 west 1234 5698 7654 32")])
+    assert sepa._payments[-1].IBAN == "GB82WEST12345698765432"
+    with pytest.raises(Exception, match="Payment 1 did not validate: IBAN_INVALID"):
+        sepa.add_payments([payment(3, VALID[0]), payment(4, INVALID[2])])
+    assert sepa.nb_of_txs == 2
+
+    # Not checked by default
+    sepa = cls(dict(config))
+    sepa.add_payment(payment(0, "NL50BANK1234567890"))
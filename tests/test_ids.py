@@ -0,0 +1,106 @@
+import datetime
+import re
+import time
+from unittest import mock
+
+from sepaxml import SepaDD
+from sepaxml.ids import (CROCKFORD_BASE32, EPOCH_MS, RandomIdGenerator,
+                         SeededIdGenerator, SequentialIdGenerator,
+                         TimeOrderedIdGenerator)
+from sepaxml.utils import get_rand_string, make_id, make_id_prefix, make_msg_id
+
+
+def test_random_ids():
+    generator = RandomIdGenerator(pool_size=16)
+    ids = [generator.generate(12) for i in range(100)]
+    assert all(re.match("^[0-9a-f]{12}$", i) for i in ids)
+    assert len(set(ids)) == 100
+
+
+def test_random_ids_not_shared_after_fork():
+    generator = RandomIdGenerator()
+    generator.generate(12)
+    pool = generator._pool
+    generator._pid = -1  # pretend we are in a forked child
+    generator.generate(12)
+    assert generator._pool != pool
+
+
+def test_seeded_ids():
+    ids = [SeededIdGenerator(42).generate(12) for i in range(2)]
+    assert ids[0] == ids[1]
+    assert re.match("^[0-9a-f]{12}$", ids[0])
+    assert SeededIdGenerator(43).generate(12) != ids[0]
+
+
+def test_sequential_ids():
+    generator = SequentialIdGenerator(start=9)
+    assert [generator.generate(12) for i in range(3)] == ["000000000009", "00000000000a", "00000000000b"]
+
+
+def test_time_ordered_ids():
+    generator = TimeOrderedIdGenerator()
+    ids = [generator.generate(12) for i in range(1000)]
+    assert all(re.match("^[0-9A-Z]{12}$", i) for i in ids)
+    assert ids == sorted(ids)
+    assert len(set(ids)) == 1000
+
+
+def test_utils():
+    assert re.match("^[0-9a-f]{12}$", get_rand_string(12))
+    assert re.match("^[01]{8}$", get_rand_string(8, "01"))
+    assert re.match(r"^\d{14}-[0-9a-f]{12}$", make_msg_id())
+    assert make_id("Müller & Söhne GmbH und Compagnie KG", SequentialIdGenerator()) == "MllerShneGmbHundCompag-000000000000"
+    assert make_id_prefix("Foo Bar") is make_id_prefix("Foo Bar")
+
+
+def test_document_uses_generator():
+    sdd = SepaDD({
+        "name": "Test Creditor",
+        "IBAN": "NL50BANK1234567890",
+        "BIC": "BANKNL2A",
+        "batch": False,
+        "creditor_id": "DE26ZZZ00000000000",
+        "currency": "EUR"
+    }, id_generator=SequentialIdGenerator())
+    assert sdd.msg_id.endswith("-000000000000")
+    sdd.add_payment({
+        "name": "Test von Testenstein",
+        "IBAN": "NL50BANK1234567890",
+        "BIC": "BANKNL2A",
+        "amount": 1012,
+        "type": "FRST",
+        "collection_date": datetime.date.today(),
+        "mandate_id": "1234",
+        "mandate_date": datetime.date.today(),
+        "description": "Test transaction1"
+    })
+    xmlout = sdd.export()
+    assert b"<EndToEndId>TestCreditor-000000000001</EndToEndId>" in xmlout
+    assert b"<PmtInfId>TestCreditor-000000000002</PmtInfId>" in xmlout
+
+
+def test_time_ordered_ids_clock_set_back():
+    generator = TimeOrderedIdGenerator()
+    first = generator.generate(12)
+    with mock.patch("sepaxml.ids.time.time", return_value=time.time() - 3600):
+        second = generator.generate(12)
+    assert second > first
+
+
+def test_time_ordered_ids_wrap():
+    generator = TimeOrderedIdGenerator(random_chars=1)
+    # With a length of 4, the time part has 15 bits and wraps after 32768 ms.
+    with mock.patch("sepaxml.ids.time.time", return_value=(EPOCH_MS + (1 << 15) - 0.5) / 1000):
+        ids = [generator.generate(4)]
+    with mock.patch("sepaxml.ids.time.time", return_value=(EPOCH_MS + (1 << 15) + 0.5) / 1000):
+        ids += [generator.generate(4) for i in range(40)]
+    with mock.patch("sepaxml.ids.time.time", return_value=(EPOCH_MS + (1 << 15) + 100.5) / 1000):
+        ids.append(generator.generate(4))
+    assert all(re.match("^[0-9A-Z]{4}$", i) for i in ids)
+    assert len(set(ids)) == 42
+    # Once the IDs before the wrap are used up, the time part starts again from the current time
+    value = 0
+    for char in ids[-1]:
+        value = value * 32 + CROCKFORD_BASE32.index(char)
+    assert value >> 5 == 100
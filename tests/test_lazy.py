@@ -0,0 +1,124 @@
+import datetime
+
+import pytest
+
+from sepaxml import SepaDD, SepaTransfer
+from tests.utils import clean_ids
+
+ADDRESS = {
+    "street_name": "Musterstr.",
+    "building_number": "1",
+    "postcode": "12345",
+    "town": "Berlin",
+    "country": "DE",
+    "lines": ["Line 1", "Line 2"],
+}
+
+
+def debit_payments():
+    for i in range(20):
+        payment = {
+            "name": "Tëst von Testenstein %d" % i,
+            "IBAN": "NL50BANK1234567890",
+            "amount": 1000 + i,
+            "type": ("FRST", "RCUR", "OOFF")[i % 3],
+            "collection_date": datetime.date(2024, 1, 1 + i % 2),
+            "mandate_id": "1234",
+            "mandate_date": datetime.date(2023, 1, 1),
+            "description": "Test transaction %d" % i,
+            "endtoend_id": "E2E%d" % i,
+        }
+        if i % 2:
+            payment["BIC"] = "BANKNL2A"
+        if i % 4 == 1:
+            payment["address"] = dict(ADDRESS)
+        yield payment
+
+
+def transfer_payments():
+    for i in range(20):
+        payment = {
+            "name": "Tëst von Testenstein %d" % i,
+            "IBAN": "NL50BANK1234567890",
+            "amount": 1000 + i,
+            "execution_date": datetime.date(2024, 1, 1 + i % 2),
+            "description": "Test transaction %d" % i,
+        }
+        if i % 2:
+            payment["BIC"] = "BANKNL2A"
+        if i % 4 == 1:
+            payment["address"] = dict(ADDRESS)
+        yield payment
+
+
+def sdd(schema, batch, lazy, renderer="etree"):
+    return SepaDD({
+        "name": "TestCreditor",
+        "IBAN": "NL50BANK1234567890",
+        "BIC": "BANKNL2A",
+        "batch": batch,
+        "creditor_id": "DE26ZZZ00000000000",
+        "currency": "EUR",
+        "address": dict(ADDRESS),
+    }, schema=schema, lazy=lazy, renderer=renderer)
+
+
+def sct(schema, batch, lazy, renderer="etree"):
+    return SepaTransfer({
+        "name": "TestCreditor",
+        "IBAN": "NL50BANK1234567890",
+        "BIC": "BANKNL2A",
+        "batch": batch,
+        "currency": "EUR",
+        "address": dict(ADDRESS),
+    }, schema=schema, lazy=lazy, renderer=renderer)
+
+
+@pytest.mark.parametrize("batch", [True, False])
+@pytest.mark.parametrize("schema", ["pain.008.001.02", "pain.008.001.08", "pain.008.001.09", "pain.008.001.10"])
+def test_debit_lazy_identical(schema, batch):
+    eager = sdd(schema, batch, False)
+    lazy = sdd(schema, batch, True)
+    for payment in debit_payments():
+        eager.add_payment(payment)
+    for payment in debit_payments():
+        lazy.add_payment(payment)
+
+    assert len(lazy._payments) == 20
+    assert len(lazy._xml.find("CstmrDrctDbtInitn")) == 1
+    assert clean_ids(lazy.export()) == clean_ids(eager.export())
+    assert lazy._payments == []
+
+
+@pytest.mark.parametrize("batch", [True, False])
+@pytest.mark.parametrize("schema", ["pain.001.001.03", "pain.001.001.09", "pain.001.001.10", "pain.001.001.11"])
+def test_transfer_lazy_identical(schema, batch):
+    eager = sct(schema, batch, False)
+    lazy = sct(schema, batch, True)
+    for payment in transfer_payments():
+        eager.add_payment(payment)
+    for payment in transfer_payments():
+        lazy.add_payment(payment)
+
+    assert len(lazy._payments) == 20
+    assert len(lazy._xml.find("CstmrCdtTrfInitn")) == 1
+    assert clean_ids(lazy.export()) == clean_ids(eager.export())
+    assert lazy._payments == []
+
+
+@pytest.mark.parametrize("renderer", ["etree", "template"])
+@pytest.mark.parametrize("make,payments", [(sdd, debit_payments), (sct, transfer_payments)])
+def test_lazy_reused_address(make, payments, renderer):
+    schema = "pain.008.001.02" if make is sdd else "pain.001.001.03"
+    eager = make(schema, True, False)
+    lazy = make(schema, True, True, renderer)
+    for doc in (eager, lazy):
+        # The caller reuses and changes one address dict for every payment.
+        address = dict(ADDRESS)
+        for i, payment in enumerate(payments()):
+            address["town"] = "Town %d" % i
+            address["lines"] = ["Line %d" % i]
+            payment["address"] = address
+            doc.add_payment(payment)
+        address.clear()
+    assert clean_ids(lazy.export()) == clean_ids(eager.export())
@@ -0,0 +1,53 @@
+import pstats
+import time
+
+import pytest
+
+from sepaxml import profile
+
+
+def busy():
+    end = time.perf_counter() + 0.2
+    while time.perf_counter() < end:
+        pass
+
+
+def test_stack_sampler():
+    with profile.StackSampler(interval=0.001) as sampler:
+        busy()
+    assert sum(sampler.stacks.values()) > 10
+    top = sampler.stacks.most_common(1)[0][0]
+    # Stacks start below the function that started the sampler
+    assert top.split(";")[0] == "test_profile.py:busy"
+
+
+@pytest.mark.parametrize("profiler", ["cprofile", "sampling", "both"])
+def test_profile(tmp_path, profiler):
+    output = str(tmp_path / "out")
+    files = profile.profile(lambda: profile.make_workload(size=200, batch=False), output, profiler)
+    if profiler != "sampling":
+        assert files["cprofile"] == output + ".prof"
+        stats = pstats.Stats(files["cprofile"])
+        assert any(name == "_create_TX_node" for _, _, name in stats.stats)
+    if profiler != "cprofile":
+        with open(output + ".collapsed") as f:
+            for line in f:
+                stack, count = line.rsplit(" ", 1)
+                assert int(count) > 0
+                assert stack.startswith("sepaxml/profile.py:make_workload.<locals>.workload")
+
+
+def test_unknown_profiler(tmp_path):
+    with pytest.raises(ValueError):
+        profile.profile(lambda: None, str(tmp_path / "out"), "perf")
+
+
+def test_main(tmp_path, capsys):
+    output = str(tmp_path / "out")
+    assert profile.main([
+        "--schema", "pain.001.001.09", "--size", "50", "--no-clean", "--renderer", "template",
+        "--no-validate", "--output", output, "--top", "5",
+    ]) == 0
+    out = capsys.readouterr().out
+    assert output + ".prof" in out
+    assert output + ".collapsed" in out
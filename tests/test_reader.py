@@ -0,0 +1,84 @@
+import copy
+import io
+
+import pytest
+
+from sepaxml import SepaDD
+from sepaxml.reader import PaymentReader, read_payments
+from sepaxml.utils import ADDRESS_MAPPING
+from tests.test_template import DEBIT_CONFIGS, cases, debit_payments
+
+
+def record_dict(record):
+    expected = record._asdict()
+    if expected["BIC"] is None:
+        del expected["BIC"]
+    if not expected["address"]:
+        del expected["address"]
+    else:
+        keys = {tag: key for key, tag in ADDRESS_MAPPING}
+        address = {}
+        for tag, text in expected["address"]:
+            if tag == "AdrLine":
+                address.setdefault("lines", []).append(text)
+            else:
+                address[keys[tag]] = text
+        expected["address"] = address
+    return expected
+
+
+def read_dict(payment):
+    payment = dict(payment)
+    del payment["pmtinf"]
+    for key in ("collection_date", "mandate_date", "execution_date"):
+        if payment.get(key):
+            payment[key] = payment[key].isoformat()
+    return payment
+
+
+@pytest.mark.parametrize("cls,config,schema,payments", list(cases()))
+def test_read_own_output(cls, config, schema, payments):
+    sepa = cls(copy.deepcopy(config), schema=schema, renderer="template")
+    for payment in payments():
+        sepa.add_payment(payment)
+    records = list(sepa._payments)
+    xmlout = sepa.export(validate=False)
+
+    reader = PaymentReader(io.BytesIO(xmlout))
+    read = list(reader)
+    assert reader.schema == schema
+    assert reader.kind == ("debit" if schema.startswith("pain.008") else "transfer")
+    assert reader.group_header["nb_of_txs"] == len(records)
+    assert reader.group_header["ctrl_sum"] == sum(r.amount for r in records)
+    assert reader.group_header["msg_id"] == sepa.msg_id
+
+    # Batches are grouped, so compare independent of the order
+    key = lambda p: (p["endtoend_id"], p["name"])  # noqa: E731
+    assert sorted(map(read_dict, read), key=key) == sorted(map(record_dict, records), key=key)
+
+    for payment in read:
+        pmtinf = payment["pmtinf"]
+        assert pmtinf["name"] == sepa._config["name"]
+        assert pmtinf["batch"] == sepa._config["batch"]
+        if reader.kind == "debit":
+            assert pmtinf["creditor_id"] == sepa._config["creditor_id"]
+            assert pmtinf["type"] == payment["type"]
+
+
+def test_pmtinf_context_is_shared(tmpdir):
+    doc = SepaDD(copy.deepcopy(DEBIT_CONFIGS[0]), renderer="template")
+    for payment in debit_payments():
+        doc.add_payment(payment)
+    path = str(tmpdir.join("out.xml"))
+    doc.write(path, validate=False)
+
+    read = list(read_payments(path))
+    blocks = {id(p["pmtinf"]): p["pmtinf"] for p in read}
+    assert len(read) == 12
+    assert len(blocks) == 4
+    assert sum(b["nb_of_txs"] for b in blocks.values()) == 12
+    for payment in read:
+        assert payment["pmtinf"]["collection_date"] == payment["collection_date"]
+        assert payment["pmtinf"]["IBAN"] == "NL50BANK1234567890"
+        assert payment["pmtinf"]["BIC"] == "BANKNL2A"
+        assert payment["pmtinf"]["instrument"] == "CORE"
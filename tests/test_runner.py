@@ -0,0 +1,122 @@
+import datetime
+import os
+import threading
+
+import pytest
+
+from sepaxml.runner import iter_jobs, run_jobs
+
+
+def config(name):
+    return {
+        "name": name,
+        "IBAN": "NL50BANK1234567890",
+        "BIC": "BANKNL2A",
+        "batch": True,
+        "creditor_id": "DE26ZZZ00000000000",
+        "currency": "EUR"
+    }
+
+
+def payments(count):
+    return [{
+        "name": "Debtor {}".format(i),
+        "IBAN": "NL50BANK1234567890",
+        "BIC": "BANKNL2A",
+        "amount": 100 + i,
+        "type": "RCUR",
+        "collection_date": datetime.date(2024, 1, 1),
+        "mandate_id": "1234",
+        "mandate_date": datetime.date(2023, 1, 1),
+        "description": "Test transaction {}".format(i)
+    } for i in range(count)]
+
+
+class ExitOnUnpickle(dict):
+    """
+    A config that terminates the worker process that unpickles it.
+    """
+
+    def __reduce__(self):
+        return os._exit, (1,)
+
+
+def jobs():
+    bad = payments(1)
+    bad[0]["amount"] = "1.00"
+    return [
+        (config("Creditor A"), payments(2)),
+        (config("Creditor B"), bad),
+        (config("Creditor C"), payments(3)),
+    ]
+
+
+@pytest.mark.parametrize("workers", [0, 2])
+def test_run_jobs(workers):
+    results = run_jobs(jobs(), workers=workers, renderer="template")
+    assert [r.index for r in results] == [0, 1, 2]
+    assert results[0].error is None
+    assert results[0].nb_of_txs == 2
+    assert results[0].ctrl_sum == 201
+    assert results[0].size == len(results[0].xml)
+    assert b"<Nm>Creditor A</Nm>" in results[0].xml
+    assert "AMOUNT_NOT_INTEGER" in results[1].error
+    assert results[1].xml is None
+    assert results[2].error is None
+    assert results[2].nb_of_txs == 3
+
+
+def test_run_jobs_to_files(tmpdir):
+    path = os.path.join(str(tmpdir), "{index}.xml")
+    job_list = jobs()
+    job_list[2] += (os.path.join(str(tmpdir), "c.xml"),)
+    results = list(iter_jobs(job_list, path=path, workers=0))
+    assert results[0].path == path.format(index=0)
+    assert results[0].xml is None
+    with open(results[0].path, "rb") as f:
+        assert len(f.read()) == results[0].size
+    assert not os.path.exists(path.format(index=1))
+    assert results[2].path.endswith("c.xml")
+    assert os.path.exists(results[2].path)
+
+
+def test_unknown_kind():
+    with pytest.raises(ValueError):
+        run_jobs([], kind="foo")
+
+
+@pytest.mark.parametrize("workers", [0, 2])
+def test_run_jobs_generator_payments(workers):
+    results = run_jobs([
+        (config("Creditor A"), payments(2)),
+        (config("Creditor B"), (p for p in payments(4))),
+        (config("Creditor C"), payments(3)),
+    ], workers=workers)
+    assert [r.error for r in results] == [None, None, None]
+    assert [r.nb_of_txs for r in results] == [2, 4, 3]
+
+
+def test_run_jobs_unpicklable_job():
+    bad = config("Creditor B")
+    bad["lock"] = threading.Lock()
+    results = run_jobs([
+        (config("Creditor A"), payments(2)),
+        (bad, payments(1)),
+        (config("Creditor C"), payments(3)),
+    ], workers=2)
+    assert [r.index for r in results] == [0, 1, 2]
+    assert results[0].error is None
+    assert results[1].error.startswith("TypeError")
+    assert results[1].xml is None
+    assert results[2].error is None
+
+
+@pytest.mark.parametrize("crash", [0, 3, 7])
+def test_run_jobs_crashed_worker(crash):
+    job_list = [(config("Creditor {}".format(i)), payments(2)) for i in range(8)]
+    job_list[crash] = (ExitOnUnpickle(job_list[crash][0]), payments(2))
+    results = run_jobs(job_list, workers=2)
+    assert [r.index for r in results] == list(range(8))
+    assert results[crash].error.startswith("BrokenProcessPool")
+    assert [r.error for i, r in enumerate(results) if i != crash] == [None] * 7
+    assert [r.nb_of_txs for i, r in enumerate(results) if i != crash] == [2] * 7
@@ -0,0 +1,89 @@
+"""
+Checks that building documents scales linearly with the number of payments.
+The time of add_payment and export is measured at increasing sizes and the
+growth exponent k of t ~ n^k is fitted. Anything clearly worse than
+O(n log n) fails. Run only these tests with ``py.test -m scaling``, or skip
+them with ``-m "not scaling"``.
+"""
+import datetime
+import gc
+import math
+import time
+
+import pytest
+
+from sepaxml import SepaDD, SepaTransfer
+from sepaxml.testing import PaymentGenerator, make_config
+
+pytestmark = pytest.mark.scaling
+
+SIZES = [500, 1000, 2000, 4000]
+REPEAT = 3
+# n log n has a local exponent of about 1.1 at these sizes, n^2 one of 2.
+MAX_EXPONENT = 1.3
+
+
+def growth_exponent(sizes, times):
+    """
+    Fits t = c * n^k by least squares on the logarithms and returns k.
+    """
+    xs = [math.log(n) for n in sizes]
+    ys = [math.log(t) for t in times]
+    mean_x = sum(xs) / len(xs)
+    mean_y = sum(ys) / len(ys)
+    return (
+        sum((x - mean_x) * (y - mean_y) for x, y in zip(xs, ys))
+        / sum((x - mean_x) ** 2 for x in xs)
+    )
+
+
+def measure(build, payments):
+    """
+    Returns the fastest of several runs. CPU time is measured, so other
+    processes on the machine do not count. The garbage collector is disabled
+    while timing, as its full collections get slower with the heap size.
+    """
+    best = None
+    for _ in range(REPEAT):
+        copies = [dict(payment) for payment in payments]
+        gc.collect()
+        gc.disable()
+        try:
+            t = time.process_time()
+            build(copies)
+            t = time.process_time() - t
+        finally:
+            gc.enable()
+        best = t if best is None else min(best, t)
+    return best
+
+
+def test_growth_exponent():
+    assert growth_exponent([1, 2, 4], [3, 6, 12]) == pytest.approx(1)
+    assert growth_exponent([10, 100, 1000], [1, 100, 10000]) == pytest.approx(2)
+
+
+@pytest.mark.parametrize("renderer", ["etree", "template"])
+@pytest.mark.parametrize("batch", [True, False])
+@pytest.mark.parametrize("kind,cls", [("debit", SepaDD), ("transfer", SepaTransfer)])
+def test_add_payment_and_export_scale_linearly(kind, cls, batch, renderer):
+    generator = PaymentGenerator(kind, seed=0, start_date=datetime.date(2024, 1, 1))
+    all_payments = list(generator.payments(SIZES[-1]))
+
+    def build(payments):
+        sepa = cls(make_config(kind, batch), renderer=renderer)
+        for payment in payments:
+            sepa.add_payment(payment)
+        sepa.export(validate=False)
+
+    build([dict(payment) for payment in all_payments[:10]])  # Warm up caches, e.g. the compiled templates
+    times = [measure(build, all_payments[:size]) for size in SIZES]
+    exponent = growth_exponent(SIZES, times)
+    if exponent >= MAX_EXPONENT:
+        # Measure again before failing, a single disturbance on a busy
+        # machine should not fail the test while a real regression does.
+        times = [min(t, measure(build, all_payments[:size])) for t, size in zip(times, SIZES)]
+        exponent = growth_exponent(SIZES, times)
+    assert exponent < MAX_EXPONENT, "Time grows like n^{:.2f}: {}".format(
+        exponent, ", ".join("{}: {:.4f}s".format(n, t) for n, t in zip(SIZES, times))
+    )
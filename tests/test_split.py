@@ -0,0 +1,103 @@
+import datetime
+
+import pytest
+
+from sepaxml import SepaDD, SepaTransfer
+from sepaxml.validation import try_valid_xml
+
+
+def debit_config(batch=True):
+    return {
+        "name": "Test von Testenstein",
+        "IBAN": "NL50BANK1234567890",
+        "BIC": "BANKNL2A",
+        "batch": batch,
+        "creditor_id": "DE26ZZZ00000000000",
+        "currency": "EUR"
+    }
+
+
+def add_debits(sdd, count, types=("FRST", "RCUR")):
+    for i in range(count):
+        sdd.add_payment({
+            "name": "Debtör {}".format(i),
+            "IBAN": "NL50BANK1234567890",
+            "BIC": "BANKNL2A",
+            "amount": 100 + i,
+            "type": types[i % len(types)],
+            "collection_date": datetime.date(2024, 1, 1),
+            "mandate_id": "1234",
+            "mandate_date": datetime.date(2023, 1, 1),
+            "description": "Test transaction {}".format(i)
+        })
+
+
+def check_documents(sdd, docs):
+    assert sum(doc.nb_of_txs for doc in docs) == sdd.nb_of_txs
+    assert sum(doc.ctrl_sum for doc in docs) == sdd.ctrl_sum
+    assert len({doc.msg_id for doc in docs}) == len(docs)
+    return [doc.export() for doc in docs]
+
+
+def test_split_by_transactions():
+    sdd = SepaDD(debit_config(), lazy=True)
+    add_debits(sdd, 25)
+    docs = list(sdd.split(max_transactions=10))
+    assert [doc.nb_of_txs for doc in docs] == [10, 10, 5]
+    outs = check_documents(sdd, docs)
+    assert outs[0].count(b"<DrctDbtTxInf>") == 10
+
+
+def test_split_keeps_batches_together():
+    sdd = SepaDD(debit_config(), lazy=True)
+    add_debits(sdd, 6, types=("FRST",))
+    add_debits(sdd, 6, types=("RCUR",))
+    docs = list(sdd.split(max_transactions=8))
+    # The second batch would fit into the first document only partially
+    assert [doc.nb_of_txs for doc in docs] == [6, 6]
+    for out in check_documents(sdd, docs):
+        assert out.count(b"<PmtInf>") == 1
+
+
+def test_split_by_bytes():
+    sdd = SepaDD(debit_config(batch=False), renderer="template")
+    add_debits(sdd, 40)
+    single = sdd._split_document(sdd._payments).export()
+    docs = list(sdd.split(max_bytes=len(single) // 3))
+    assert len(docs) > 3
+    for out in check_documents(sdd, docs):
+        assert len(out) <= len(single) // 3
+
+
+def test_split_transfers():
+    sct = SepaTransfer({
+        "name": "Test von Testenstein",
+        "IBAN": "NL50BANK1234567890",
+        "BIC": "BANKNL2A",
+        "batch": True,
+        "currency": "EUR"
+    }, schema="pain.001.001.03", renderer="template")
+    for i in range(5):
+        sct.add_payment({
+            "name": "Creditor {}".format(i),
+            "IBAN": "NL50BANK1234567890",
+            "BIC": "BANKNL2A",
+            "amount": 1000,
+            "execution_date": datetime.date(2024, 1, 1),
+            "description": "Test transaction {}".format(i)
+        })
+    docs = list(sct.split(max_transactions=2, max_bytes=100000))
+    assert [doc.nb_of_txs for doc in docs] == [2, 2, 1]
+    for out in check_documents(sct, docs):
+        try_valid_xml(out, "pain.001.001.03")
+
+
+def test_split_errors():
+    sdd = SepaDD(debit_config())
+    with pytest.raises(ValueError):
+        list(sdd.split(max_transactions=10))
+
+    sdd = SepaDD(debit_config(), lazy=True)
+    add_debits(sdd, 1)
+    with pytest.raises(ValueError):
+        list(sdd.split(max_bytes=1000))
@@ -0,0 +1,118 @@
+import datetime
+import io
+import os
+
+import pytest
+
+from sepaxml import SepaDD, SepaTransfer
+from sepaxml.stats import Stats
+
+CONFIG = {
+    "name": "TestCreditor",
+    "IBAN": "NL50BANK1234567890",
+    "BIC": "BANKNL2A",
+    "batch": True,
+    "creditor_id": "DE26ZZZ00000000000",
+    "currency": "EUR",
+}
+
+
+def payment(i):
+    return {
+        "name": "Tëst von Testenstein %d" % i,
+        "IBAN": "NL50BANK1234567890",
+        "BIC": "BANKNL2A",
+        "amount": 100 + i,
+        "type": ("FRST", "RCUR")[i % 2],
+        "collection_date": datetime.date.today(),
+        "mandate_id": "M%d" % i,
+        "mandate_date": datetime.date.today(),
+        "description": "Test transaction %d" % i,
+    }
+
+
+@pytest.mark.parametrize("renderer", ["etree", "template"])
+@pytest.mark.parametrize("batch", [True, False])
+def test_phases_and_counters(renderer, batch):
+    stats = Stats()
+    sepa = SepaDD(dict(CONFIG, batch=batch), renderer=renderer, stats=stats)
+    for i in range(5):
+        sepa.add_payment(payment(i))
+    out = sepa.export(pretty_print=True)
+
+    phases = stats.phases
+    assert phases["add_payment"].calls == 5
+    assert phases["clean"].calls == 10
+    assert phases["check_payment"].calls == 5
+    if renderer == "etree":
+        assert phases["build_elements"].calls == 5
+    else:
+        assert "build_elements" not in phases
+    assert phases["serialize"].calls == 1
+    assert phases["pretty_print"].calls == 1
+    assert phases["validate"].calls == 1
+    assert all(s.wall >= 0 and s.cpu >= 0 for s in phases.values())
+    assert phases["add_payment"].wall >= phases["check_payment"].wall
+
+    assert stats.counters["documents"] == 1
+    assert stats.counters["payments"] == 5
+    assert stats.counters["batches"] == (2 if batch else 5)
+    assert stats.counters["bytes"] == len(out)
+
+
+def test_add_payments_and_export_to():
+    stats = Stats()
+    sepa = SepaTransfer(dict(CONFIG), stats=stats)
+    sepa.add_payments([{
+        "name": "Test %d" % i,
+        "IBAN": "NL50BANK1234567890",
+        "BIC": "BANKNL2A",
+        "amount": 100,
+        "execution_date": datetime.date.today(),
+        "description": "Test",
+    } for i in range(3)])
+    out = io.BytesIO()
+    written = sepa.export_to(out)
+    assert stats.phases["add_payments"].calls == 1
+    assert stats.phases["clean"].calls == 2
+    assert stats.phases["build_elements"].calls == 3
+    assert stats.counters["bytes"] == written == len(out.getvalue())
+    assert stats.counters["batches"] == 1
+    assert "validate" not in stats.phases
+
+
+def test_callback_and_shared_stats():
+    events = []
+    stats = Stats(callback=lambda phase, wall, cpu: events.append(phase))
+    sepa = SepaDD(dict(CONFIG), renderer="template", stats=stats)
+    for i in range(4):
+        sepa.add_payment(payment(i))
+    documents = list(sepa.split(max_transactions=2))
+    for doc in documents:
+        doc.export(validate=False)
+    assert events.count("add_payment") == 4
+    assert events.count("serialize") == stats.phases["serialize"].calls == len(documents) == 2
+    assert stats.counters["payments"] == 4
+
+    data = stats.as_dict()
+    assert data["counters"]["documents"] == 2
+    assert data["phases"]["add_payment"]["calls"] == 4
+    assert "serialize" in stats.report()
+    stats.reset()
+    assert stats.phases == {}
+    assert stats.counters["payments"] == 0
+
+
+def test_disabled():
+    sepa = SepaDD(dict(CONFIG))
+    assert sepa.stats is None
+    assert "add_payment" not in vars(sepa)
+
+
+def test_bytes_pretty_printed_file(tmpdir):
+    stats = Stats()
+    sepa = SepaDD(dict(CONFIG), stats=stats)
+    sepa.add_payment(payment(0))
+    path = str(tmpdir.join("out.xml"))
+    written = sepa.write(path, pretty_print=True)
+    assert stats.counters["bytes"] == written == os.path.getsize(path)
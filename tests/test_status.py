@@ -0,0 +1,95 @@
+import io
+
+from sepaxml.status import Status, StatusIndex, read_statuses
+
+PAIN002 = b"""<?xml version="1.0" encoding="UTF-8"?>
+<Document xmlns="urn:iso:std:iso:20022:tech:xsd:pain.002.001.03">
+  <CstmrPmtStsRpt>
+    <GrpHdr><MsgId>REPORT-1</MsgId><CreDtTm>2024-01-03T10:00:00</CreDtTm></GrpHdr>
+    <OrgnlGrpInfAndSts>
+      <OrgnlMsgId>20240101120000-0123456789ab</OrgnlMsgId>
+      <OrgnlMsgNmId>pain.008.001.02</OrgnlMsgNmId>
+      <GrpSts>PART</GrpSts>
+    </OrgnlGrpInfAndSts>
+    <OrgnlPmtInfAndSts>
+      <OrgnlPmtInfId>Creditor-aaaaaaaaaaaa</OrgnlPmtInfId>
+      <PmtInfSts>RJCT</PmtInfSts>
+      <StsRsnInf><Rsn><Cd>DT01</Cd></Rsn></StsRsnInf>
+    </OrgnlPmtInfAndSts>
+    <OrgnlPmtInfAndSts>
+      <OrgnlPmtInfId>Creditor-bbbbbbbbbbbb</OrgnlPmtInfId>
+      <TxInfAndSts>
+        <OrgnlEndToEndId>Creditor-000000000001</OrgnlEndToEndId>
+        <TxSts>RJCT</TxSts>
+        <StsRsnInf><Rsn><Cd>AC04</Cd></Rsn><AddtlInf>Account closed</AddtlInf></StsRsnInf>
+      </TxInfAndSts>
+      <TxInfAndSts>
+        <OrgnlEndToEndId>Creditor-000000000002</OrgnlEndToEndId>
+        <TxSts>RJCT</TxSts>
+        <StsRsnInf><Rsn><Prtry>X1</Prtry></Rsn></StsRsnInf>
+      </TxInfAndSts>
+    </OrgnlPmtInfAndSts>
+  </CstmrPmtStsRpt>
+</Document>
+"""
+
+REJECTED_GROUP = b"""<?xml version="1.0" encoding="UTF-8"?>
+<Document xmlns="urn:iso:std:iso:20022:tech:xsd:pain.002.001.10">
+  <CstmrPmtStsRpt>
+    <GrpHdr><MsgId>REPORT-2</MsgId><CreDtTm>2024-01-03T10:00:00</CreDtTm></GrpHdr>
+    <OrgnlGrpInfAndSts>
+      <OrgnlMsgId>MSG-2</OrgnlMsgId>
+      <OrgnlMsgNmId>pain.001.001.09</OrgnlMsgNmId>
+      <GrpSts>RJCT</GrpSts>
+      <StsRsnInf><Rsn><Cd>FF01</Cd></Rsn></StsRsnInf>
+    </OrgnlGrpInfAndSts>
+  </CstmrPmtStsRpt>
+</Document>
+"""
+
+MSG_ID = "20240101120000-0123456789ab"
+
+
+def test_read_statuses():
+    rows = list(read_statuses(io.BytesIO(PAIN002)))
+    assert [(r["pmtinf_id"], r["endtoend_id"], r["status"], r["reason"]) for r in rows] == [
+        (None, None, "PART", None),
+        ("Creditor-aaaaaaaaaaaa", None, "RJCT", "DT01"),
+        ("Creditor-bbbbbbbbbbbb", "Creditor-000000000001", "RJCT", "AC04"),
+        ("Creditor-bbbbbbbbbbbb", "Creditor-000000000002", "RJCT", "X1"),
+    ]
+    assert all(r["msg_id"] == MSG_ID for r in rows)
+    assert rows[2]["additional_info"] == "Account closed"
+
+
+def test_status_index():
+    index = StatusIndex()
+    index.add_file(io.BytesIO(PAIN002))
+    index.add_file(io.BytesIO(REJECTED_GROUP))
+    assert len(index) == 2
+    assert index[MSG_ID, "Creditor-000000000001"] == Status("RJCT", "AC04", "Creditor-bbbbbbbbbbbb", "Account closed")
+    assert index.get(MSG_ID, "Creditor-000000000002").reason == "X1"
+    assert (MSG_ID, "Creditor-000000000003") not in index
+    assert index.get(MSG_ID, "Creditor-000000000003", "unknown") == "unknown"
+    assert index.pmtinfs[MSG_ID, "Creditor-aaaaaaaaaaaa"].reason == "DT01"
+    assert index.groups[MSG_ID].status == "PART"
+    # A rejected message applies to all of its transactions
+    assert index["MSG-2", "anything"] == Status("RJCT", "FF01", None, None)
+
+
+def test_status_index_rejected_pmtinf():
+    index = StatusIndex()
+    index.add_file(io.BytesIO(PAIN002))
+    # Without the transactions of the block, the rejection cannot be found
+    assert index.get(MSG_ID, "Creditor-000000000010") is None
+    index.add_pmtinfs(MSG_ID, {
+        "Creditor-aaaaaaaaaaaa": ["Creditor-000000000010", "Creditor-000000000011"],
+        "Creditor-bbbbbbbbbbbb": ["Creditor-000000000001", "Creditor-000000000003"],
+    })
+    assert index[MSG_ID, "Creditor-000000000010"] == Status("RJCT", "DT01", "Creditor-aaaaaaaaaaaa", None)
+    assert index.get(MSG_ID, "Creditor-000000000011").reason == "DT01"
+    # Transactions listed in the report keep their own status
+    assert index.get(MSG_ID, "Creditor-000000000001").reason == "AC04"
+    # The other block was not rejected as a whole
+    assert (MSG_ID, "Creditor-000000000003") not in index
+    assert ("OTHER-MSG", "Creditor-000000000010") not in index
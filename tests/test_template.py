@@ -0,0 +1,227 @@
+import copy
+import datetime
+import re
+
+import pytest
+
+from sepaxml import SepaDD, SepaTransfer
+from sepaxml.ids import SeededIdGenerator
+from sepaxml.validation import available_schemas
+
+ADDRESS = {
+    "department": "Head Office",
+    "street_name": "Musterstr. <1> & \"2\"",
+    "building_number": "1",
+    "postcode": "12345",
+    "town": "Berlin",
+    "country": "DE",
+    "lines": ["Line 1", ""],
+}
+
+DEBIT_CONFIGS = [
+    {
+        "name": "Müller & Söhne <GmbH>",
+        "IBAN": "NL50BANK1234567890",
+        "BIC": "BANKNL2A",
+        "batch": True,
+        "creditor_id": "DE26ZZZ00000000000",
+        "currency": "EUR",
+        "address": ADDRESS,
+        "ultimate_creditor": {
+            "name": "Real Creditor",
+            "BIC_or_BEI": "REALNL2A",
+            "id": "12345678900001",
+            "id_scheme_name": "SIRET",
+        },
+    },
+    {
+        "name": "TestCreditor",
+        "IBAN": "NL50BANK1234567890",
+        "BIC": "BANKNL2A",
+        "batch": False,
+        "creditor_id": "DE26ZZZ00000000000",
+        "currency": "EUR",
+        "address": ADDRESS,
+        "ultimate_creditor": {"name": "Real Creditor"},
+        "initiating_party": "Initiator",
+        "initiating_party_id": "INIT-ID",
+    },
+    {
+        "name": "TestCreditor",
+        "IBAN": "NL50BANK1234567890",
+        "batch": True,
+        "creditor_id": "DE26ZZZ00000000000",
+        "currency": "EUR",
+        "instrument": "B2B",
+        "ultimate_creditor": {"id": "UC123456789"},
+    },
+    {
+        "name": "TestCreditor",
+        "IBAN": "NL50BANK1234567890",
+        "batch": False,
+        "creditor_id": "DE26ZZZ00000000000",
+        "currency": "EUR",
+    },
+]
+
+TRANSFER_CONFIGS = [
+    {
+        "name": "Müller & Söhne <GmbH>",
+        "IBAN": "NL50BANK1234567890",
+        "BIC": "BANKNL2A",
+        "batch": True,
+        "currency": "EUR",
+        "address": ADDRESS,
+    },
+    {
+        "name": "TestCreditor",
+        "IBAN": "NL50BANK1234567890",
+        "BIC": "BANKNL2A",
+        "batch": False,
+        "currency": "EUR",
+        "address": ADDRESS,
+        "initiating_party_id": "",
+    },
+    {
+        "name": "TestCreditor",
+        "IBAN": "CH4912345123456789012",
+        "batch": True,
+        "domestic": True,
+        "currency": "CHF",
+        "initiating_party": "Initiator",
+        "initiating_party_id": "INIT-ID",
+    },
+    {
+        "name": "TestCreditor",
+        "IBAN": "CH4912345123456789012",
+        "batch": False,
+        "domestic": True,
+        "currency": "CHF",
+        "address": ADDRESS,
+    },
+]
+
+
+def debit_payments():
+    for i in range(12):
+        payment = {
+            "name": "Tëst <von> & \"Testenstein\" %d" % i,
+            "IBAN": "NL50BANK1234567890",
+            "amount": 1 + i * 1001,
+            "type": ("FRST", "RCUR", "OOFF", "FNAL")[i % 4],
+            "collection_date": datetime.date(2024, 1, 1 + i % 2),
+            "mandate_id": "M&%d" % i,
+            "mandate_date": datetime.date(2023, 1, 1),
+            "description": "Transaction > %d" % i if i % 5 else "",
+        }
+        if i % 2:
+            payment["BIC"] = "BANKNL2A"
+        if i % 3 == 1:
+            payment["address"] = ADDRESS
+        if i % 3 == 2:
+            payment["endtoend_id"] = "E2E-%d-with-a-very-long-identifier-that-gets-cut" % i
+        if i == 5:
+            payment["currency"] = "C\"HF"
+        yield payment
+
+
+def transfer_payments():
+    for i in range(12):
+        payment = {
+            "name": "Tëst <von> & \"Testenstein\" %d" % i,
+            "IBAN": "NL50BANK1234567890",
+            "amount": 1 + i * 1001,
+            "execution_date": datetime.date(2024, 1, 1 + i % 2),
+            "description": "Transaction > %d" % i if i % 5 else "",
+        }
+        if i % 2:
+            payment["BIC"] = "BANKNL2A"
+        if i % 3 == 1:
+            payment["address"] = ADDRESS
+        if i % 3 == 2:
+            payment["endtoend_id"] = "E2E-%d" % i
+        if i == 5:
+            payment["currency"] = "C\"HF"
+        yield payment
+
+
+def render(cls, config, schema, payments, renderer, clean):
+    config = copy.deepcopy(config)
+    config["msg_id"] = "MSGID"
+    sepa = cls(config, schema=schema, renderer=renderer, clean=clean, id_generator=ZeroIdGenerator())
+    for payment in payments:
+        sepa.add_payment(payment)
+    return re.sub(b"<(CreDtTm|MsgId)>[^<]*</(CreDtTm|MsgId)>", b"", sepa.export(validate=False))
+
+
+class ZeroIdGenerator:
+    """
+    Makes the output independent of the order in which IDs are generated.
+    """
+
+    def generate(self, length=12):
+        return "0" * length
+
+
+def cases():
+    for schema in available_schemas():
+        if schema.startswith("pain.008"):
+            for i, config in enumerate(DEBIT_CONFIGS):
+                if schema == "pain.008.001.02" and "BIC" not in config:
+                    continue
+                yield pytest.param(SepaDD, config, schema, debit_payments, id="%s-debit-%d" % (schema, i))
+        else:
+            for i, config in enumerate(TRANSFER_CONFIGS):
+                yield pytest.param(SepaTransfer, config, schema, transfer_payments, id="%s-transfer-%d" % (schema, i))
+
+
+@pytest.mark.parametrize("clean", [True, False])
+@pytest.mark.parametrize("cls,config,schema,payments", list(cases()))
+def test_template_identical_to_etree(cls, config, schema, payments, clean):
+    expected = render(cls, config, schema, payments(), "etree", clean)
+    assert render(cls, config, schema, payments(), "template", clean) == expected
+
+
+def test_all_schemas_covered():
+    covered = {p.values[2] for p in cases()}
+    assert covered == set(available_schemas())
+
+
+def test_template_export_valid():
+    sepa = SepaDD(copy.deepcopy(DEBIT_CONFIGS[2]), schema="pain.008.001.08", renderer="template",
+                  id_generator=ZeroIdGenerator())
+    for payment in debit_payments():
+        payment.pop("currency", None)
+        payment.pop("address", None)
+        payment["description"] = "Test transaction"
+        sepa.add_payment(payment)
+    sepa.export()
+    # Exporting twice does not change the output
+    assert sepa.export() == sepa.export()
+
+
+@pytest.mark.parametrize("cls,config,schema,payments", [
+    (SepaDD, DEBIT_CONFIGS[0], "pain.008.001.02", debit_payments),
+    (SepaDD, DEBIT_CONFIGS[3], "pain.008.001.08", debit_payments),
+    (SepaTransfer, TRANSFER_CONFIGS[0], "pain.001.001.03", transfer_payments),
+    (SepaTransfer, TRANSFER_CONFIGS[1], "pain.001.001.09", transfer_payments),
+])
+def test_parallel_identical_to_serial(cls, config, schema, payments):
+    outs = []
+    for workers in (None, 2):
+        sepa = cls(copy.deepcopy(config), schema=schema, renderer="template", id_generator=SeededIdGenerator(1))
+        for payment in payments():
+            sepa.add_payment(payment)
+        outs.append(re.sub(b"<CreDtTm>[^<]*</CreDtTm>", b"", sepa.export(validate=False, workers=workers)))
+    assert outs[0] == outs[1]
+
+
+def test_parallel_needs_template_renderer():
+    sepa = SepaDD(copy.deepcopy(DEBIT_CONFIGS[0]), lazy=True)
+    with pytest.raises(ValueError):
+        sepa.export(workers=2)
+
+
+def test_unknown_renderer():
+    with pytest.raises(ValueError):
+        SepaDD(copy.deepcopy(DEBIT_CONFIGS[0]), renderer="foo")
@@ -0,0 +1,90 @@
+import datetime
+import itertools
+
+import pytest
+
+from sepaxml import SepaDD, SepaTransfer
+from sepaxml.bic import is_valid_bic
+from sepaxml.iban import IBAN_FORMATS, is_valid_iban
+from sepaxml.testing import PaymentGenerator, iban_check_digits, make_config
+from sepaxml.utils import is_ascii
+from sepaxml.validation import available_schemas
+
+
+def test_iban_check_digits():
+    assert iban_check_digits("DE", "370400440532013000") == "89"
+    assert iban_check_digits("GB", "NWBK60161331926819") == "29"
+
+
+def test_ibans_of_all_countries_valid():
+    generator = PaymentGenerator(seed=1, countries=sorted(IBAN_FORMATS))
+    for country in IBAN_FORMATS:
+        for _ in range(20):
+            iban = generator.iban(country)
+            assert iban.startswith(country)
+            assert is_valid_iban(iban), iban
+
+
+def test_seeded():
+    start = datetime.date(2024, 1, 1)
+    a = list(PaymentGenerator(seed=42, start_date=start).payments(100))
+    b = list(PaymentGenerator(seed=42, start_date=start).payments(100))
+    c = list(PaymentGenerator(seed=43, start_date=start).payments(100))
+    assert a == b
+    assert a != c
+
+
+def test_payments():
+    start = datetime.date(2024, 1, 1)
+    payments = list(PaymentGenerator(seed=1, start_date=start, days=10).payments(2000))
+    assert len({p["IBAN"][:2] for p in payments}) > 5
+    assert all(is_valid_iban(p["IBAN"]) for p in payments)
+    assert all(is_valid_bic(p["BIC"]) for p in payments if "BIC" in p)
+    assert any(not is_ascii(p["name"]) for p in payments)
+    assert 200 < sum(1 for p in payments if "address" in p) < 600
+    assert {p["type"] for p in payments} == {"FRST", "RCUR", "OOFF", "FNAL"}
+    dates = {p["collection_date"] for p in payments}
+    assert min(dates) == start
+    assert max(dates) == start + datetime.timedelta(days=9)
+    assert all(p["mandate_date"] < p["collection_date"] for p in payments)
+    assert all(isinstance(p["amount"], int) and p["amount"] > 0 for p in payments)
+
+    transfers = list(PaymentGenerator("transfer", seed=1).payments(10))
+    assert all("execution_date" in p and "mandate_id" not in p for p in transfers)
+
+
+def test_endless():
+    payments = PaymentGenerator(seed=1).payments()
+    assert len(list(itertools.islice(payments, 50))) == 50
+
+
+def test_columns():
+    start = datetime.date(2024, 1, 1)
+    columns = PaymentGenerator(seed=5, start_date=start).columns(50)
+    payments = list(PaymentGenerator(seed=5, start_date=start).payments(50))
+    assert columns["IBAN"] == [p["IBAN"] for p in payments]
+    assert columns["BIC"] == [p.get("BIC") for p in payments]
+    chunks = list(PaymentGenerator(seed=5, start_date=start).iter_columns(50, chunk_size=20))
+    assert [len(c["name"]) for c in chunks] == [20, 20, 10]
+    assert sum((c["amount"] for c in chunks), []) == columns["amount"]
+
+
+def test_invalid_arguments():
+    with pytest.raises(ValueError):
+        PaymentGenerator("refund")
+    with pytest.raises(ValueError):
+        PaymentGenerator(countries=["XX"])
+
+
+@pytest.mark.parametrize("schema", available_schemas())
+@pytest.mark.parametrize("batch", [True, False])
+def test_documents_valid(schema, batch):
+    kind, cls = ("debit", SepaDD) if schema.startswith("pain.008") else ("transfer", SepaTransfer)
+    sepa = cls(make_config(kind, batch), schema=schema, check_iban=True)
+    for payment in PaymentGenerator(kind, seed=3).payments(50):
+        sepa.add_payment(payment)
+    sepa.export()
+
+    sepa = cls(make_config(kind, batch), schema=schema, renderer="template", check_iban=True)
+    sepa.add_payments(PaymentGenerator(kind, seed=3).columns(50))
+    sepa.export()
@@ -0,0 +1,67 @@
+import datetime
+
+import pytest
+
+from sepaxml import SepaDD, SepaTransfer
+
+
+@pytest.fixture(params=[True, False])
+def sdd(request):
+    return SepaDD({
+        "name": "TestCreditor",
+        "IBAN": "NL50BANK1234567890",
+        "BIC": "BANKNL2A",
+        "batch": request.param,
+        "creditor_id": "DE26ZZZ00000000000",
+        "currency": "EUR"
+    }, schema="pain.008.001.02")
+
+
+@pytest.fixture(params=[True, False])
+def sct(request):
+    return SepaTransfer({
+        "name": "TestCreditor",
+        "IBAN": "NL50BANK1234567890",
+        "BIC": "BANKNL2A",
+        "batch": request.param,
+        "currency": "EUR"
+    }, schema="pain.001.001.03")
+
+
+def test_debit_totals(sdd):
+    assert sdd.nb_of_txs == 0
+    assert sdd.ctrl_sum == 0
+    for i, amount in enumerate((1012, 5000, 7)):
+        sdd.add_payment({
+            "name": "Test von Testenstein",
+            "IBAN": "NL50BANK1234567890",
+            "BIC": "BANKNL2A",
+            "amount": amount,
+            "type": ("FRST", "RCUR")[i % 2],
+            "collection_date": datetime.date.today(),
+            "mandate_id": "1234",
+            "mandate_date": datetime.date.today(),
+            "description": "Test transaction"
+        })
+    assert sdd.nb_of_txs == 3
+    assert sdd.ctrl_sum == 6019
+
+    xmlout = sdd.export()
+    assert b"<NbOfTxs>3</NbOfTxs><CtrlSum>60.19</CtrlSum>" in xmlout
+
+
+def test_transfer_totals(sct):
+    for amount in (1012, 5000, 7):
+        sct.add_payment({
+            "name": "Test von Testenstein",
+            "IBAN": "NL50BANK1234567890",
+            "BIC": "BANKNL2A",
+            "amount": amount,
+            "execution_date": datetime.date.today(),
+            "description": "Test transaction"
+        })
+    assert sct.nb_of_txs == 3
+    assert sct.ctrl_sum == 6019
+
+    xmlout = sct.export()
+    assert b"<NbOfTxs>3</NbOfTxs><CtrlSum>60.19</CtrlSum>" in xmlout
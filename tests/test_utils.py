@@ -0,0 +1,26 @@
+import pytest
+
+from sepaxml.utils import decimal_str_to_int, int_to_decimal_str
+
+
+@pytest.mark.parametrize("value,cents", [
+    ("1.5", 150),
+    ("100", 10000),
+    (".05", 5),
+    ("0.05", 5),
+    ("10.12", 1012),
+    (" 3.00 ", 300),
+    ("-1.5", -150),
+])
+def test_decimal_str_to_int(value, cents):
+    assert decimal_str_to_int(value) == cents
+
+
+def test_decimal_str_to_int_more_than_two_decimals():
+    with pytest.raises(ValueError):
+        decimal_str_to_int("1.234")
+
+
+@pytest.mark.parametrize("cents", [0, 5, 150, 1012, 10000])
+def test_decimal_str_round_trip(cents):
+    assert decimal_str_to_int(int_to_decimal_str(cents)) == cents
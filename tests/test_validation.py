@@ -0,0 +1,121 @@
+import datetime
+
+import pytest
+
+from sepaxml import SepaDD, validation
+from sepaxml.validation import (ValidationError, available_schemas,
+                                clear_schema_cache, get_backend, get_schema,
+                                register_backend, try_valid_xml,
+                                warm_schema_cache)
+
+
+@pytest.fixture
+def sdd():
+    return SepaDD({
+        "name": "TestCreditor",
+        "IBAN": "NL50BANK1234567890",
+        "BIC": "BANKNL2A",
+        "batch": True,
+        "creditor_id": "DE26ZZZ00000000000",
+        "currency": "EUR"
+    }, schema="pain.008.001.02")
+
+
+@pytest.fixture
+def payment():
+    return {
+        "name": "Test von Testenstein",
+        "IBAN": "NL50BANK1234567890",
+        "BIC": "BANKNL2A",
+        "amount": 1012,
+        "type": "FRST",
+        "collection_date": datetime.date.today(),
+        "mandate_id": "1234",
+        "mandate_date": datetime.date.today(),
+        "description": "Test transaction1"
+    }
+
+
+def test_available_schemas():
+    schemas = available_schemas()
+    assert "pain.001.001.03" in schemas
+    assert "pain.008.001.02" in schemas
+    assert all(s.startswith("pain.") for s in schemas)
+    assert available_schemas("camt.") == ["camt.053.001.06", "camt.054.001.06"]
+
+
+def test_schema_is_compiled_once():
+    clear_schema_cache()
+    schema = get_schema("pain.008.001.02")
+    assert get_schema("pain.008.001.02") is schema
+
+
+def test_clear_schema_cache():
+    schema = get_schema("pain.008.001.02")
+    clear_schema_cache()
+    assert get_schema("pain.008.001.02") is not schema
+
+
+def test_warm_schema_cache():
+    clear_schema_cache()
+    warm_schema_cache(["pain.001.001.03"], backend="xmlschema")
+    assert list(validation._schema_cache) == [("xmlschema", "pain.001.001.03")]
+    warm_schema_cache(backend="lxml")
+    assert sorted(s for b, s in validation._schema_cache if b == "lxml") == available_schemas()
+
+
+def test_export_uses_cache(sdd, payment):
+    clear_schema_cache()
+    sdd.add_payment(payment)
+    sdd.export()
+    schema = get_schema("pain.008.001.02")
+    sdd.export()
+    assert get_schema("pain.008.001.02") is schema
+
+
+def test_schema_cache_per_backend():
+    assert get_schema("pain.008.001.02", "lxml") is not get_schema("pain.008.001.02", "xmlschema")
+
+
+def test_default_backend():
+    assert get_backend().name == "lxml"
+    assert get_backend("xmlschema").name == "xmlschema"
+    with pytest.raises(ValueError):
+        get_backend("foo")
+
+
+@pytest.mark.parametrize("backend", ["lxml", "xmlschema"])
+def test_valid_xml(sdd, payment, backend):
+    sdd.add_payment(payment)
+    try_valid_xml(sdd.export(validate=False), "pain.008.001.02", backend=backend)
+
+
+@pytest.mark.parametrize("backend", ["lxml", "xmlschema"])
+def test_invalid_xml(sdd, payment, backend):
+    sdd.add_payment(payment)
+    xmlout = sdd.export(validate=False).replace(b"<SeqTp>FRST</SeqTp>", b"<SeqTp>WRONG</SeqTp>")
+    with pytest.raises(ValidationError):
+        try_valid_xml(xmlout, "pain.008.001.02", backend=backend)
+
+
+def test_register_backend():
+    class DummyBackend:
+        name = "dummy"
+
+        def is_available(self):
+            return True
+
+        def compile(self, path):
+            return path
+
+        def validate(self, compiled, xmlout):
+            raise ValidationError(compiled)
+
+    register_backend(DummyBackend(), first=True)
+    try:
+        assert get_backend().name == "dummy"
+        with pytest.raises(ValidationError):
+            try_valid_xml(b"<Document/>", "pain.008.001.02")
+    finally:
+        del validation.BACKENDS["dummy"]
+        clear_schema_cache()
@@ -6,14 +6,13 @@ from unittest import mock
 import pytest
 
 from sepaxml import SepaTransfer
+from sepaxml.ids import SeededIdGenerator
 from tests.utils import validate_xml
 
 
 @pytest.fixture
 def freeze_random():
-    import random
-
-    with mock.patch("sepaxml.utils.random", random.Random(123456)):
+    with mock.patch("sepaxml.shared.default_generator", SeededIdGenerator(123456)):
         yield
 
 
@@ -54,7 +53,7 @@ SAMPLE_RESULT = b"""
 <Document xmlns="urn:iso:std:iso:20022:tech:xsd:pain.001.001.03" xmlns:xsi="http://www.w3.org/2001/XMLSchema-instance">
   <CstmrCdtTrfInitn>
     <GrpHdr>
-      <MsgId>20211002081735-9050218037f5</MsgId>
+      <MsgId>20211002081735-d804ce3d9460</MsgId>
       <CreDtTm>2021-10-02T20:17:35</CreDtTm>
       <NbOfTxs>2</NbOfTxs>
       <CtrlSum>30.60</CtrlSum>
@@ -63,7 +62,7 @@ SAMPLE_RESULT = b"""
       </InitgPty>
     </GrpHdr>
     <PmtInf>
-      <PmtInfId>MillerSonLtd-04cb151eee51</PmtInfId>
+      <PmtInfId>MillerSonLtd-4a27cb477398</PmtInfId>
       <PmtMtd>TRF</PmtMtd>
       <BtchBookg>true</BtchBookg>
       <NbOfTxs>1</NbOfTxs>
@@ -114,7 +113,7 @@ SAMPLE_RESULT = b"""
       </CdtTrfTxInf>
     </PmtInf>
     <PmtInf>
-      <PmtInfId>MillerSonLtd-323224a9eab8</PmtInfId>
+      <PmtInfId>MillerSonLtd-cce307887241</PmtInfId>
       <PmtMtd>TRF</PmtMtd>
       <BtchBookg>true</BtchBookg>
       <NbOfTxs>1</NbOfTxs>